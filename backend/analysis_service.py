@@ -1,4 +1,42 @@
 from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+
+DEFAULT_STUDY_DURATION_MINUTES = 25
+
+# Advice codes, in rule order (a later rule wins)
+NO_ADVICE, LOW_FOCUS, TAKE_A_BREAK, LATE_NIGHT = 0, 1, 2, 3
+
+# Advice shown for each code; descriptions are formatted with the current
+# duration (`minutes`) and the student's preferred duration (`goal`)
+ADVICE = {
+    LOW_FOCUS: {
+        "title": "Low Focus Detected",
+        "description": "You seem a bit distracted. Try taking a deep breath or a short stretch.",
+        "type": "warning"
+    },
+    TAKE_A_BREAK: {
+        "title": "Time for a Break?",
+        "description": "You've been studying for {minutes} mins. Your goal was {goal} mins.",
+        "type": "info"
+    },
+    LATE_NIGHT: {
+        "title": "Late Night Warrior",
+        "description": "It's getting late. Sleep is crucial for memory consolidation!",
+        "type": "info"
+    }
+}
+
+def preferred_duration(value: Optional[int]) -> int:
+    """A missing or NULL study_duration_minutes preference means the default"""
+    return DEFAULT_STUDY_DURATION_MINUTES if value is None else value
+
+def build_advice(code: int, minutes: int, goal: int) -> Optional[dict]:
+    advice = ADVICE.get(code)
+    if advice is None:
+        return None
+    return {**advice, "description": advice["description"].format(minutes=minutes, goal=goal)}
 
 class AnalysisService:
     def analyze_session(self, focus_score: float, current_duration_minutes: int, preferences: dict) -> dict:
@@ -6,33 +44,43 @@ class AnalysisService:
         Analyzes the current session state and returns advice if needed.
         Returns None if no advice is needed.
         """
-        advice = None
+        code = NO_ADVICE
         current_hour = datetime.now().hour
 
         # 1. Check Focus Quality
         if focus_score < 0.4:
-            advice = {
-                "title": "Low Focus Detected",
-                "description": "You seem a bit distracted. Try taking a deep breath or a short stretch.",
-                "type": "warning"
-            }
+            code = LOW_FOCUS
 
         # 2. Check Duration vs Preference
-        preferred_duration = preferences.get("study_duration_minutes", 25)
+        goal = preferred_duration(preferences.get("study_duration_minutes"))
         # If they exceed their preferred duration by 5 minutes
-        if current_duration_minutes >= preferred_duration + 5:
-             advice = {
-                "title": "Time for a Break?",
-                "description": f"You've been studying for {current_duration_minutes} mins. Your goal was {preferred_duration} mins.",
-                "type": "info"
-            }
+        if current_duration_minutes >= goal + 5:
+            code = TAKE_A_BREAK
 
         # 3. Late Night Study
         if current_hour >= 23 or current_hour < 5:
-             advice = {
-                "title": "Late Night Warrior",
-                "description": "It's getting late. Sleep is crucial for memory consolidation!",
-                "type": "info"
-            }
+            code = LATE_NIGHT
+
+        return build_advice(code, current_duration_minutes, goal)
+
+    def analyze_batch(self, focus_scores: List[float], current_durations: List[int],
+                      preferred_durations: List[Optional[int]]) -> List[Optional[dict]]:
+        """
+        analyze_session for many students at once. The rules are evaluated
+        over arrays and only the advice dicts are built per student.
+        """
+        focus = np.asarray(focus_scores, dtype=np.float64)
+        duration = np.asarray(current_durations, dtype=np.int64)
+        preferred = np.array([preferred_duration(p) for p in preferred_durations], dtype=np.int64)
+        current_hour = datetime.now().hour
+
+        codes = np.full(len(focus), NO_ADVICE, dtype=np.int8)
+        codes[focus < 0.4] = LOW_FOCUS
+        codes[duration >= preferred + 5] = TAKE_A_BREAK
+        if current_hour >= 23 or current_hour < 5:
+            codes[:] = LATE_NIGHT
 
-        return advice
+        return [
+            build_advice(code, minutes, goal)
+            for code, minutes, goal in zip(codes.tolist(), duration.tolist(), preferred.tolist())
+        ]
@@ -1,75 +1,182 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from sqlalchemy import and_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
 import json
-from .models import StudySession, FocusMetric, StudyPattern, Student
+import os
+import numpy as np
+from .models import StudySession, FocusMetric, StudyPattern, Student, DailyStudyRollup
+from .session_aggregates import SessionAggregator
+from . import columnar_analytics as columnar
+
+WEEKDAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+@dataclass
+class StudentSnapshot:
+    """Everything the analytics endpoints need about one student, computed in a single pass"""
+    student_id: int
+    stats: Dict
+    weekly_data: List[Dict]
+    
+    # Last two weeks, used for insights
+    recent_sessions: int = 0
+    recent_avg_distractions: float = 0.0
+    best_hour_recent: Optional[int] = None
+    optimal_length_recent: Optional[int] = None
+    
+    # Whole history, stored on StudyPattern
+    best_hour_overall: Optional[int] = None
+    optimal_length_overall: Optional[int] = None
 
 class AnalyticsService:
     """Service for analyzing user study patterns and generating personalized insights"""
     
-    def calculate_user_stats(self, db: Session, student_id: int) -> Dict:
-        """Calculate comprehensive user statistics"""
-        
-        # Get all completed sessions
-        sessions = db.query(StudySession).filter(
-            and_(
-                StudySession.student_id == student_id,
-                StudySession.completed == True
+    def __init__(self, engine: str = None):
+        self.aggregates = SessionAggregator()
+        # "rollup": daily rollups plus grouped SQL (three small queries per snapshot)
+        # "columnar": load the sessions as NumPy columns and aggregate in memory
+        self.engine = engine or os.environ.get("ANALYTICS_ENGINE", "rollup")
+    
+    def build_snapshot(self, db: Session, student_id: int, now: Optional[datetime] = None) -> StudentSnapshot:
+        """Compute stats, weekly data and focus patterns for a student together.
+        
+        Four queries: the daily rollups, the sessions on the two partial days
+        at the window edges, the last week's session durations for the weekly
+        chart, and one grouped focus profile covering both the last two weeks
+        and all time.
+        """
+        if self.engine == "columnar":
+            return self.build_columnar_snapshot(columnar.SessionColumns.load(db, student_id), student_id, now)
+        
+        now = now or datetime.utcnow()
+        week_ago = now - timedelta(days=7)
+        two_weeks_ago = now - timedelta(days=14)
+        
+        rollups = self._get_rollups(db, student_id)
+        total_sessions = sum(r.session_count for r in rollups)
+        
+        if not total_sessions:
+            return StudentSnapshot(
+                student_id=student_id,
+                stats=self._get_default_stats(),
+                weekly_data=self._format_weekly_data({})
             )
-        ).all()
         
-        if not sessions:
-            return self._get_default_stats()
+        edge_sessions = self.aggregates.sessions_on_days(db, student_id, [two_weeks_ago.date(), week_ago.date()])
+        this_week = self._window_totals(rollups, edge_sessions, week_ago)
+        last_week = self._window_totals(rollups, edge_sessions, two_weeks_ago, week_ago)
+        recent = self._window_totals(rollups, edge_sessions, two_weeks_ago)
         
         # Calculate totals
-        total_minutes = sum(s.duration_minutes for s in sessions)
-        total_sessions = len(sessions)
-        avg_focus = sum(s.focus_score for s in sessions) / total_sessions if total_sessions > 0 else 0
-        
-        # Calculate this week's stats
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        this_week_sessions = [s for s in sessions if s.start_time >= week_ago]
-        this_week_minutes = sum(s.duration_minutes for s in this_week_sessions) / 60  # Convert to hours
+        total_minutes = sum(r.total_minutes for r in rollups)
+        avg_focus = sum(r.focus_sum for r in rollups) / total_sessions
         
         # Calculate streak
-        streak = self._calculate_streak(sessions)
+        streak = self._calculate_streak((r.day for r in rollups if r.session_count > 0), now.date())
         
         # Get last week for comparison
-        two_weeks_ago = datetime.utcnow() - timedelta(days=14)
-        last_week_sessions = [s for s in sessions if two_weeks_ago <= s.start_time < week_ago]
-        last_week_avg_focus = sum(s.focus_score for s in last_week_sessions) / len(last_week_sessions) if last_week_sessions else 0
+        last_week_avg_focus = last_week["focus_sum"] / last_week["sessions"] if last_week["sessions"] else 0
         
         # Calculate improvement
         focus_improvement = ((avg_focus - last_week_avg_focus) / last_week_avg_focus * 100) if last_week_avg_focus > 0 else 0
         
-        return {
+        if _rounds_unstably(avg_focus) or _rounds_unstably(focus_improvement):
+            # Rollups add the focus scores in a different order than one pass
+            # over the sessions; at a rounding boundary (e.g. 66.35) that can
+            # change the rounded value, so redo the two sums session by session
+            focus_sum, last_week_focus_sum = self.aggregates.ordered_focus_sums(db, student_id, two_weeks_ago, week_ago)
+            avg_focus = focus_sum / total_sessions
+            last_week_avg_focus = last_week_focus_sum / last_week["sessions"] if last_week["sessions"] else 0
+            focus_improvement = ((avg_focus - last_week_avg_focus) / last_week_avg_focus * 100) if last_week_avg_focus > 0 else 0
+        
+        stats = {
             "total_study_time_hours": round(total_minutes / 60, 1),
-            "this_week_hours": round(this_week_minutes, 1),
+            "this_week_hours": round(this_week["minutes"] / 60, 1),
             "average_focus_score": round(avg_focus, 1),
             "current_streak_days": streak,
             "total_sessions": total_sessions,
-            "this_week_sessions": len(this_week_sessions),
+            "this_week_sessions": this_week["sessions"],
             "focus_improvement_percent": round(focus_improvement, 1)
         }
+        
+        snapshot = StudentSnapshot(
+            student_id=student_id,
+            stats=stats,
+            weekly_data=self._format_weekly_data(
+                self._weekday_hours(self.aggregates.durations_since(db, student_id, week_ago))
+            ),
+            recent_sessions=recent["sessions"],
+            recent_avg_distractions=recent["distraction_sum"] / recent["sessions"] if recent["sessions"] else 0.0
+        )
+        self._apply_focus_profile(snapshot, self.aggregates.focus_profile(db, student_id, two_weeks_ago))
+        return snapshot
     
-    def _calculate_streak(self, sessions: List[StudySession]) -> int:
-        """Calculate current study streak in days"""
-        if not sessions:
-            return 0
+    def build_columnar_snapshot(self, columns: "columnar.SessionColumns", student_id: int,
+                                now: Optional[datetime] = None) -> StudentSnapshot:
+        """build_snapshot computed from a student's sessions as NumPy columns"""
+        now = now or datetime.utcnow()
+        week_ago = now - timedelta(days=7)
+        two_weeks_ago = now - timedelta(days=14)
+        
+        total_sessions = len(columns)
+        if not total_sessions:
+            return StudentSnapshot(
+                student_id=student_id,
+                stats=self._get_default_stats(),
+                weekly_data=self._format_weekly_data({})
+            )
+        
+        recent_mask = columns.window(two_weeks_ago)
+        this_week = columnar.window_totals(columns, columns.window(week_ago))
+        last_week = columnar.window_totals(columns, columns.window(two_weeks_ago, week_ago))
+        recent = columnar.window_totals(columns, recent_mask)
         
-        # Sort sessions by date
-        sorted_sessions = sorted(sessions, key=lambda x: x.start_time, reverse=True)
+        avg_focus = columnar.focus_sum(columns.focus) / total_sessions
+        last_week_avg_focus = last_week["focus_sum"] / last_week["sessions"] if last_week["sessions"] else 0
+        focus_improvement = ((avg_focus - last_week_avg_focus) / last_week_avg_focus * 100) if last_week_avg_focus > 0 else 0
         
+        stats = {
+            "total_study_time_hours": round(int(columns.duration.sum()) / 60, 1),
+            "this_week_hours": round(this_week["minutes"] / 60, 1),
+            "average_focus_score": round(avg_focus, 1),
+            "current_streak_days": columnar.streak(columns, now.date()),
+            "total_sessions": total_sessions,
+            "this_week_sessions": this_week["sessions"],
+            "focus_improvement_percent": round(focus_improvement, 1)
+        }
+        
+        everything = np.ones(total_sessions, dtype=bool)
+        return StudentSnapshot(
+            student_id=student_id,
+            stats=stats,
+            weekly_data=self._format_weekly_data(columnar.weekday_hours(columns, columns.window(week_ago))),
+            recent_sessions=recent["sessions"],
+            recent_avg_distractions=recent["distraction_sum"] / recent["sessions"] if recent["sessions"] else 0.0,
+            best_hour_recent=columnar.best_hour(columns, recent_mask),
+            optimal_length_recent=columnar.optimal_length(columns, recent_mask),
+            best_hour_overall=columnar.best_hour(columns, everything),
+            optimal_length_overall=columnar.optimal_length(columns, everything)
+        )
+    
+    def calculate_user_stats(self, db: Session, student_id: int, snapshot: Optional[StudentSnapshot] = None) -> Dict:
+        """Calculate comprehensive user statistics"""
+        snapshot = snapshot or self.build_snapshot(db, student_id)
+        return snapshot.stats
+    
+    def _calculate_streak(self, study_days: Iterable[date], today: date) -> int:
+        """Calculate current study streak in days"""
         # Get unique study dates
-        study_dates = set()
-        for session in sorted_sessions:
-            date = session.start_time.date()
-            study_dates.add(date)
+        study_dates = set(study_days)
+        
+        if not study_dates:
+            return 0
         
         # Calculate streak
         streak = 0
-        current_date = datetime.utcnow().date()
+        current_date = today
         
         while current_date in study_dates:
             streak += 1
@@ -77,6 +184,187 @@ class AnalyticsService:
         
         return streak
     
+    def _apply_focus_profile(self, snapshot: StudentSnapshot, profile: List[Tuple]):
+        """Fold the grouped (hour, bucket) profile into best hour and session length"""
+        hours, hours_recent, buckets, buckets_recent = {}, {}, {}, {}
+        
+        def add(groups, key, first_id, focus_sum, count):
+            if not count:
+                return
+            group = groups.setdefault(key, [first_id, 0.0, 0])
+            group[0] = min(group[0], first_id)
+            group[1] += focus_sum
+            group[2] += count
+        
+        for hour, bucket, count, focus_sum, first_id, recent_count, recent_focus_sum, recent_first_id in profile:
+            add(hours, hour, first_id, focus_sum, count)
+            add(buckets, bucket, bucket, focus_sum, count)
+            add(hours_recent, hour, recent_first_id, recent_focus_sum, recent_count)
+            add(buckets_recent, bucket, bucket, recent_focus_sum, recent_count)
+        
+        def averages(groups):
+            # (key, average focus, count), in order of first appearance
+            ordered = sorted(groups.items(), key=lambda item: item[1][0])
+            return [(key, focus_sum / count, count) for key, (_, focus_sum, count) in ordered]
+        
+        snapshot.best_hour_recent = self._find_best_study_hour(averages(hours_recent))
+        snapshot.best_hour_overall = self._find_best_study_hour(averages(hours))
+        snapshot.optimal_length_recent = self._find_optimal_session_length(averages(buckets_recent))
+        snapshot.optimal_length_overall = self._find_optimal_session_length(averages(buckets))
+    
+    # ===== DAILY ROLLUPS =====
+    
+    def rollup_contribution(self, session: StudySession) -> Optional[Tuple]:
+        """Snapshot what a session currently contributes to its daily rollup.
+        
+        Must be taken before the session row is mutated so that a re-completed
+        session can be subtracted from the day it was previously counted on.
+        """
+        if not session.completed or session.start_time is None:
+            return None
+        return (
+            session.start_time.date(),
+            session.duration_minutes or 0,
+            session.focus_score or 0.0,
+            session.distractions_count or 0,
+        )
+    
+    def apply_session_rollup(self, db: Session, session: StudySession, previous: Optional[Tuple] = None):
+        """Incrementally move a session's contribution into the daily rollup table.
+        
+        Does not commit; the caller commits together with the session update.
+        """
+        has_rollups = db.query(DailyStudyRollup.id).filter(
+            DailyStudyRollup.student_id == session.student_id
+        ).first()
+        if not has_rollups:
+            # First completion since the rollup table was added: backfill from
+            # the stored (not yet flushed) session state, then apply the delta
+            self.rebuild_rollups(db, session.student_id)
+        
+        if previous is not None:
+            day, minutes, focus, distractions = previous
+            self._add_to_rollup(db, session.student_id, day, -minutes, -1, -focus, -distractions)
+        
+        current = self.rollup_contribution(session)
+        if current is not None:
+            day, minutes, focus, distractions = current
+            self._add_to_rollup(db, session.student_id, day, minutes, 1, focus, distractions)
+    
+    def rebuild_rollups(self, db: Session, student_id: int) -> List[DailyStudyRollup]:
+        """Recompute a student's rollups from the raw sessions (one-off backfill).
+        
+        Flushes but does not commit.
+        """
+        db.query(DailyStudyRollup).filter(DailyStudyRollup.student_id == student_id).delete()
+        
+        columns = columnar.SessionColumns.load(db, student_id)
+        rows = [
+            {
+                "student_id": student_id,
+                "day": day,
+                "total_minutes": minutes,
+                "session_count": sessions,
+                "focus_sum": focus,
+                "distraction_sum": distractions
+            }
+            for day, minutes, sessions, focus, distractions in zip(*columnar.day_totals(columns))
+        ]
+        # A concurrent backfill of the same student may insert these days
+        # first; overwrite its rows with the same totals instead of failing
+        self._upsert_rollups(db, rows, accumulate=False)
+        return db.query(DailyStudyRollup).filter(
+            DailyStudyRollup.student_id == student_id
+        ).order_by(DailyStudyRollup.day).populate_existing().all()
+    
+    def _add_to_rollup(self, db: Session, student_id: int, day: date, minutes: int, sessions: int, focus: float, distractions: int):
+        # One upsert instead of read-then-insert, so two completions on the
+        # same new day cannot both try to insert it
+        self._upsert_rollups(db, [{
+            "student_id": student_id,
+            "day": day,
+            "total_minutes": minutes,
+            "session_count": sessions,
+            "focus_sum": focus,
+            "distraction_sum": distractions
+        }], accumulate=True)
+    
+    def _upsert_rollups(self, db: Session, rows: List[Dict], accumulate: bool):
+        """INSERT ... ON CONFLICT (student_id, day) DO UPDATE, adding to the
+        existing totals when `accumulate` and replacing them otherwise"""
+        if not rows:
+            return
+        dialect = db.get_bind().dialect.name
+        insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        table = DailyStudyRollup.__table__
+        stmt = insert(table)
+        totals = ("total_minutes", "session_count", "focus_sum", "distraction_sum")
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.student_id, table.c.day],
+            set_={
+                name: table.c[name] + stmt.excluded[name] if accumulate else stmt.excluded[name]
+                for name in totals
+            }
+        )
+        db.execute(stmt, rows)
+    
+    def _get_rollups(self, db: Session, student_id: int) -> List[DailyStudyRollup]:
+        """Load a student's daily rollups, backfilling them on first use"""
+        query = db.query(DailyStudyRollup).filter(
+            DailyStudyRollup.student_id == student_id
+        ).order_by(DailyStudyRollup.day)
+        rollups = query.all()
+        
+        if rollups:
+            return rollups
+        
+        # Databases created before the rollup table existed have sessions but no rollups
+        has_sessions = db.query(StudySession.id).filter(
+            and_(
+                StudySession.student_id == student_id,
+                StudySession.completed == True
+            )
+        ).first()
+        if has_sessions:
+            self.rebuild_rollups(db, student_id)
+            db.commit()
+            return query.all()
+        
+        return []
+    
+    def _window_totals(self, rollups: List[DailyStudyRollup], edge_sessions: List[Tuple],
+                       start: datetime, end: Optional[datetime] = None) -> Dict:
+        """Totals for sessions starting in [start, end).
+        
+        Whole days come from the rollups; the partial days at the edges of the
+        window come from `edge_sessions`, so the result matches a per-session
+        filter exactly.
+        """
+        totals = {"minutes": 0, "sessions": 0, "focus_sum": 0.0, "distraction_sum": 0}
+        
+        def add(day, minutes, sessions, focus, distractions):
+            totals["minutes"] += minutes
+            totals["sessions"] += sessions
+            totals["focus_sum"] += focus
+            totals["distraction_sum"] += distractions
+        
+        edge_days = {start.date()}
+        if end is not None:
+            edge_days.add(end.date())
+        
+        for r in rollups:
+            if r.day in edge_days or r.day < start.date() or (end is not None and r.day > end.date()):
+                continue
+            add(r.day, r.total_minutes, r.session_count, r.focus_sum, r.distraction_sum)
+        
+        # Partial edge days
+        for start_time, minutes, focus, distractions in edge_sessions:
+            if start_time.date() not in edge_days or start_time < start or (end is not None and start_time >= end):
+                continue
+            add(start_time.date(), minutes or 0, 1, focus or 0.0, distractions or 0)
+        
+        return totals
+    
     def _get_default_stats(self) -> Dict:
         """Return default stats for new users"""
         return {
@@ -89,37 +377,29 @@ class AnalyticsService:
             "focus_improvement_percent": 0
         }
     
-    def generate_insights(self, db: Session, student_id: int) -> List[str]:
+    def generate_insights(self, db: Session, student_id: int, snapshot: Optional[StudentSnapshot] = None) -> List[str]:
         """Generate personalized insights based on user data"""
         insights = []
+        snapshot = snapshot or self.build_snapshot(db, student_id)
         
-        # Get sessions from last 2 weeks
-        two_weeks_ago = datetime.utcnow() - timedelta(days=14)
-        sessions = db.query(StudySession).filter(
-            and_(
-                StudySession.student_id == student_id,
-                StudySession.completed == True,
-                StudySession.start_time >= two_weeks_ago
-            )
-        ).all()
-        
-        if not sessions:
+        # Need sessions from last 2 weeks
+        if not snapshot.recent_sessions:
             insights.append("Start your first study session to get personalized insights!")
             return insights
         
         # Analyze best time of day
-        best_hour = self._find_best_study_hour(sessions)
+        best_hour = snapshot.best_hour_recent
         if best_hour is not None:
             time_str = self._format_hour(best_hour)
             insights.append(f"🌟 Your best study time is around {time_str}")
         
         # Analyze optimal session length
-        optimal_length = self._find_optimal_session_length(sessions)
+        optimal_length = snapshot.optimal_length_recent
         if optimal_length:
             insights.append(f"⏱️ Your focus is best in {optimal_length}-minute sessions")
         
         # Check for improvement
-        stats = self.calculate_user_stats(db, student_id)
+        stats = snapshot.stats
         if stats["focus_improvement_percent"] > 5:
             insights.append(f"📈 Great progress! Your focus improved {stats['focus_improvement_percent']}% this week")
         elif stats["focus_improvement_percent"] < -5:
@@ -132,27 +412,19 @@ class AnalyticsService:
             insights.append(f"✨ {stats['current_streak_days']}-day streak! You're building great habits")
         
         # Analyze distractions
-        avg_distractions = sum(s.distractions_count for s in sessions) / len(sessions)
+        avg_distractions = snapshot.recent_avg_distractions
         if avg_distractions > 3:
             insights.append("📱 Try blocking distracting apps - you're averaging {:.0f} distractions per session".format(avg_distractions))
         
         return insights
     
-    def _find_best_study_hour(self, sessions: List[StudySession]) -> Optional[int]:
+    def _find_best_study_hour(self, hour_focus: List[Tuple[int, float, int]]) -> Optional[int]:
         """Find the hour of day with best focus scores"""
-        hour_scores = {}
-        
-        for session in sessions:
-            hour = session.start_time.hour
-            if hour not in hour_scores:
-                hour_scores[hour] = []
-            hour_scores[hour].append(session.focus_score)
-        
-        if not hour_scores:
+        if not hour_focus:
             return None
         
-        # Calculate average for each hour
-        hour_averages = {hour: sum(scores) / len(scores) for hour, scores in hour_scores.items()}
+        # Average focus for each hour, in order of first appearance
+        hour_averages = {hour: avg for hour, avg, _ in hour_focus}
         
         # Return hour with highest average (only if we have enough data)
         if len(hour_averages) >= 2:
@@ -160,35 +432,13 @@ class AnalyticsService:
         
         return None
     
-    def _find_optimal_session_length(self, sessions: List[StudySession]) -> Optional[int]:
+    def _find_optimal_session_length(self, bucket_focus: List[Tuple[int, float, int]]) -> Optional[int]:
         """Find the session length with best focus scores"""
-        # Group sessions by duration buckets
-        buckets = {
-            15: [],  # 10-20 min
-            25: [],  # 20-30 min
-            35: [],  # 30-40 min
-            45: [],  # 40-50 min
-            60: []   # 50+ min
-        }
-        
-        for session in sessions:
-            duration = session.duration_minutes
-            if duration < 20:
-                buckets[15].append(session.focus_score)
-            elif duration < 30:
-                buckets[25].append(session.focus_score)
-            elif duration < 40:
-                buckets[35].append(session.focus_score)
-            elif duration < 50:
-                buckets[45].append(session.focus_score)
-            else:
-                buckets[60].append(session.focus_score)
-        
-        # Calculate averages
+        # Averages per duration bucket (15, 25, 35, 45, 60)
         bucket_averages = {
-            duration: sum(scores) / len(scores) 
-            for duration, scores in buckets.items() 
-            if len(scores) >= 2  # Need at least 2 sessions
+            duration: avg
+            for duration, avg, count in bucket_focus
+            if count >= 2  # Need at least 2 sessions
         }
         
         if bucket_averages:
@@ -207,38 +457,33 @@ class AnalyticsService:
         else:
             return f"{hour - 12} PM"
     
-    def get_weekly_data(self, db: Session, student_id: int) -> List[Dict]:
+    def get_weekly_data(self, db: Session, student_id: int, snapshot: Optional[StudentSnapshot] = None) -> List[Dict]:
         """Get study data for the past week for charts"""
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        
-        sessions = db.query(StudySession).filter(
-            and_(
-                StudySession.student_id == student_id,
-                StudySession.completed == True,
-                StudySession.start_time >= week_ago
-            )
-        ).all()
-        
-        # Group by day
-        days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-        day_data = {day: {"hours": 0, "sessions": 0} for day in days}
-        
-        for session in sessions:
-            day_name = days[session.start_time.weekday()]
-            day_data[day_name]["hours"] += session.duration_minutes / 60
-            day_data[day_name]["sessions"] += 1
-        
-        # Format for frontend
+        snapshot = snapshot or self.build_snapshot(db, student_id)
+        return snapshot.weekly_data
+    
+    def _weekday_hours(self, sessions: Iterable[Tuple[datetime, int]]) -> Dict[int, Tuple[float, int]]:
+        """{weekday: (hours, sessions)}, adding each session's minutes / 60 in
+        session order so the rounded hours match a per-session sum"""
+        weekdays = {}
+        for start_time, minutes in sessions:
+            hours, count = weekdays.get(start_time.weekday(), (0, 0))
+            weekdays[start_time.weekday()] = (hours + (minutes or 0) / 60, count + 1)
+        return weekdays
+    
+    def _format_weekly_data(self, weekdays: Dict[int, Tuple[float, int]]) -> List[Dict]:
+        """Format per-weekday (hours, sessions) totals for the frontend; days
+        without sessions report 0 hours"""
         return [
             {
                 "day": day,
-                "hours": round(data["hours"], 1),
-                "sessions": data["sessions"]
+                "hours": round(weekdays.get(i, (0, 0))[0], 1),
+                "sessions": weekdays.get(i, (0, 0))[1]
             }
-            for day, data in day_data.items()
+            for i, day in enumerate(WEEKDAY_NAMES)
         ]
     
-    def update_study_pattern(self, db: Session, student_id: int):
+    def update_study_pattern(self, db: Session, student_id: int, snapshot: Optional[StudentSnapshot] = None):
         """Update or create study pattern analytics for user"""
         pattern = db.query(StudyPattern).filter(StudyPattern.student_id == student_id).first()
         
@@ -246,34 +491,32 @@ class AnalyticsService:
             pattern = StudyPattern(student_id=student_id)
             db.add(pattern)
         
-        # Get all sessions
-        sessions = db.query(StudySession).filter(
-            and_(
-                StudySession.student_id == student_id,
-                StudySession.completed == True
-            )
-        ).all()
+        # Update pattern data
+        snapshot = snapshot or self.build_snapshot(db, student_id)
+        stats = snapshot.stats
         
-        if not sessions:
+        if not stats["total_sessions"]:
             db.commit()
             return
         
-        # Update pattern data
-        stats = self.calculate_user_stats(db, student_id)
         pattern.average_focus_score = stats["average_focus_score"]
         pattern.total_study_minutes = int(stats["total_study_time_hours"] * 60)
         pattern.current_streak_days = stats["current_streak_days"]
         pattern.sessions_this_week = stats["this_week_sessions"]
         
         # Find best hour
-        best_hour = self._find_best_study_hour(sessions)
-        if best_hour is not None:
-            pattern.best_study_hour = best_hour
+        if snapshot.best_hour_overall is not None:
+            pattern.best_study_hour = snapshot.best_hour_overall
         
         # Find optimal session length
-        optimal_length = self._find_optimal_session_length(sessions)
-        if optimal_length:
-            pattern.optimal_session_minutes = optimal_length
+        if snapshot.optimal_length_overall:
+            pattern.optimal_session_minutes = snapshot.optimal_length_overall
         
         pattern.last_updated = datetime.utcnow()
         db.commit()
+
+def _rounds_unstably(value: float) -> bool:
+    """Whether round(value, 1) could change if the float sums behind `value`
+    were added in another order"""
+    scaled = abs(value) * 10
+    return abs(scaled - int(scaled) - 0.5) < 1e-6 * max(1.0, scaled)
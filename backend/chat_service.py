@@ -1,10 +1,121 @@
-import re
 import os
-import requests
-import json
+import asyncio
+import hashlib
+import threading
+import time
+from typing import AsyncIterator, Optional
+from .cache import TTLCache
+from .circuit_breaker import CircuitBreaker
+from .llm_providers import GeminiProvider, LLMHttpClient, OpenAIProvider, ProviderError
+from .single_flight import SingleFlight
+from .intent_matcher import IntentMatcher
+from .response_cache import ResponseCache
+from .community_retriever import CommunityRetriever
+
+DEFAULT_GEMINI_MODEL = "gemini-1.5-flash"
+# Negative-cache marker for API keys whose model discovery failed
+DISCOVERY_FAILED = object()
+
+DEFAULT_RESPONSE = "That's an interesting question! I specialize in evidence-based study techniques. I can help with: **Memory** (Spaced Repetition, Feynman Technique), **Focus** (Pomodoro, Deep Work), **Exam Prep**, **Motivation**, **Study Planning**, and more. Could you be more specific about what you'd like to learn?"
+
+class TTFTStats:
+    """Time to first token of streamed answers, per source (community, openai, gemini, cache, local)"""
 
-class ChatService:
     def __init__(self):
+        self._lock = threading.Lock()
+        self._sources = {}
+
+    def record(self, source: str, seconds: float):
+        with self._lock:
+            entry = self._sources.setdefault(source, {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            entry["last"] = seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                source: {
+                    "streams": e["count"],
+                    "avg_ttft_ms": round(e["total"] / e["count"] * 1000, 1),
+                    "max_ttft_ms": round(e["max"] * 1000, 1),
+                    "last_ttft_ms": round(e["last"] * 1000, 1)
+                }
+                for source, e in self._sources.items()
+            }
+
+class StageStats:
+    """Latency of each get_response stage (community, cache, provider, local) and how often it answered"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, stage: str, seconds: float, answered: bool):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {"count": 0, "answered": 0, "total": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["answered"] += answered
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                stage: {
+                    "calls": e["count"],
+                    "answered": e["answered"],
+                    "avg_ms": round(e["total"] / e["count"] * 1000, 3),
+                    "max_ms": round(e["max"] * 1000, 3)
+                }
+                for stage, e in self._stages.items()
+            }
+
+class ChatService:
+    def __init__(self, cache: ResponseCache = None, retriever: CommunityRetriever = None):
+        # Overridable so the providers can be pointed at a local stub server
+        self.openai_base_url = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+        self.gemini_base_url = os.environ.get("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+        self.openai_model = os.environ.get("OPENAI_MODEL", "gpt-3.5-turbo")
+        # One keep-alive connection pool for both providers
+        self.http = LLMHttpClient()
+        self.openai = OpenAIProvider(self.http, self.openai_base_url, self.openai_model)
+        self.gemini = GeminiProvider(self.http, self.gemini_base_url)
+        # Fail fast to the local matcher while a provider is down
+        self.breakers = {
+            name: CircuitBreaker(
+                name,
+                failure_threshold=int(os.environ.get("CHAT_BREAKER_FAILURES", 5)),
+                reset_timeout_seconds=float(os.environ.get("CHAT_BREAKER_RESET_SECONDS", 30))
+            )
+            for name in ("openai", "gemini")
+        }
+        # Hedge mode: answer locally if the provider takes longer than this (0 = wait for it)
+        self.hedge_seconds = float(os.environ.get("CHAT_HEDGE_MS", 0)) / 1000
+        self.hedged = 0
+        self._hedged_calls = set()
+        # Identical prompts asked at the same time share one provider call
+        self.in_flight = SingleFlight()
+        self.discovery_in_flight = SingleFlight()
+        # Answers from external LLMs, shared across users
+        self.cache = cache or ResponseCache()
+        # Answers from the community Q&A, tried before any provider
+        self.retriever = retriever
+        self.stages = StageStats()
+        
+        # Discovered Gemini model per API key (hashed); failures are cached for a shorter time
+        self.gemini_models = TTLCache(max_size=256, ttl_seconds=float(os.environ.get("GEMINI_MODEL_TTL_SECONDS", 3600)))
+        self.gemini_failure_ttl_seconds = 60.0
+        # Refresh in the background once less than this fraction of the TTL is left
+        self.gemini_refresh_fraction = 0.2
+        self._refreshing = set()
+        self._refresh_tasks = set()
+        self._discovery_lock = threading.Lock()
+        self.discovery_calls = 0
+        self.discovery_failures = 0
+        self.ttft = TTFTStats()
+        
         self.patterns = {
             # Memory and Retention Techniques
             r"memory|remember|forget|retention": "Memory can be improved using **Spaced Repetition** and **Active Recall**. Try breaking your study sessions into smaller chunks and testing yourself frequently. Review material at increasing intervals: 1 day, 3 days, 1 week, 2 weeks.",
@@ -67,148 +178,242 @@ class ChatService:
             
             r"thank|thanks|appreciate": "You're very welcome! Keep up the great work. Remember: effective studying is about quality, not just quantity. You've got this! 🎯",
         }
+        # All patterns compiled into one regex, keeping the dict order as priority
+        self.matcher = IntentMatcher(self.patterns)
+
+    async def aclose(self):
+        await self.http.aclose()
 
-    def get_response(self, message: str, api_key: str = None) -> str:
-        # 1. External LLM
+    async def get_response(self, message: str, api_key: str = None) -> str:
+        # 1. Community answers to a question like this one
+        community = self._community_response(message)
+        if community is not None:
+            return community
+        
+        # 2. External LLM
         if api_key and len(api_key) > 10:
-            try:
-                response = None
-                # Gemini Key Detection (Starts with AIzaSy)
-                if api_key.startswith("AIzaSy"):
-                    response = self._call_gemini(message, api_key)
-                # Default to OpenAI (Starts with sk- or other)
+            # Gemini Key Detection (Starts with AIzaSy), default to OpenAI (Starts with sk- or other)
+            provider, model = ("gemini", "auto") if api_key.startswith("AIzaSy") else ("openai", self.openai_model)
+            
+            # Identical questions are answered from the cache without any HTTP call
+            started = time.perf_counter()
+            cached = await self.cache.aget(message, provider, model)
+            self.stages.record("cache", time.perf_counter() - started, cached is not None)
+            if cached is not None:
+                return cached
+            
+            # An open breaker skips the provider instead of waiting out its timeout
+            if self.breakers[provider].allow():
+                started = time.perf_counter()
+                # Only callers with the same key share a call: a call made with
+                # someone else's key could be rejected where theirs is not
+                key = (self.cache.key(message, provider, model), hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+                ask = lambda: self._ask_provider(provider, model, message, api_key)
+                if not self.hedge_seconds:
+                    response = await self.in_flight.do(key, ask)
                 else:
-                    response = self._call_openai(message, api_key)
-                
-                # Check if the response was successful (not an error message)
-                if response and not (response.startswith("Error") or response.startswith("Failed") or response.startswith("All Gemini")):
+                    call = asyncio.create_task(self.in_flight.do(key, ask))
+                    done, _ = await asyncio.wait({call}, timeout=self.hedge_seconds)
+                    if not done:
+                        # Over budget: answer locally, the late answer still goes into the cache
+                        self.hedged += 1
+                        self._hedged_calls.add(call)
+                        call.add_done_callback(self._hedged_calls.discard)
+                        self.stages.record("provider", time.perf_counter() - started, False)
+                        return self._local_response(message)
+                    response = call.result()
+                self.stages.record("provider", time.perf_counter() - started, response is not None)
+                if response is not None:
                     return response
-                
-                # If it was an error, log it and fall through to local
-                print(f"External API failed, falling back to local. Reason: {response}")
-                
-            except Exception as e:
-                print(f"External API exception, falling back to local. Reason: {str(e)}")
-                # Fall through to local logic below
 
-        # 2. Local Pattern Matching (Fallback)
-        msg_lower = message.lower()
+        # 3. Local Pattern Matching (Fallback)
+        return self._local_response(message)
+
+    async def _ask_provider(self, provider: str, model: str, message: str, api_key: str) -> Optional[str]:
+        """Call a provider, record its health and cache the answer. None means fall back to local."""
+        breaker = self.breakers[provider]
+        started = time.monotonic()
+        try:
+            if provider == "gemini":
+                response = await self._call_gemini(message, api_key)
+            else:
+                response = await self.openai.complete(message, api_key)
+        except ProviderError as e:
+            # A rejected key says nothing about the provider's health
+            if e.provider_fault:
+                breaker.record_failure(time.monotonic() - started)
+            else:
+                breaker.record_client_error()
+            print(f"External API failed, falling back to local. Reason: {e}")
+            return None
+        except Exception as e:
+            breaker.record_failure(time.monotonic() - started)
+            print(f"External API exception, falling back to local. Reason: {str(e)}")
+            return None
         
-        # Check specific patterns
-        for pattern, response in self.patterns.items():
-            if re.search(pattern, msg_lower):
-                return response
+        breaker.record_success(time.monotonic() - started)
+        if response:
+            await self.cache.aput(message, provider, model, response)
+            return response
+        return None
 
-        # 3. Default Fallback
-        return "That's an interesting question! I specialize in evidence-based study techniques. I can help with: **Memory** (Spaced Repetition, Feynman Technique), **Focus** (Pomodoro, Deep Work), **Exam Prep**, **Motivation**, **Study Planning**, and more. Could you be more specific about what you'd like to learn?"
+    def provider_stats(self) -> dict:
+        stats = {name: breaker.metrics() for name, breaker in self.breakers.items()}
+        stats["hedge_ms"] = round(self.hedge_seconds * 1000)
+        stats["hedged"] = self.hedged
+        stats["single_flight"] = self.in_flight.stats()
+        return stats
 
-    def _call_openai(self, message: str, api_key: str) -> str:
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        data = {
-            "model": "gpt-3.5-turbo",
-            "messages": [
-                {
-                    "role": "system", 
-                    "content": """You are an expert AI Study Coach specializing in evidence-based learning science. Your knowledge includes:
-
-**Memory Techniques**: Spaced Repetition, Active Recall, Feynman Technique, Dual Coding, Elaborative Interrogation, Retrieval Practice
-**Focus Strategies**: Pomodoro Technique, Deep Work, Flow State, Attention Management
-**Learning Methods**: Interleaving, Self-Explanation, Concrete Examples, Metacognition
-**Study Skills**: Note-taking (Cornell Method), Time Management, Goal Setting, Environment Optimization
-**Exam Preparation**: Practice Testing, Anxiety Management, Strategic Review
-
-**Your approach**:
-1. Give specific, actionable advice
-2. Explain the 'why' behind techniques (cite learning science when relevant)
-3. Be encouraging and motivating
-4. Keep responses concise but comprehensive (2-4 sentences or a short list)
-5. Use examples when helpful
-6. Acknowledge when students are struggling and provide support
-
-Be warm, knowledgeable, and genuinely helpful. Your goal is to empower students with effective learning strategies."""
-                },
-                {"role": "user", "content": message}
-            ],
-            "temperature": 0.7
-        }
+    async def stream_response(self, message: str, api_key: str = None) -> AsyncIterator[str]:
+        """Like get_response, but yields the answer in chunks as the provider produces them.
+
+        Cached and local answers are yielded as a single chunk. If the
+        provider fails before its first chunk, or its breaker is open, the
+        local answer is used; a failure mid-stream just ends the stream, and
+        partial answers are never cached.
+        """
+        started = time.monotonic()
         
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=10
-        )
+        community = self._community_response(message)
+        if community is not None:
+            self.ttft.record("community", time.monotonic() - started)
+            yield community
+            return
         
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-        else:
-            return f"Error from OpenAI: {response.text}"
-
-    def _call_gemini(self, message: str, api_key: str) -> str:
-        # First, try to discover a working model
-        try:
-            model_name = self._discover_gemini_model(api_key)
-        except Exception as e:
-            # Fallback to a safe default if discovery fails
-            print(f"Model discovery failed: {e}")
-            model_name = "gemini-1.5-flash"
-
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent?key={api_key}"
-        headers = {"Content-Type": "application/json"}
+        if api_key and len(api_key) > 10:
+            provider, model = ("gemini", "auto") if api_key.startswith("AIzaSy") else ("openai", self.openai_model)
+            
+            cached = await self.cache.aget(message, provider, model)
+            if cached is not None:
+                self.ttft.record("cache", time.monotonic() - started)
+                yield cached
+                return
+            
+            chunks = []
+            breaker = self.breakers[provider]
+            if breaker.allow():
+                try:
+                    if provider == "gemini":
+                        model_name = await self._resolve_gemini_model(api_key)
+                        stream = self.gemini.stream(message, api_key, model_name)
+                    else:
+                        stream = self.openai.stream(message, api_key)
+                    
+                    async for chunk in stream:
+                        if not chunks:
+                            self.ttft.record(provider, time.monotonic() - started)
+                        chunks.append(chunk)
+                        yield chunk
+                    breaker.record_success(time.monotonic() - started)
+                except Exception as e:
+                    if isinstance(e, ProviderError) and not e.provider_fault:
+                        breaker.record_client_error()
+                    else:
+                        breaker.record_failure(time.monotonic() - started)
+                    print(f"External API stream failed after {len(chunks)} chunks. Reason: {str(e)}")
+                    if chunks:
+                        return
+                
+                if chunks:
+                    await self.cache.aput(message, provider, model, "".join(chunks))
+                    return
+                print("External API stream returned nothing, falling back to local.")
         
-        system_prompt = """You are an expert AI Study Coach specializing in evidence-based learning science. Your knowledge includes:
+        response = self._local_response(message)
+        self.ttft.record("local", time.monotonic() - started)
+        yield response
+
+    def _community_response(self, message: str) -> Optional[str]:
+        if self.retriever is None or not self.retriever.enabled:
+            return None
+        started = time.perf_counter()
+        response = self.retriever.match(message)
+        self.stages.record("community", time.perf_counter() - started, response is not None)
+        return response
 
-**Memory Techniques**: Spaced Repetition, Active Recall, Feynman Technique, Dual Coding, Elaborative Interrogation, Retrieval Practice
-**Focus Strategies**: Pomodoro Technique, Deep Work, Flow State, Attention Management
-**Learning Methods**: Interleaving, Self-Explanation, Concrete Examples, Metacognition
-**Study Skills**: Note-taking (Cornell Method), Time Management, Goal Setting, Environment Optimization
-**Exam Preparation**: Practice Testing, Anxiety Management, Strategic Review
+    def _local_response(self, message: str) -> str:
+        started = time.perf_counter()
+        msg_lower = message.lower()
+        
+        # Check specific patterns
+        response = self.matcher.match(msg_lower)
+        self.stages.record("local", time.perf_counter() - started, response is not None)
+        if response is not None:
+            return response
 
-**Your approach**:
-1. Give specific, actionable advice
-2. Explain the 'why' behind techniques (cite learning science when relevant)
-3. Be encouraging and motivating
-4. Keep responses concise but comprehensive (2-4 sentences or a short list)
-5. Use examples when helpful
-6. Acknowledge when students are struggling and provide support
+        # Default Fallback
+        return DEFAULT_RESPONSE
 
-Be warm, knowledgeable, and genuinely helpful. Your goal is to empower students with effective learning strategies.
+    async def _call_gemini(self, message: str, api_key: str) -> Optional[str]:
+        # Discovered model for this key, cached across requests
+        model_name = await self._resolve_gemini_model(api_key)
+        return await self.gemini.complete(message, api_key, model_name)
 
-Student question: """
+    async def _resolve_gemini_model(self, api_key: str) -> str:
+        """Cached model discovery: at most one ListModels call per key per TTL"""
+        key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        cached = self.gemini_models.get(key)
         
-        data = {
-            "contents": [{
-                "parts": [{"text": system_prompt + message}]
-            }]
-        }
+        if cached is DISCOVERY_FAILED:
+            return DEFAULT_GEMINI_MODEL
+        if cached is not None:
+            expires_in = self.gemini_models.expires_in(key)
+            if expires_in is not None and expires_in < self.gemini_models.ttl_seconds * self.gemini_refresh_fraction:
+                self._refresh_gemini_model(key, api_key)
+            return cached
         
+        model_name = await self.discovery_in_flight.do(key, lambda: self._run_discovery(key, api_key))
+        return model_name or DEFAULT_GEMINI_MODEL
+    
+    def _refresh_gemini_model(self, key: str, api_key: str):
+        """Re-discover in a background task while the cached name keeps being served"""
+        with self._discovery_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        async def refresh():
+            try:
+                await self._run_discovery(key, api_key, keep_on_failure=True)
+            finally:
+                with self._discovery_lock:
+                    self._refreshing.discard(key)
+        
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def _run_discovery(self, key: str, api_key: str, keep_on_failure: bool = False):
+        with self._discovery_lock:
+            self.discovery_calls += 1
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=10)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if "candidates" in result and result["candidates"]:
-                    return result["candidates"][0]["content"]["parts"][0]["text"]
-                return "No response content from Gemini."
-            else:
-                return f"Error from Gemini ({model_name}): {response.text}"
+            model_name = await self._discover_gemini_model(api_key)
         except Exception as e:
-            return f"Failed to connect to Gemini: {str(e)}"
-
-    def _discover_gemini_model(self, api_key: str) -> str:
-        # Fetch available models
-        url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
-        response = requests.get(url, timeout=5)
+            # Fallback to a safe default if discovery fails
+            print(f"Model discovery failed: {e}")
+            with self._discovery_lock:
+                self.discovery_failures += 1
+            # A background refresh failure leaves the current name to expire normally
+            if not keep_on_failure:
+                self.gemini_models.set(key, DISCOVERY_FAILED, self.gemini_failure_ttl_seconds)
+            return None
         
-        if response.status_code != 200:
-            raise Exception(f"ListModels failed: {response.text}")
-            
-        data = response.json()
-        models = data.get("models", [])
+        self.gemini_models.set(key, model_name)
+        return model_name
+    
+    def gemini_model_stats(self) -> dict:
+        stats = self.gemini_models.stats()
+        with self._discovery_lock:
+            stats["discovery_calls"] = self.discovery_calls
+            stats["discovery_failures"] = self.discovery_failures
+            stats["refreshing"] = len(self._refreshing)
+        stats["collapsed"] = self.discovery_in_flight.stats()["collapsed"]
+        return stats
+    
+    async def _discover_gemini_model(self, api_key: str) -> str:
+        # Fetch available models
+        models = await self.gemini.list_models(api_key)
         
         # Priority list of preferred models
         preferences = ["gemini-1.5-flash", "gemini-1.5-pro", "gemini-1.0-pro", "gemini-pro"]
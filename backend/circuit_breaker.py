@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Health tracking for one external provider.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    allow() returns False, so callers go straight to their fallback. Once
+    `reset_timeout_seconds` have passed a single probe call is let through
+    (half-open): success closes the breaker, failure opens it again. A call
+    rejected because of the request itself (e.g. a bad API key) says nothing
+    about the provider and leaves the state alone.
+
+    Latencies of the last `latency_window` calls are kept for p50/p99.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout_seconds: float = 30.0,
+                 latency_window: int = 500):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_started = None  # Set while a half-open probe is in flight
+        self._latencies = deque(maxlen=latency_window)
+
+        self.calls = 0
+        self.failures = 0
+        self.client_errors = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider right now"""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+                self._state = HALF_OPEN
+            if self._state == CLOSED:
+                return True
+            # A probe that never reported back (e.g. cancelled) does not block forever
+            if self._state == HALF_OPEN and (self._probe_started is None or
+                                             time.monotonic() - self._probe_started >= self.reset_timeout_seconds):
+                self._probe_started = time.monotonic()
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, latency_seconds: float):
+        with self._lock:
+            self.calls += 1
+            self._latencies.append(latency_seconds)
+            self._consecutive_failures = 0
+            self._probe_started = None
+            self._state = CLOSED
+
+    def record_failure(self, latency_seconds: float):
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self._latencies.append(latency_seconds)
+            self._consecutive_failures += 1
+            self._probe_started = None
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.times_opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def record_client_error(self):
+        """Neither success nor failure; frees a half-open probe slot for the next call"""
+        with self._lock:
+            self.calls += 1
+            self.client_errors += 1
+            self._probe_started = None
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "calls": self.calls,
+                "failures": self.failures,
+                "client_errors": self.client_errors,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+                "p50_latency_ms": round(_percentile(latencies, 0.50) * 1000, 1),
+                "p99_latency_ms": round(_percentile(latencies, 0.99) * 1000, 1)
+            }
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
@@ -0,0 +1,175 @@
+# NumPy analytics core over one student's completed sessions held as columns
+# (start time, duration, focus, distractions). Every aggregate is a handful
+# of vectorised passes (bincount / unique / digitize) instead of a Python
+# loop over rows, and reproduces what AnalyticsService computes from the
+# rollups and grouped SQL queries.
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import String, and_, select, type_coerce
+
+from .models import StudySession
+
+US_PER_HOUR = 3_600_000_000
+US_PER_DAY = 24 * US_PER_HOUR
+# 1970-01-01 was a Thursday; weekdays count from Monday = 0
+EPOCH_WEEKDAY = 3
+
+# Same buckets as SessionAggregator.focus_profile: <20 -> 15, <30 -> 25, ..., else 60
+BUCKET_EDGES = np.array([20, 30, 40, 50])
+BUCKET_LENGTHS = np.array([15, 25, 35, 45, 60])
+
+def epoch_us(moment: datetime) -> int:
+    """Microseconds since 1970-01-01 for a naive UTC datetime"""
+    return int(np.datetime64(moment, "us").astype(np.int64))
+
+@dataclass
+class SessionColumns:
+    """A student's completed sessions as parallel arrays, ordered by session id.
+
+    Missing durations, focus scores and distractions are stored as 0, like
+    the rollups count them; `duration_known` remembers which durations were
+    NULL, because SQL puts those in the 60-minute bucket. The calendar
+    columns (day, hour, weekday, bucket) are derived once on construction.
+    """
+    ids: np.ndarray
+    start_us: np.ndarray
+    duration: np.ndarray
+    duration_known: np.ndarray
+    focus: np.ndarray
+    distractions: np.ndarray
+
+    def __post_init__(self):
+        # Days since the epoch (UTC), hour of day, weekday (Monday = 0) and
+        # index into BUCKET_LENGTHS of each session
+        self.day = self.start_us // US_PER_DAY
+        self.hour = (self.start_us // US_PER_HOUR) % 24
+        self.weekday = (self.day + EPOCH_WEEKDAY) % 7
+        self.bucket = np.where(self.duration_known, np.digitize(self.duration, BUCKET_EDGES), len(BUCKET_LENGTHS) - 1)
+
+    @classmethod
+    def load(cls, db, student_id: int) -> "SessionColumns":
+        start_time = StudySession.start_time
+        if db.get_bind().dialect.name == "sqlite":
+            # Keep SQLite's stored datetime strings: NumPy parses them in bulk
+            # far faster than building a datetime object per row
+            start_time = type_coerce(start_time, String)
+        rows = db.execute(
+            select(
+                StudySession.id,
+                start_time,
+                StudySession.duration_minutes,
+                StudySession.focus_score,
+                StudySession.distractions_count
+            ).where(and_(
+                StudySession.student_id == student_id,
+                StudySession.completed == True,
+                StudySession.start_time.is_not(None)
+            )).order_by(StudySession.id)
+        ).all()
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple]) -> "SessionColumns":
+        """From (id, start_time, duration, focus, distractions) tuples; start_time
+        may be a datetime or an ISO string"""
+        ids, starts, durations, focus, distractions = zip(*rows) if rows else ((), (), (), (), ())
+        # None becomes NaN in float arrays
+        durations = np.array(durations, dtype=np.float64)
+        focus = np.array(focus, dtype=np.float64)
+        distractions = np.array(distractions, dtype=np.float64)
+        duration_known = ~np.isnan(durations)
+        return cls(
+            ids=np.array(ids, dtype=np.int64),
+            start_us=np.array(starts, dtype="datetime64[us]").astype(np.int64),
+            duration=np.where(duration_known, durations, 0).astype(np.int64),
+            duration_known=duration_known,
+            focus=np.nan_to_num(focus, nan=0.0),
+            distractions=np.nan_to_num(distractions, nan=0).astype(np.int64)
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def window(self, start: datetime, end: Optional[datetime] = None) -> np.ndarray:
+        """Mask of sessions starting in [start, end)"""
+        mask = self.start_us >= epoch_us(start)
+        if end is not None:
+            mask &= self.start_us < epoch_us(end)
+        return mask
+
+def focus_sum(focus: np.ndarray) -> float:
+    """Sum in row order, one addition at a time. NumPy's pairwise sum() groups
+    the additions differently, which can move an average across a rounding
+    boundary (66.35 -> 66.3 instead of 66.4)."""
+    return sum(focus.tolist())
+
+def day_totals(columns: SessionColumns) -> Tuple[List[date], List[int], List[int], List[float], List[int]]:
+    """(days, minutes, sessions, focus_sum, distraction_sum) per study day, in day order"""
+    days, inverse, sessions = np.unique(columns.day, return_inverse=True, return_counts=True)
+    minutes = np.bincount(inverse, weights=columns.duration, minlength=len(days))
+    focus = np.bincount(inverse, weights=columns.focus, minlength=len(days))
+    distractions = np.bincount(inverse, weights=columns.distractions, minlength=len(days))
+    return (
+        days.astype("datetime64[D]").tolist(),
+        minutes.astype(np.int64).tolist(),
+        sessions.tolist(),
+        focus.tolist(),
+        distractions.astype(np.int64).tolist()
+    )
+
+def window_totals(columns: SessionColumns, mask: np.ndarray) -> Dict:
+    """Same shape as AnalyticsService._window_totals, for the sessions in `mask`"""
+    return {
+        "minutes": int(columns.duration[mask].sum()),
+        "sessions": int(mask.sum()),
+        "focus_sum": focus_sum(columns.focus[mask]),
+        "distraction_sum": int(columns.distractions[mask].sum())
+    }
+
+def weekday_hours(columns: SessionColumns, mask: np.ndarray) -> Dict[int, Tuple[float, int]]:
+    """{weekday: (hours, sessions)} for the sessions in `mask`. bincount adds
+    each session's minutes / 60 in row order, like the per-session loop did."""
+    weekday = columns.weekday[mask]
+    hours = np.bincount(weekday, weights=columns.duration[mask] / 60, minlength=7)
+    sessions = np.bincount(weekday, minlength=7)
+    return {int(day): (float(hours[day]), int(sessions[day])) for day in np.flatnonzero(sessions)}
+
+def streak(columns: SessionColumns, today: date) -> int:
+    """Consecutive study days ending today"""
+    today_number = int((np.datetime64(today, "D") - np.datetime64("1970-01-01", "D")).astype(np.int64))
+    days = columns.day[columns.day <= today_number]
+    if not len(days):
+        return 0
+    # Studied-or-not per day from the first study day to today, newest first
+    studied = np.zeros(today_number - int(days.min()) + 1, dtype=bool)
+    studied[today_number - days] = True
+    return int(len(studied) if studied.all() else np.argmin(studied))
+
+def best_hour(columns: SessionColumns, mask: np.ndarray) -> Optional[int]:
+    """Hour with the best average focus; ties go to the hour studied first.
+    None unless at least two different hours were studied."""
+    hour = columns.hour[mask]
+    counts = np.bincount(hour, minlength=24)
+    hours = np.flatnonzero(counts)
+    if len(hours) < 2:
+        return None
+    averages = np.bincount(hour, weights=columns.focus[mask], minlength=24)[hours] / counts[hours]
+    # First row of each hour (rows are in id order). With repeated indices
+    # the last assignment wins, so assign in reverse to keep the first.
+    first_seen = np.empty(24, dtype=np.int64)
+    first_seen[hour[::-1]] = np.arange(len(hour))[::-1]
+    order = np.argsort(first_seen[hours], kind="stable")
+    return int(hours[order][np.argmax(averages[order])])
+
+def optimal_length(columns: SessionColumns, mask: np.ndarray) -> Optional[int]:
+    """Bucketed session length with the best average focus, over buckets with 2+ sessions"""
+    bucket = columns.bucket[mask]
+    counts = np.bincount(bucket, minlength=len(BUCKET_LENGTHS))
+    eligible = counts >= 2
+    if not eligible.any():
+        return None
+    averages = np.bincount(bucket, weights=columns.focus[mask], minlength=len(BUCKET_LENGTHS))[eligible] / counts[eligible]
+    return int(BUCKET_LENGTHS[eligible][np.argmax(averages)])
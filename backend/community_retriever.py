@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+
+from .models import Answer, Question
+from .vector_index import VectorIndex
+
+def question_text(title: str, content: str) -> str:
+    return f"{title or ''}\n{content or ''}"
+
+class CommunityRetriever:
+    """Answers chat messages from questions the community has already answered.
+
+    Answered questions are embedded into an in-memory VectorIndex; a message
+    whose closest question scores at least `threshold` gets that question's
+    first answer. There is no accepted-answer flag on Answer, so the first
+    answer posted stands in for it.
+
+    Off unless COACH_COMMUNITY_ANSWERS=1: answers are unmoderated and served
+    ahead of the cache and the providers, and the default threshold has only
+    been checked against synthetic paraphrases (benchmarks/bench_chat_retrieval.py),
+    not measured for precision on real questions.
+    """
+
+    def __init__(self, threshold: float = None, enabled: bool = None):
+        self.enabled = enabled if enabled is not None else os.environ.get("COACH_COMMUNITY_ANSWERS", "0").lower() in ("1", "true", "yes")
+        self.threshold = threshold if threshold is not None else float(os.environ.get("COACH_RETRIEVAL_THRESHOLD", 0.6))
+        self.index = VectorIndex(None)
+        self._answers: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.total_seconds = 0.0
+
+    def load(self, db):
+        """Index every answered question, from a sync Session"""
+        if not self.enabled:
+            return
+        first_answer = (
+            select(Answer.question_id, func.min(Answer.id).label("answer_id"))
+            .group_by(Answer.question_id)
+            .subquery()
+        )
+        rows = db.execute(
+            select(Question.id, Question.title, Question.content, Answer.content.label("answer"))
+            .join(first_answer, first_answer.c.question_id == Question.id)
+            .join(Answer, Answer.id == first_answer.c.answer_id)
+            .order_by(Question.id)
+        ).all()
+        with self._lock:
+            self._answers = {row.id: row.answer for row in rows if row.answer}
+        self.index.rebuild((row.id, question_text(row.title, row.content)) for row in rows if row.answer)
+
+    def has_answer(self, question_id: int) -> bool:
+        with self._lock:
+            return question_id in self._answers
+
+    def add_answer(self, question_id: int, title: str, content: str, answer: str):
+        """Make a newly answered question retrievable; later answers to it are ignored"""
+        if not self.enabled or not answer:
+            return
+        with self._lock:
+            if question_id in self._answers:
+                return
+            self._answers[question_id] = answer
+        self.index.add(question_id, question_text(title, content))
+
+    def match(self, message: str) -> Optional[str]:
+        """The answer of the closest answered question, or None below the threshold"""
+        if not self.enabled:
+            return None
+        started = time.perf_counter()
+        matches = self.index.search(message, k=1, min_score=self.threshold)
+        with self._lock:
+            answer = self._answers.get(matches[0][0]) if matches else None
+            self.lookups += 1
+            self.hits += answer is not None
+            self.total_seconds += time.perf_counter() - started
+        return answer
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "answered_questions": len(self._answers),
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0,
+                "avg_lookup_ms": round(self.total_seconds / self.lookups * 1000, 3) if self.lookups else 0
+            }
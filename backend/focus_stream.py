@@ -0,0 +1,166 @@
+import json
+import math
+import struct
+import time
+from collections import deque
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from .metric_buffer import FocusMetricBuffer
+
+# Binary frames: little-endian epoch seconds (float64), focus score (float32),
+# state code (uint8). A binary message may carry several frames back to back.
+BINARY_FRAME = struct.Struct("<dfB")
+STATE_CODES = ["focused", "distracted", "away", "distraction"]
+
+# Plain-text frames sent by older trackers, e.g. "away"
+TEXT_STATES = {"focused": 100.0, "distracted": 50.0, "away": 0.0}
+
+# Longest emotion state / distraction type label accepted from a client
+MAX_LABEL_LENGTH = 64
+
+# (sample time, focus score, emotion state, distraction type)
+Frame = Tuple[datetime, float, Optional[str], Optional[str]]
+
+def parse_text_frame(text: str, now: datetime) -> Optional[Frame]:
+    """Parse a JSON frame like {"type": "distraction", "focus_score": 0} or a bare state word"""
+    text = text.strip()
+    if text in TEXT_STATES:
+        return (now, TEXT_STATES[text], text, None)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    focus = data.get("focus_score")
+    if not isinstance(focus, (int, float)) or isinstance(focus, bool):
+        return None
+    timestamp = now
+    if isinstance(data.get("timestamp"), (int, float)):
+        try:
+            timestamp = datetime.utcfromtimestamp(data["timestamp"])
+        except (OverflowError, OSError, ValueError):
+            return None
+    state, distraction = data.get("type"), data.get("distraction_type")
+    for label in (state, distraction):
+        if label is not None and (not isinstance(label, str) or len(label) > MAX_LABEL_LENGTH):
+            return None
+    try:
+        focus = float(focus)
+    except OverflowError:
+        # An integer too large for a float, e.g. 10 ** 400 written out
+        return None
+    return (timestamp, focus, state, distraction)
+
+def parse_binary_frames(payload: bytes) -> List[Frame]:
+    """Unpack every complete BINARY_FRAME in a message; a trailing partial frame is ignored"""
+    usable = len(payload) - len(payload) % BINARY_FRAME.size
+    frames = []
+    for epoch, focus, code in BINARY_FRAME.iter_unpack(payload[:usable]):
+        try:
+            timestamp = datetime.utcfromtimestamp(epoch)
+        except (OverflowError, OSError, ValueError):
+            continue
+        state = STATE_CODES[code] if code < len(STATE_CODES) else None
+        frames.append((
+            timestamp,
+            focus,
+            state,
+            "other" if state == "distraction" else None
+        ))
+    return frames
+
+class FocusStream:
+    """Per-connection state for /ws/focus: rolling aggregates and batched persistence.
+
+    Recent frames live in a fixed-size ring buffer with running sums, so the
+    moving average and distraction rate are O(1) per frame. Validated frames
+    are handed to the shared FocusMetricBuffer in batches as plain dicts;
+    the buffer's own thread does the SQLite write, so the event loop never
+    blocks on the database.
+    """
+
+    __slots__ = ("session_id", "metric_buffer", "window", "batch_size", "max_delay_seconds",
+                 "_recent", "_focus_sum", "_distracted", "_pending", "_pending_since",
+                 "frames", "rejected", "queued", "dropped")
+
+    def __init__(self, session_id: Optional[int], metric_buffer: FocusMetricBuffer,
+                 window: int = 30, batch_size: int = 50, max_delay_seconds: float = 1.0):
+        self.session_id = session_id
+        self.metric_buffer = metric_buffer
+        self.window = window
+        self.batch_size = batch_size
+        self.max_delay_seconds = max_delay_seconds
+
+        # Ring buffer of (focus, is_distracted) for the last `window` frames
+        self._recent = deque(maxlen=window)
+        self._focus_sum = 0.0
+        self._distracted = 0
+        self._pending = []
+        self._pending_since = None
+
+        self.frames = 0
+        self.rejected = 0
+        self.queued = 0  # Rows handed to the write buffer
+        self.dropped = 0
+
+    def add(self, frames: List[Frame]):
+        for timestamp, focus, state, distraction_type in frames:
+            if not math.isfinite(focus) or not 0 <= focus <= 100:
+                self.rejected += 1
+                continue
+            distracted = state in ("distracted", "distraction", "away") or distraction_type is not None
+
+            if len(self._recent) == self.window:
+                old_focus, old_distracted = self._recent[0]
+                self._focus_sum -= old_focus
+                self._distracted -= old_distracted
+            self._recent.append((focus, distracted))
+            self._focus_sum += focus
+            self._distracted += distracted
+            self.frames += 1
+
+            if self.session_id is not None:
+                if not self._pending:
+                    self._pending_since = time.monotonic()
+                self._pending.append({
+                    "session_id": self.session_id,
+                    "timestamp": timestamp,
+                    "focus_score": focus,
+                    "emotion_state": state,
+                    "distraction_type": distraction_type
+                })
+
+        if len(self._pending) >= self.batch_size or (
+                self._pending and time.monotonic() - self._pending_since >= self.max_delay_seconds):
+            self.flush()
+
+    def flush(self):
+        """Hand pending rows to the shared write buffer"""
+        if not self._pending:
+            return
+        if self.metric_buffer.add(self._pending):
+            self.queued += len(self._pending)
+            self._pending = []
+            return
+        # Shared buffer is full: keep a bounded backlog, dropping the oldest rows
+        overflow = len(self._pending) - self.batch_size * 20
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+
+    def aggregates(self) -> dict:
+        count = len(self._recent)
+        return {
+            "type": "aggregate",
+            "session_id": self.session_id,
+            "moving_avg_focus": round(self._focus_sum / count, 1) if count else None,
+            "distraction_rate": round(self._distracted / count, 3) if count else None,
+            "window": count,
+            "frames": self.frames,
+            "rejected": self.rejected,
+            "queued": self.queued,
+            "dropped": self.dropped
+        }
@@ -0,0 +1,113 @@
+import re
+from typing import Dict, List, Optional
+
+# Patterns made only of these characters (plus "|" and the "." wildcard) are
+# plain keyword alternations and can go into the keyword trie
+KEYWORD_CHARS = re.compile(r"[a-z0-9 '\-]*")
+
+NO_MATCH = 1 << 30
+
+class _TrieNode:
+    __slots__ = ("children", "wildcard", "intent", "floor")
+
+    def __init__(self):
+        self.children = {}
+        self.wildcard = None  # Child for a "." (any character except newline)
+        self.intent = NO_MATCH  # Lowest pattern index ending at this node
+        self.floor = NO_MATCH  # Lowest pattern index anywhere below this node
+
+class IntentMatcher:
+    """Finds the highest-priority pattern that matches a message in one scan.
+
+    Equivalent to trying each pattern with re.search in dict order and
+    returning the first hit. The keyword alternations are merged into one
+    trie, which is also compiled into a single lookahead regex so the regex
+    engine jumps straight to positions where some keyword starts. At each
+    such position the trie is walked to find the lowest pattern index ending
+    there; subtrees that cannot beat the best index so far are skipped, and
+    the scan stops as soon as the first pattern wins.
+
+    Patterns using regex syntax beyond keywords and "." fall back to
+    precompiled re.search calls in order.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        self.responses = list(patterns.values())
+        self._root = None
+        self._starts = None
+        self._compiled: List[re.Pattern] = []
+
+        keywords = [p.split("|") for p in patterns]
+        if all(KEYWORD_CHARS.fullmatch(k.replace(".", "")) for alts in keywords for k in alts):
+            self._root = _TrieNode()
+            for index, alternatives in enumerate(keywords):
+                for keyword in alternatives:
+                    self._insert(keyword, index)
+            self._set_floor(self._root)
+            self._starts = re.compile(f"(?={self._to_regex(self._root)})")
+        else:
+            self._compiled = [re.compile(p) for p in patterns]
+
+    def match_index(self, text: str) -> Optional[int]:
+        if self._root is None:
+            for index, regex in enumerate(self._compiled):
+                if regex.search(text):
+                    return index
+            return None
+
+        best = NO_MATCH
+        for start in self._starts.finditer(text):
+            best = self._walk(text, start.start(), self._root, best)
+            if best == 0:
+                break
+        return best if best != NO_MATCH else None
+
+    def match(self, text: str) -> Optional[str]:
+        """Response of the highest-priority matching pattern, or None"""
+        index = self.match_index(text)
+        return self.responses[index] if index is not None else None
+
+    def _walk(self, text: str, i: int, node: _TrieNode, best: int) -> int:
+        end = len(text)
+        while True:
+            if node.intent < best:
+                best = node.intent
+            if i >= end:
+                return best
+            char = text[i]
+            if node.wildcard is not None and node.wildcard.floor < best and char != "\n":
+                best = self._walk(text, i + 1, node.wildcard, best)
+            node = node.children.get(char)
+            if node is None or node.floor >= best:
+                return best
+            i += 1
+
+    def _insert(self, keyword: str, index: int):
+        node = self._root
+        for char in keyword:
+            if char == ".":
+                if node.wildcard is None:
+                    node.wildcard = _TrieNode()
+                node = node.wildcard
+            else:
+                node = node.children.setdefault(char, _TrieNode())
+        node.intent = min(node.intent, index)
+
+    def _set_floor(self, node: _TrieNode) -> int:
+        floor = node.intent
+        for child in node.children.values():
+            floor = min(floor, self._set_floor(child))
+        if node.wildcard is not None:
+            floor = min(floor, self._set_floor(node.wildcard))
+        node.floor = floor
+        return floor
+
+    def _to_regex(self, node: _TrieNode) -> str:
+        branches = [re.escape(char) + self._to_regex(child) for char, child in sorted(node.children.items())]
+        if node.wildcard is not None:
+            branches.append("." + self._to_regex(node.wildcard))
+        if node.intent != NO_MATCH:
+            branches.append("")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
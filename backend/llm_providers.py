@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+from typing import AsyncIterator, List, Optional
+
+import httpx
+
+SYSTEM_PROMPT = """You are an expert AI Study Coach specializing in evidence-based learning science. Your knowledge includes:
+
+**Memory Techniques**: Spaced Repetition, Active Recall, Feynman Technique, Dual Coding, Elaborative Interrogation, Retrieval Practice
+**Focus Strategies**: Pomodoro Technique, Deep Work, Flow State, Attention Management
+**Learning Methods**: Interleaving, Self-Explanation, Concrete Examples, Metacognition
+**Study Skills**: Note-taking (Cornell Method), Time Management, Goal Setting, Environment Optimization
+**Exam Preparation**: Practice Testing, Anxiety Management, Strategic Review
+
+**Your approach**:
+1. Give specific, actionable advice
+2. Explain the 'why' behind techniques (cite learning science when relevant)
+3. Be encouraging and motivating
+4. Keep responses concise but comprehensive (2-4 sentences or a short list)
+5. Use examples when helpful
+6. Acknowledge when students are struggling and provide support
+
+Be warm, knowledgeable, and genuinely helpful. Your goal is to empower students with effective learning strategies."""
+
+class ProviderError(Exception):
+    """A provider answered with a non-200 status"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def provider_fault(self) -> bool:
+        """Server-side errors and rate limits count against provider health; a bad key does not"""
+        return self.status_code >= 500 or self.status_code == 429
+
+async def sse_data(response: httpx.Response) -> AsyncIterator[str]:
+    """Payloads of the `data:` lines of a server-sent event stream"""
+    async for line in response.aiter_lines():
+        if line.startswith("data:"):
+            yield line[5:].strip()
+
+class LLMHttpClient:
+    """One pooled httpx.AsyncClient shared by every provider.
+
+    Connections are kept alive between requests, so only the first call to a
+    host pays for the TCP and TLS handshake. The client is created lazily on
+    the running event loop and closed from the app lifespan.
+    """
+
+    def __init__(self, max_connections: int = None, max_keepalive: int = None, timeout_seconds: float = 10.0):
+        self.max_connections = max_connections or int(os.environ.get("LLM_MAX_CONNECTIONS", 100))
+        self.max_keepalive = max_keepalive or int(os.environ.get("LLM_MAX_KEEPALIVE", 20))
+        self.timeout_seconds = timeout_seconds
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=60.0
+                ),
+                timeout=httpx.Timeout(self.timeout_seconds, connect=5.0)
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+class OpenAIProvider:
+    """Chat completions, with at most `max_concurrency` requests in flight"""
+
+    def __init__(self, http: LLMHttpClient, base_url: str, model: str, max_concurrency: int = None):
+        self.http = http
+        self.base_url = base_url
+        self.model = model
+        self.max_concurrency = max_concurrency or int(os.environ.get("OPENAI_MAX_CONCURRENCY", 32))
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def _request(self, message: str, api_key: str) -> tuple:
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        data = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": message}
+            ],
+            "temperature": 0.7
+        }
+        return headers, data
+
+    async def complete(self, message: str, api_key: str) -> str:
+        headers, data = self._request(message, api_key)
+
+        async with self.semaphore:
+            response = await self.http.client.post(f"{self.base_url}/chat/completions", headers=headers, json=data)
+
+        if response.status_code == 200:
+            result = response.json()
+            return result["choices"][0]["message"]["content"]
+        else:
+            raise ProviderError(f"Error from OpenAI: {response.text}", response.status_code)
+
+    async def stream(self, message: str, api_key: str) -> AsyncIterator[str]:
+        """Yield content deltas as OpenAI produces them"""
+        headers, data = self._request(message, api_key)
+        data["stream"] = True
+
+        async with self.semaphore:
+            async with self.http.client.stream("POST", f"{self.base_url}/chat/completions", headers=headers, json=data) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise ProviderError(f"Error from OpenAI: {body.decode(errors='replace')}", response.status_code)
+                async for payload in sse_data(response):
+                    if payload == "[DONE]":
+                        break
+                    choices = json.loads(payload).get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+
+class GeminiProvider:
+    """generateContent and ListModels, with at most `max_concurrency` requests in flight"""
+
+    def __init__(self, http: LLMHttpClient, base_url: str, max_concurrency: int = None):
+        self.http = http
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency or int(os.environ.get("GEMINI_MAX_CONCURRENCY", 32))
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def _request(self, message: str) -> dict:
+        return {
+            "contents": [{
+                "parts": [{"text": SYSTEM_PROMPT + "\n\nStudent question: " + message}]
+            }]
+        }
+
+    async def complete(self, message: str, api_key: str, model_name: str) -> Optional[str]:
+        """The answer text, or None if Gemini returned no content (e.g. a blocked prompt)"""
+        url = f"{self.base_url}/models/{model_name}:generateContent?key={api_key}"
+        data = self._request(message)
+
+        async with self.semaphore:
+            response = await self.http.client.post(url, headers={"Content-Type": "application/json"}, json=data)
+
+        if response.status_code == 200:
+            result = response.json()
+            for candidate in result.get("candidates", [])[:1]:
+                text = "".join(part.get("text", "") for part in candidate.get("content", {}).get("parts", []))
+                if text:
+                    return text
+            return None
+        else:
+            raise ProviderError(f"Error from Gemini ({model_name}): {response.text}", response.status_code)
+
+    async def stream(self, message: str, api_key: str, model_name: str) -> AsyncIterator[str]:
+        """Yield text parts as Gemini produces them"""
+        url = f"{self.base_url}/models/{model_name}:streamGenerateContent?alt=sse&key={api_key}"
+
+        async with self.semaphore:
+            async with self.http.client.stream("POST", url, headers={"Content-Type": "application/json"}, json=self._request(message)) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise ProviderError(f"Error from Gemini ({model_name}): {body.decode(errors='replace')}", response.status_code)
+                async for payload in sse_data(response):
+                    for candidate in json.loads(payload).get("candidates", [])[:1]:
+                        for part in candidate.get("content", {}).get("parts", []):
+                            if part.get("text"):
+                                yield part["text"]
+
+    async def list_models(self, api_key: str) -> List[dict]:
+        async with self.semaphore:
+            response = await self.http.client.get(f"{self.base_url}/models?key={api_key}", timeout=5.0)
+
+        if response.status_code != 200:
+            raise Exception(f"ListModels failed: {response.text}")
+        return response.json().get("models", [])
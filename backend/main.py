@@ -1,19 +1,94 @@
-from fastapi import FastAPI, Depends, HTTPException, WebSocket
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, WebSocket
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import func, insert, select
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel
-
-from backend.database import engine, Base, get_db
-from backend.models import UserPreference
+import json
+import os
+import time
+
+from backend.database import engine, async_engine, get_async_db, SessionLocal, AsyncSessionLocal, prepare_database
+from backend.preference_cache import PreferenceCache
+from backend.pagination import keyset_page, next_cursor
+from backend.search_service import SearchService
+from backend.vector_index import VectorIndex
+from backend.community_retriever import CommunityRetriever, question_text
 from backend.chat_service import ChatService
 from backend.analysis_service import AnalysisService
+from backend.focus_stream import FocusStream, parse_binary_frames, parse_text_frame
 import backend.schemas as schemas
 import backend.models as models
 
-Base.metadata.create_all(bind=engine)
+search_service = SearchService()
 
-app = FastAPI()
+def prepare_storage():
+    """Schema migrations and the search index, run once on startup"""
+    prepare_database()
+    if search_service.ensure_schema(engine):
+        # The search index is new, so index what the database already holds
+        search_service.backfill(engine)
+
+# Hashed n-gram vectors of every question, for duplicate suggestions. Opened
+# and brought in line with the questions table on startup (see lifespan).
+QUESTION_INDEX_DIR = os.environ.get(
+    "QUESTION_INDEX_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "question_index")
+)
+question_index: Optional[VectorIndex] = None
+DUPLICATE_THRESHOLD = float(os.environ.get("DUPLICATE_THRESHOLD", 0.7))
+# Largest `limit` the question listing endpoints accept
+MAX_PAGE_SIZE = 500
+# How often a focus socket without a session looks for one that has started
+SESSION_LOOKUP_SECONDS = 1.0
+
+def sync_question_index(index: VectorIndex):
+    """Rebuild the question index unless it holds exactly the questions in the
+    database (first run, or a copied or restored database)"""
+    with SessionLocal() as db:
+        count, max_id, id_sum = db.execute(select(
+            func.count(models.Question.id), func.max(models.Question.id),
+            func.coalesce(func.sum(models.Question.id), 0)
+        )).one()
+        if (count, max_id, id_sum) == index.fingerprint():
+            return
+        rows = db.execute(select(models.Question.id, models.Question.title, models.Question.content)
+                          .order_by(models.Question.id).execution_options(yield_per=4096))
+        index.rebuild((row.id, question_text(row.title, row.content)) for row in rows)
+    print(f"Rebuilt question index with {len(index)} questions")
+
+# Answered questions the Coach can answer from before calling a provider
+# (opt-in with COACH_COMMUNITY_ANSWERS=1; loaded on startup)
+community_retriever = CommunityRetriever()
+
+def load_community_answers():
+    with SessionLocal() as db:
+        community_retriever.load(db)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global question_index
+    await run_in_threadpool(prepare_storage)
+    question_index = VectorIndex(QUESTION_INDEX_DIR)
+    await run_in_threadpool(sync_question_index, question_index)
+    await run_in_threadpool(load_community_answers)
+    pattern_worker.start()
+    metric_buffer.start()
+    await run_in_threadpool(session_registry.recover)
+    session_registry.start()
+    yield
+    # Flush queued background work before the process exits
+    session_registry.stop()
+    metric_buffer.stop()
+    pattern_worker.stop()
+    await chat_service.aclose()
+    await async_engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS for frontend connection
 origins = [
@@ -29,6 +104,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -41,28 +117,26 @@ def read_root():
 from .chat_service import ChatService
 
 from .chat_service import ChatService
-chat_service = ChatService()
+chat_service = ChatService(retriever=community_retriever)
 analysis_service = AnalysisService()
+preference_cache = PreferenceCache()
 
 class AnalyzeRequest(BaseModel):
     student_id: int
     focus_score: float
     current_duration_minutes: int
 
+class AnalyzeBatchRequest(BaseModel):
+    items: List[AnalyzeRequest]
+
 class ChatRequest(BaseModel):
     message: str
     api_key: str = None
 
 @app.post("/analyze")
-def analyze_endpoint(request: AnalyzeRequest, db: Session = Depends(get_db)):
-    # Fetch user preferences
-    prefs = db.query(UserPreference).filter(UserPreference.student_id == request.student_id).first()
-    pref_dict = {}
-    if prefs:
-        pref_dict = {
-            "study_duration_minutes": prefs.study_duration_minutes,
-            "break_duration_minutes": prefs.break_duration_minutes
-        }
+async def analyze_endpoint(request: AnalyzeRequest, db: AsyncSession = Depends(get_async_db)):
+    # Fetch user preferences (cached; PUT /students/{id}/preferences invalidates)
+    pref_dict = await preference_cache.get(db, request.student_id)
     
     advice = analysis_service.analyze_session(
         request.focus_score, 
@@ -71,82 +145,232 @@ def analyze_endpoint(request: AnalyzeRequest, db: Session = Depends(get_db)):
     )
     return {"advice": advice}
 
+@app.post("/analyze/batch")
+async def analyze_batch_endpoint(request: AnalyzeBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """/analyze for many tracked students in one call"""
+    prefs = await preference_cache.get_many(db, {item.student_id for item in request.items})
+    advice = analysis_service.analyze_batch(
+        [item.focus_score for item in request.items],
+        [item.current_duration_minutes for item in request.items],
+        [prefs[item.student_id].get("study_duration_minutes") for item in request.items]
+    )
+    return {"results": [
+        {"student_id": item.student_id, "advice": item_advice}
+        for item, item_advice in zip(request.items, advice)
+    ]}
+
 @app.post("/chat")
-def chat_endpoint(request: ChatRequest):
-    response = chat_service.get_response(request.message, request.api_key)
+async def chat_endpoint(request: ChatRequest):
+    # Async so in-flight LLM calls wait on the event loop, not in threadpool workers
+    response = await chat_service.get_response(request.message, request.api_key)
     return {"response": response}
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Server-sent events: one `data: {"delta": ...}` per chunk, then `event: done`"""
+    async def events():
+        async for chunk in chat_service.stream_response(request.message, request.api_key):
+            yield f"data: {json.dumps({'delta': chunk})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/students/", response_model=schemas.Student)
-def create_student(student: schemas.StudentCreate, db: Session = Depends(get_db)):
-    db_student = db.query(models.Student).filter(models.Student.email == student.email).first()
+async def create_student(student: schemas.StudentCreate, db: AsyncSession = Depends(get_async_db)):
+    db_student = await db.scalar(select(models.Student).filter(models.Student.email == student.email))
     if db_student:
         raise HTTPException(status_code=400, detail="Email already registered")
     # In a real app, hash the password here
     fake_hashed_password = student.password + "notreallyhashed"
     db_student = models.Student(email=student.email, name=student.name, hashed_password=fake_hashed_password)
     db.add(db_student)
-    db.commit()
-    db.refresh(db_student)
+    await db.commit()
+    await db.refresh(db_student)
     return db_student
 
 @app.get("/students/{student_id}", response_model=schemas.Student)
-def read_student(student_id: int, db: Session = Depends(get_db)):
-    db_student = db.query(models.Student).filter(models.Student.id == student_id).first()
+async def read_student(student_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_student = await db.get(models.Student, student_id)
     if db_student is None:
         raise HTTPException(status_code=404, detail="Student not found")
     return db_student
 
 # Focus Tracking WebSocket
+async def find_active_session_id(student_id: int):
+    """Latest session of a student that has not been completed yet"""
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(models.StudySession.id).filter(
+                models.StudySession.student_id == student_id,
+                models.StudySession.completed == False
+            ).order_by(models.StudySession.start_time.desc()).limit(1)
+        )
+
+async def session_belongs_to(session_id: int, student_id: int) -> bool:
+    async with AsyncSessionLocal() as db:
+        owner = await db.scalar(
+            select(models.StudySession.student_id).filter(models.StudySession.id == session_id)
+        )
+    return owner == student_id
+
 @app.websocket("/ws/focus/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: int):
+async def websocket_endpoint(websocket: WebSocket, client_id: int, session_id: Optional[int] = None):
+    """Stream focus frames (JSON text or packed binary) for a student's active session.
+    
+    Frames are persisted to focus_metrics in batches and every message is
+    answered with rolling aggregates for the connection.
+    """
+    if session_id is None:
+        session_id = await find_active_session_id(client_id)
+    elif not await session_belongs_to(session_id, client_id):
+        # Unknown session, or another student's: refuse before accepting
+        await websocket.close(code=1008)
+        return
     await websocket.accept()
+    stream = FocusStream(session_id, metric_buffer)
+    next_lookup = time.monotonic() + SESSION_LOOKUP_SECONDS
     try:
         while True:
-            data = await websocket.receive_text()
-            # Here we would receive "focused" or "distracted" or raw data
-            # For now, just echo it back or log it
-            await websocket.send_text(f"Message text was: {data}")
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            # The tracker connects before /sessions/start; pick the session up once it exists
+            if stream.session_id is None and time.monotonic() >= next_lookup:
+                stream.session_id = await find_active_session_id(client_id)
+                next_lookup = time.monotonic() + SESSION_LOOKUP_SECONDS
+            
+            if message.get("bytes") is not None:
+                frames = parse_binary_frames(message["bytes"])
+            else:
+                frame = parse_text_frame(message.get("text") or "", datetime.utcnow())
+                frames = [frame] if frame else []
+                if not frame:
+                    stream.rejected += 1
+            
+            stream.add(frames)
+            await websocket.send_json(stream.aggregates())
     except Exception as e:
         print(f"Connection closed: {e}")
+    finally:
+        stream.flush()
 
 
 # Community Endpoints
 @app.post("/questions/", response_model=schemas.Question)
-def create_question(question: schemas.QuestionCreate, db: Session = Depends(get_db)):
+async def create_question(question: schemas.QuestionCreate, db: AsyncSession = Depends(get_async_db)):
     db_question = models.Question(**question.model_dump())
     db.add(db_question)
-    db.commit()
-    db.refresh(db_question)
+    await db.flush()
+    await search_service.index_question(db, db_question)
+    await db.commit()
+    await run_in_threadpool(question_index.add, db_question.id, question_text(question.title, question.content))
+    # Relationships cannot lazy-load under asyncio, so load answers explicitly
+    await db.refresh(db_question, ["id", "title", "content", "student_id", "created_at", "answers"])
     return db_question
 
+@app.post("/questions/duplicates", response_model=List[schemas.DuplicateQuestion])
+async def find_duplicate_questions(question: schemas.QuestionBase, limit: int = Query(5, ge=1, le=50),
+                                   db: AsyncSession = Depends(get_async_db)):
+    """Existing questions that look like this draft, most similar first"""
+    matches = await run_in_threadpool(
+        question_index.search, question_text(question.title, question.content), limit, DUPLICATE_THRESHOLD
+    )
+    if not matches:
+        return []
+    titles = dict((await db.execute(
+        select(models.Question.id, models.Question.title).filter(models.Question.id.in_([m[0] for m in matches]))
+    )).all())
+    return [
+        {"id": question_id, "title": titles[question_id], "similarity": similarity}
+        for question_id, similarity in matches if question_id in titles
+    ]
+
 @app.get("/questions/", response_model=List[schemas.Question])
-def get_questions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    questions = db.query(models.Question).offset(skip).limit(limit).all()
+async def get_questions(response: Response, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+                        cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Questions oldest first, with their answers.
+
+    Pass the X-Next-Cursor response header back as `cursor` for the next
+    page; `skip` still works but gets slower the deeper the page.
+    """
+    stmt = select(models.Question).options(selectinload(models.Question.answers))
+    questions = (await db.scalars(_question_page(stmt, limit, cursor, skip))).all()
+    _set_next_cursor(response, questions, limit)
     return questions
 
+@app.get("/questions/summary", response_model=List[schemas.QuestionSummary])
+async def get_question_summaries(response: Response, limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+                                 cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Like GET /questions/ with an answer count instead of the answers"""
+    answer_count = (
+        select(func.count())
+        .where(models.Answer.question_id == models.Question.id)
+        .scalar_subquery()
+    )
+    stmt = select(
+        models.Question.id, models.Question.title, models.Question.content,
+        models.Question.student_id, models.Question.created_at, answer_count.label("answer_count")
+    )
+    rows = (await db.execute(_question_page(stmt, limit, cursor))).all()
+    _set_next_cursor(response, rows, limit)
+    return rows
+
+@app.get("/questions/search", response_model=List[schemas.QuestionSearchHit])
+async def search_questions(q: str, limit: int = Query(20, ge=1, le=100), skip: int = Query(0, ge=0),
+                           db: AsyncSession = Depends(get_async_db)):
+    """Questions whose title, content or answers match `q`, best match first.
+
+    highlighted_title and snippet are HTML-escaped, with matched words wrapped in <mark>.
+    """
+    return await search_service.search(db, q, limit=limit, skip=skip)
+
+def _question_page(stmt, limit: int, cursor: Optional[str], skip: int = 0):
+    try:
+        stmt = keyset_page(stmt, models.Question, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stmt.offset(skip) if skip and not cursor else stmt
+
+def _set_next_cursor(response: Response, rows: list, limit: int):
+    cursor = next_cursor(rows, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+
 @app.post("/answers/", response_model=schemas.Answer)
-def create_answer(answer: schemas.AnswerCreate, db: Session = Depends(get_db)):
+async def create_answer(answer: schemas.AnswerCreate, db: AsyncSession = Depends(get_async_db)):
     db_answer = models.Answer(**answer.model_dump())
     db.add(db_answer)
-    db.commit()
-    db.refresh(db_answer)
+    await db.flush()
+    await search_service.index_answer(db, db_answer)
+    await db.commit()
+    await db.refresh(db_answer)
+    if community_retriever.enabled and not community_retriever.has_answer(db_answer.question_id):
+        question = await db.get(models.Question, db_answer.question_id)
+        if question is not None:
+            community_retriever.add_answer(question.id, question.title, question.content, db_answer.content)
     return db_answer
 
 # Preferences Endpoints
 @app.get("/students/{student_id}/preferences", response_model=schemas.Preference)
-def get_preferences(student_id: int, db: Session = Depends(get_db)):
-    pref = db.query(models.UserPreference).filter(models.UserPreference.student_id == student_id).first()
+async def get_preferences(student_id: int, db: AsyncSession = Depends(get_async_db)):
+    pref = await db.scalar(select(models.UserPreference).filter(models.UserPreference.student_id == student_id))
     if not pref:
         # Create default if not exists
         pref = models.UserPreference(student_id=student_id)
         db.add(pref)
-        db.commit()
-        db.refresh(pref)
+        await db.commit()
+        await db.refresh(pref)
+        preference_cache.set(student_id, pref)
     return pref
 
 @app.put("/students/{student_id}/preferences", response_model=schemas.Preference)
-def update_preferences(student_id: int, preference: schemas.PreferenceCreate, db: Session = Depends(get_db)):
-    db_pref = db.query(models.UserPreference).filter(models.UserPreference.student_id == student_id).first()
+async def update_preferences(student_id: int, preference: schemas.PreferenceCreate, db: AsyncSession = Depends(get_async_db)):
+    db_pref = await db.scalar(select(models.UserPreference).filter(models.UserPreference.student_id == student_id))
     if not db_pref:
         db_pref = models.UserPreference(student_id=student_id, **preference.model_dump())
         db.add(db_pref)
@@ -154,17 +378,23 @@ def update_preferences(student_id: int, preference: schemas.PreferenceCreate, db
         for key, value in preference.model_dump().items():
             setattr(db_pref, key, value)
     
-    db.commit()
-    db.refresh(db_pref)
+    await db.commit()
+    preference_cache.invalidate(student_id)
+    await db.refresh(db_pref)
     return db_pref
 
 
 # ===== NEW PERSONALIZATION ENDPOINTS =====
 
 from backend.analytics_service import AnalyticsService
-from datetime import datetime
+from backend.pattern_worker import PatternUpdateWorker
+from backend.metric_buffer import FocusMetricBuffer
+from backend.session_registry import ActiveSessionRegistry
 
 analytics_service = AnalyticsService()
+pattern_worker = PatternUpdateWorker(SessionLocal, analytics_service)
+metric_buffer = FocusMetricBuffer(SessionLocal)
+session_registry = ActiveSessionRegistry(SessionLocal)
 
 class SessionStartRequest(BaseModel):
     student_id: int
@@ -185,11 +415,21 @@ class SessionCompleteRequest(BaseModel):
 class FocusMetricRequest(BaseModel):
     session_id: int
     focus_score: float
-    emotion_state: str = None
-    distraction_type: str = None
+    emotion_state: Optional[str] = None
+    distraction_type: Optional[str] = None
+
+class FocusMetricPoint(BaseModel):
+    focus_score: float
+    emotion_state: Optional[str] = None
+    distraction_type: Optional[str] = None
+    timestamp: Optional[datetime] = None  # When the sample was taken, defaults to arrival time
+
+class FocusMetricBatchRequest(BaseModel):
+    metrics: List[FocusMetricPoint]
+    durable: bool = False  # Wait until the batch is committed before responding
 
 @app.post("/sessions/start")
-def start_session(request: SessionStartRequest, db: Session = Depends(get_db)):
+async def start_session(request: SessionStartRequest, db: AsyncSession = Depends(get_async_db)):
     """Start a new study session"""
     session = models.StudySession(
         student_id=request.student_id,
@@ -198,49 +438,64 @@ def start_session(request: SessionStartRequest, db: Session = Depends(get_db)):
         start_time=datetime.utcnow()
     )
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
+    session_registry.register(session.id)
     return {"session_id": session.id, "start_time": session.start_time}
 
 @app.put("/sessions/{session_id}/update")
-def update_session(session_id: int, request: SessionUpdateRequest, db: Session = Depends(get_db)):
-    """Update an ongoing session"""
-    session = db.query(models.StudySession).filter(models.StudySession.id == session_id).first()
-    if not session:
+async def update_session(session_id: int, request: SessionUpdateRequest, db: AsyncSession = Depends(get_async_db)):
+    """Update an ongoing session (held in memory, checkpointed periodically)"""
+    values = {
+        "focus_score": request.focus_score,
+        "distractions_count": request.distractions_count,
+        "duration_minutes": request.duration_minutes
+    }
+    updated = session_registry.update_loaded(session_id, **values)
+    if not updated:
+        # Not in memory: the registry loads it with a blocking query
+        updated = await run_in_threadpool(session_registry.update, session_id, **values)
+    if not updated:
+        session = await db.get(models.StudySession, session_id)
+        if session is not None and session.completed:
+            raise HTTPException(status_code=409, detail="Session already completed")
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if request.focus_score is not None:
-        session.focus_score = request.focus_score
-    if request.distractions_count is not None:
-        session.distractions_count = request.distractions_count
-    if request.duration_minutes is not None:
-        session.duration_minutes = request.duration_minutes
-    
-    db.commit()
     return {"message": "Session updated"}
 
 @app.post("/sessions/{session_id}/complete")
-def complete_session(session_id: int, request: SessionCompleteRequest, db: Session = Depends(get_db)):
+async def complete_session(session_id: int, request: SessionCompleteRequest, db: AsyncSession = Depends(get_async_db)):
     """Mark a session as complete"""
-    session = db.query(models.StudySession).filter(models.StudySession.id == session_id).first()
+    # Persist any buffered metrics before the session is marked complete
+    await run_in_threadpool(metric_buffer.flush)
+    # The completion values supersede any in-memory updates
+    await run_in_threadpool(session_registry.discard, session_id)
+    
+    session = await db.get(models.StudySession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
+    previous_rollup = analytics_service.rollup_contribution(session)
+    
     session.end_time = datetime.utcnow()
     session.focus_score = request.focus_score
     session.duration_minutes = request.duration_minutes
     session.distractions_count = request.distractions_count
     session.completed = request.completed
     
-    db.commit()
+    # Keep the daily rollup in step with the session in the same transaction
+    await db.run_sync(analytics_service.apply_session_rollup, session, previous_rollup)
+    
+    await db.commit()
     
-    # Update study patterns
-    analytics_service.update_study_pattern(db, session.student_id)
+    # Update study patterns in the background; run inline if the queue is full
+    if not pattern_worker.submit(session.student_id):
+        await db.run_sync(analytics_service.update_study_pattern, session.student_id)
     
     return {"message": "Session completed", "session_id": session.id}
 
 @app.post("/sessions/{session_id}/focus-metric")
-def add_focus_metric(session_id: int, request: FocusMetricRequest, db: Session = Depends(get_db)):
+async def add_focus_metric(session_id: int, request: FocusMetricRequest, db: AsyncSession = Depends(get_async_db)):
     """Add a focus metric data point to a session"""
     metric = models.FocusMetric(
         session_id=session_id,
@@ -250,45 +505,90 @@ def add_focus_metric(session_id: int, request: FocusMetricRequest, db: Session =
         timestamp=datetime.utcnow()
     )
     db.add(metric)
-    db.commit()
+    await db.commit()
     return {"message": "Focus metric recorded"}
 
+@app.post("/sessions/{session_id}/focus-metrics")
+async def add_focus_metrics(session_id: int, request: FocusMetricBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """Add many focus metric data points to a session in one call"""
+    now = datetime.utcnow()
+    rows = [{
+        "session_id": session_id,
+        "focus_score": point.focus_score,
+        "emotion_state": point.emotion_state,
+        "distraction_type": point.distraction_type,
+        "timestamp": point.timestamp or now
+    } for point in request.metrics]
+    
+    if not request.durable and metric_buffer.add(rows):
+        return {"message": "Focus metrics recorded", "count": len(rows), "durable": False}
+    
+    # Durable requests, or the buffer is full: write this batch directly so a
+    # failure reaches the caller instead of being retried in the background
+    await db.execute(insert(models.FocusMetric), rows)
+    await db.commit()
+    return {"message": "Focus metrics recorded", "count": len(rows), "durable": True}
+
+# AnalyticsService is written against a sync Session; run_sync hands it one
+# whose queries go through the async driver
 @app.get("/students/{student_id}/stats")
-def get_user_stats(student_id: int, db: Session = Depends(get_db)):
+async def get_user_stats(student_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get personalized statistics for a user"""
-    stats = analytics_service.calculate_user_stats(db, student_id)
+    stats = await db.run_sync(analytics_service.calculate_user_stats, student_id)
     return stats
 
 @app.get("/students/{student_id}/insights")
-def get_user_insights(student_id: int, db: Session = Depends(get_db)):
+async def get_user_insights(student_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get personalized insights for a user"""
-    insights = analytics_service.generate_insights(db, student_id)
+    insights = await db.run_sync(analytics_service.generate_insights, student_id)
     return {"insights": insights}
 
 @app.get("/students/{student_id}/weekly-data")
-def get_weekly_data(student_id: int, db: Session = Depends(get_db)):
+async def get_weekly_data(student_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get weekly study data for charts"""
-    data = analytics_service.get_weekly_data(db, student_id)
+    data = await db.run_sync(analytics_service.get_weekly_data, student_id)
     return {"weekly_data": data}
 
 @app.get("/students/{student_id}/sessions")
-def get_user_sessions(student_id: int, limit: int = 20, db: Session = Depends(get_db)):
+async def get_user_sessions(student_id: int, limit: int = 20, db: AsyncSession = Depends(get_async_db)):
     """Get recent sessions for a user"""
-    sessions = db.query(models.StudySession).filter(
-        models.StudySession.student_id == student_id
-    ).order_by(models.StudySession.start_time.desc()).limit(limit).all()
+    sessions = await db.scalars(
+        select(models.StudySession).filter(
+            models.StudySession.student_id == student_id
+        ).order_by(models.StudySession.start_time.desc()).limit(limit)
+    )
     
-    return [{
-        "id": s.id,
-        "start_time": s.start_time,
-        "end_time": s.end_time,
-        "duration_minutes": s.duration_minutes,
-        "focus_score": s.focus_score,
-        "subject": s.subject,
-        "session_type": s.session_type,
-        "completed": s.completed,
-        "distractions_count": s.distractions_count
-    } for s in sessions]
-
-
-
+    result = []
+    for s in sessions.all():
+        # Running sessions may have newer values than their last checkpoint
+        live = session_registry.get(s.id)
+        result.append({
+            "id": s.id,
+            "start_time": s.start_time,
+            "end_time": s.end_time,
+            "duration_minutes": live.duration_minutes if live else s.duration_minutes,
+            "focus_score": live.focus_score if live else s.focus_score,
+            "subject": s.subject,
+            "session_type": s.session_type,
+            "completed": s.completed,
+            "distractions_count": live.distractions_count if live else s.distractions_count
+        })
+    return result
+
+@app.get("/metrics")
+def get_metrics():
+    """Operational metrics for background work"""
+    return {
+        "pattern_updates": pattern_worker.metrics(),
+        "focus_metric_buffer": metric_buffer.metrics(),
+        "active_sessions": session_registry.metrics(),
+        "chat_cache": chat_service.cache.stats(),
+        "gemini_models": chat_service.gemini_model_stats(),
+        "chat_streaming": chat_service.ttft.stats(),
+        "chat_providers": chat_service.provider_stats(),
+        "chat_stages": chat_service.stages.stats(),
+        "community_retriever": community_retriever.metrics(),
+        "preference_cache": preference_cache.stats(),
+        "search": search_service.metrics(),
+        "question_index": question_index.metrics()
+    }
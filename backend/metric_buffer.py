@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError
+
+from .models import FocusMetric
+from .postgres import copy_rows, is_postgres
+
+COPY_COLUMNS = ["session_id", "timestamp", "focus_score", "emotion_state", "distraction_type"]
+
+def is_connection_error(error: Exception) -> bool:
+    """Whether a failed write is worth retrying as-is (database unreachable,
+    locked or restarting) rather than caused by the rows themselves"""
+    return isinstance(error, (OperationalError, InterfaceError, DisconnectionError)) or \
+        getattr(error, "connection_invalidated", False)
+
+class FocusMetricBuffer:
+    """In-memory write buffer that persists FocusMetric rows in bulk.
+
+    Rows are flushed with a single executemany INSERT (COPY on PostgreSQL)
+    and one commit when the buffer reaches `max_rows`, or `max_delay_seconds`
+    after the oldest buffered row arrived, whichever comes first.
+
+    Durability: `add` only places rows in memory. A row is durable once a
+    flush containing it has committed, so a crash can lose at most one
+    buffer's worth (`max_rows` rows or `max_delay_seconds` of data). `flush()`
+    returns how many rows it committed; callers that need their own rows on
+    disk before responding should write them directly instead.
+
+    When the database itself fails (connection lost, locked), the unwritten
+    rows go back to the front of the buffer and are retried; when
+    `max_buffered_rows` is reached `add` returns False instead of growing
+    without bound. Any other failure is blamed on the rows: the batch is
+    split in halves until the bad rows are isolated, the rest is written and
+    the bad rows are dropped into `dead_letters`, so one malformed row cannot
+    block every later flush.
+    """
+
+    def __init__(self, session_factory: Callable, max_rows: int = 500,
+                 max_delay_seconds: float = 1.0, max_buffered_rows: int = 50000):
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.max_delay_seconds = max_delay_seconds
+        self.max_buffered_rows = max_buffered_rows
+
+        self._rows: List[Dict] = []
+        self._oldest = None  # time.monotonic() of the oldest buffered row
+        self._condition = threading.Condition()
+        # Serialises flushes so rows are committed in arrival order
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._last_flush_failed = False
+        # Most recent rows that could not be written: (row, error message)
+        self.dead_letters = deque(maxlen=1000)
+
+        self._rows_accepted = 0
+        self._rows_rejected = 0
+        self._rows_written = 0
+        self._rows_dropped = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._flush_seconds = 0.0
+        self._last_flush_seconds = 0.0
+        self._started_at = time.monotonic()
+
+    def start(self):
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="focus-metric-buffer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush everything still buffered, then stop the thread"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def add(self, rows: List[Dict]) -> bool:
+        """Buffer FocusMetric column dicts. Returns False if the buffer is full or stopping."""
+        if not rows:
+            return True
+        with self._condition:
+            if self._stopping or len(self._rows) + len(rows) > self.max_buffered_rows:
+                self._rows_rejected += len(rows)
+                return False
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.extend(rows)
+            self._rows_accepted += len(rows)
+            if len(self._rows) >= self.max_rows:
+                self._condition.notify()
+
+        self.start()
+        return True
+
+    def flush(self) -> int:
+        """Synchronously write everything buffered so far. Returns the rows written."""
+        with self._flush_lock:
+            with self._condition:
+                rows, self._rows = self._rows, []
+                self._oldest = None
+            return self._write(rows)
+
+    def metrics(self) -> Dict:
+        with self._condition:
+            uptime = time.monotonic() - self._started_at
+            return {
+                "buffered_rows": len(self._rows),
+                "rows_accepted": self._rows_accepted,
+                "rows_rejected": self._rows_rejected,
+                "rows_written": self._rows_written,
+                "rows_dropped": self._rows_dropped,
+                "flushes": self._flushes,
+                "failed_flushes": self._failed_flushes,
+                "avg_batch_size": round(self._rows_written / self._flushes, 1) if self._flushes else 0,
+                "last_flush_ms": round(self._last_flush_seconds * 1000, 2),
+                # Rows per second of time spent inside flushes, and over the buffer's lifetime
+                "write_rows_per_second": round(self._rows_written / self._flush_seconds) if self._flush_seconds else 0,
+                "ingest_rows_per_second": round(self._rows_accepted / uptime) if uptime else 0,
+            }
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    if len(self._rows) >= self.max_rows:
+                        break
+                    if self._rows and time.monotonic() - self._oldest >= self.max_delay_seconds:
+                        break
+                    timeout = None
+                    if self._rows:
+                        timeout = self.max_delay_seconds - (time.monotonic() - self._oldest)
+                    self._condition.wait(timeout)
+                stopping = self._stopping
+
+            self.flush()
+            if stopping:
+                return
+            if self._last_flush_failed:
+                # Back off instead of retrying a failing database in a tight loop
+                time.sleep(self.max_delay_seconds)
+
+    def _write(self, rows: List[Dict]) -> int:
+        if not rows:
+            return 0
+        started = time.monotonic()
+        written = 0
+        chunks = deque([rows])
+        db = self.session_factory()
+        try:
+            while chunks:
+                chunk = chunks.popleft()
+                try:
+                    self._insert(db, chunk)
+                    db.commit()
+                    written += len(chunk)
+                except Exception as e:
+                    db.rollback()
+                    if is_connection_error(e):
+                        unwritten = chunk + [row for rest in chunks for row in rest]
+                        print(f"Focus metric flush of {len(unwritten)} rows failed, will retry: {e}")
+                        with self._condition:
+                            self._last_flush_failed = True
+                            self._failed_flushes += 1
+                            self._rows[:0] = unwritten
+                            self._oldest = started
+                        break
+                    if len(chunk) == 1:
+                        print(f"Dropping focus metric row that cannot be written: {e}")
+                        with self._condition:
+                            self.dead_letters.append((chunk[0], str(e)))
+                            self._rows_dropped += 1
+                        continue
+                    # Bisect to find the bad rows without giving up on the rest
+                    middle = len(chunk) // 2
+                    chunks.extendleft([chunk[middle:], chunk[:middle]])
+            else:
+                with self._condition:
+                    self._last_flush_failed = False
+        finally:
+            db.close()
+
+        elapsed = time.monotonic() - started
+        with self._condition:
+            if written:
+                self._flushes += 1
+                self._rows_written += written
+                self._flush_seconds += elapsed
+                self._last_flush_seconds = elapsed
+        return written
+
+    def _insert(self, db, rows: List[Dict]):
+        # One bulk statement for the whole batch
+        if is_postgres(db.get_bind()):
+            copy_rows(db, FocusMetric.__tablename__, COPY_COLUMNS, rows)
+        else:
+            db.execute(insert(FocusMetric), rows)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Float, Boolean, Text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -15,6 +15,8 @@ class Student(Base):
 
 class StudySession(Base):
     __tablename__ = "study_sessions"
+    # Analytics read a student's completed sessions by start_time; session lists sort on it
+    __table_args__ = (Index("ix_study_sessions_student_completed_start", "student_id", "completed", "start_time"),)
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
@@ -35,6 +37,7 @@ class StudySession(Base):
 
 class FocusMetric(Base):
     __tablename__ = "focus_metrics"
+    __table_args__ = (Index("ix_focus_metrics_session_timestamp", "session_id", "timestamp"),)
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("study_sessions.id"))
@@ -49,7 +52,7 @@ class StudyPattern(Base):
     __tablename__ = "study_patterns"
     
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("students.id"))
+    student_id = Column(Integer, ForeignKey("students.id"), index=True)
     
     # Performance insights
     best_study_hour = Column(Integer, nullable=True)  # 0-23, best hour of day
@@ -71,11 +74,24 @@ class StudyPattern(Base):
     
     student = relationship("Student", back_populates="study_pattern")
 
+class DailyStudyRollup(Base):
+    """Per-student, per-day totals of completed sessions, maintained incrementally"""
+    __tablename__ = "daily_study_rollups"
+    __table_args__ = (UniqueConstraint("student_id", "day", name="uq_rollup_student_day"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), index=True)
+    day = Column(Date)  # UTC date of the session start_time
+    total_minutes = Column(Integer, default=0)
+    session_count = Column(Integer, default=0)
+    focus_sum = Column(Float, default=0.0)  # Sum of session focus scores, divide by session_count for the average
+    distraction_sum = Column(Integer, default=0)
+
 class UserPreference(Base):
     __tablename__ = "user_preferences"
 
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("students.id"))
+    student_id = Column(Integer, ForeignKey("students.id"), index=True)
     study_duration_minutes = Column(Integer, default=25)
     break_duration_minutes = Column(Integer, default=5)
     theme = Column(String, default="light")  # light, dark
@@ -95,12 +111,17 @@ class Question(Base):
     student = relationship("Student", back_populates="questions")
     answers = relationship("Answer", back_populates="question")
 
+    __table_args__ = (
+        # Keyset pagination of GET /questions/ seeks on (created_at, id)
+        Index("ix_questions_created_at_id", "created_at", "id"),
+    )
+
 class Answer(Base):
     __tablename__ = "answers"
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String)
-    question_id = Column(Integer, ForeignKey("questions.id"))
+    question_id = Column(Integer, ForeignKey("questions.id"), index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     
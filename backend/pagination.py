@@ -0,0 +1,43 @@
+# Keyset ("seek") pagination over (created_at, id). A page starts strictly
+# after the last row of the previous one, so every page is an index range
+# scan of `limit` rows no matter how deep it is, unlike OFFSET which reads
+# and discards every skipped row.
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import tuple_
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a cursor that encode_cursor did not produce"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+def keyset_page(stmt, model, limit: int, cursor: Optional[str] = None):
+    """Order `stmt` by (created_at, id) and restrict it to the page after `cursor`.
+
+    One extra row is selected so the caller can tell whether a next page
+    exists; pass the result to next_cursor.
+    """
+    stmt = stmt.order_by(model.created_at, model.id).limit(limit + 1)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) > (created_at, row_id))
+    return stmt
+
+def next_cursor(rows: list, limit: int) -> Optional[str]:
+    """Trim the extra row keyset_page selected and return the next page's cursor"""
+    if limit < 1 or len(rows) <= limit:
+        return None
+    del rows[limit:]
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,149 @@
+import threading
+import time
+from typing import Callable, Dict
+
+from .analytics_service import AnalyticsService
+
+class PatternUpdateWorker:
+    """Background thread that recomputes StudyPattern rows off the request path.
+
+    Requests for the same student are coalesced while pending and debounced:
+    a student is processed `debounce_seconds` after their latest request, but
+    never later than `max_delay_seconds` after their first pending one. The
+    pending set is bounded; `submit` returns False when it is full so the
+    caller can apply backpressure (e.g. run the update inline).
+    """
+
+    def __init__(self, session_factory: Callable, analytics_service: AnalyticsService,
+                 debounce_seconds: float = 2.0, max_delay_seconds: float = 10.0, max_pending: int = 1000):
+        self.session_factory = session_factory
+        self.analytics_service = analytics_service
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.max_pending = max_pending
+
+        # student_id -> (first requested at, due at), both time.monotonic()
+        self._pending: Dict[int, tuple] = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+        self._submitted = 0
+        self._coalesced = 0
+        self._rejected = 0
+        self._processed = 0
+        self._failed = 0
+        self._total_lag = 0.0
+        self._max_lag = 0.0
+        self._last_lag = 0.0
+
+    def start(self):
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="pattern-update-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Process everything still pending, then stop the thread"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        # Anything submitted after the thread exited
+        self.flush()
+
+    def submit(self, student_id: int) -> bool:
+        """Schedule a pattern update for a student. Returns False if the queue is full or stopping."""
+        now = time.monotonic()
+        with self._condition:
+            self._submitted += 1
+            if self._stopping:
+                self._rejected += 1
+                return False
+            pending = self._pending.get(student_id)
+            if pending is not None:
+                self._coalesced += 1
+                first_requested = pending[0]
+            elif len(self._pending) >= self.max_pending:
+                self._rejected += 1
+                return False
+            else:
+                first_requested = now
+            due = min(now + self.debounce_seconds, first_requested + self.max_delay_seconds)
+            self._pending[student_id] = (first_requested, due)
+            self._condition.notify()
+
+        self.start()
+        return True
+
+    def flush(self):
+        """Synchronously process every pending student, ignoring debounce"""
+        with self._condition:
+            batch = list(self._pending.items())
+            self._pending.clear()
+        self._process(batch)
+
+    def metrics(self) -> Dict:
+        with self._condition:
+            now = time.monotonic()
+            oldest = min((first for first, _ in self._pending.values()), default=None)
+            return {
+                "queue_depth": len(self._pending),
+                "oldest_pending_seconds": round(now - oldest, 3) if oldest is not None else 0,
+                "submitted": self._submitted,
+                "coalesced": self._coalesced,
+                "rejected": self._rejected,
+                "processed": self._processed,
+                "failed": self._failed,
+                "last_lag_seconds": round(self._last_lag, 3),
+                "max_lag_seconds": round(self._max_lag, 3),
+                "avg_lag_seconds": round(self._total_lag / self._processed, 3) if self._processed else 0,
+            }
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopping:
+                        batch = list(self._pending.items())
+                        self._pending.clear()
+                        break
+                    now = time.monotonic()
+                    batch = [(sid, p) for sid, p in self._pending.items() if p[1] <= now]
+                    if batch:
+                        for sid, _ in batch:
+                            del self._pending[sid]
+                        break
+                    next_due = min((due for _, due in self._pending.values()), default=None)
+                    self._condition.wait(None if next_due is None else next_due - now)
+
+            self._process(batch)
+            if self._stopping:
+                return
+
+    def _process(self, batch):
+        for student_id, (first_requested, _) in batch:
+            db = self.session_factory()
+            try:
+                self.analytics_service.update_study_pattern(db, student_id)
+                failed = False
+            except Exception as e:
+                db.rollback()
+                print(f"Pattern update failed for student {student_id}: {e}")
+                failed = True
+            finally:
+                db.close()
+
+            lag = time.monotonic() - first_requested
+            with self._condition:
+                if failed:
+                    self._failed += 1
+                    continue
+                self._processed += 1
+                self._total_lag += lag
+                self._last_lag = lag
+                self._max_lag = max(self._max_lag, lag)
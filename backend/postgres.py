@@ -0,0 +1,114 @@
+# PostgreSQL-specific schema and bulk loading, used when DATABASE_URL is a
+# postgresql:// URL. The append-heavy tables are range-partitioned by month
+# and FocusMetricBuffer loads batches with COPY instead of INSERT.
+# Keep partitions ahead of the clock by running `python -m backend.postgres`
+# from cron. Needs PostgreSQL 11+ (tested on 16) and the psycopg driver, which
+# SQLAlchemy uses for postgresql:// URLs (postgresql+psycopg2:// also works).
+import io
+from datetime import date
+from typing import Dict, List
+
+from sqlalchemy import text
+
+from .database import Base
+
+# Partitioned table -> range partition column
+PARTITIONED_TABLES = {
+    "study_sessions": "start_time",
+    "focus_metrics": "timestamp"
+}
+
+def is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+def partitioned_table_ddl(table, column: str, dialect) -> str:
+    """CREATE TABLE ... PARTITION BY RANGE for a model table.
+
+    PostgreSQL requires the partition column in the primary key, and foreign
+    keys cannot point at a partitioned table through `id` alone, so those
+    references (focus_metrics.session_id) are left unenforced. Before
+    PostgreSQL 17 the identity column lives on the parent only, so rows must
+    be inserted through the parent table, never into a partition directly.
+    """
+    definitions = []
+    for col in table.columns:
+        if col.primary_key:
+            definitions.append(f"{col.name} {col.type.compile(dialect=dialect)} GENERATED BY DEFAULT AS IDENTITY")
+        elif col.name == column:
+            definitions.append(f"{col.name} {col.type.compile(dialect=dialect)} NOT NULL")
+        else:
+            definitions.append(f"{col.name} {col.type.compile(dialect=dialect)}")
+    primary_key = [col.name for col in table.primary_key.columns]
+    definitions.append(f"PRIMARY KEY ({', '.join(primary_key + [column])})")
+    for fk in table.foreign_keys:
+        if fk.column.table.name not in PARTITIONED_TABLES:
+            definitions.append(f"FOREIGN KEY ({fk.parent.name}) REFERENCES {fk.column.table.name} ({fk.column.name})")
+    return f"CREATE TABLE IF NOT EXISTS {table.name} (\n    " + ",\n    ".join(definitions) + f"\n) PARTITION BY RANGE ({column})"
+
+def create_partitioned_schema(bind):
+    """create_all for PostgreSQL, with PARTITIONED_TABLES created as partitioned tables"""
+    tables = Base.metadata.sorted_tables
+    Base.metadata.create_all(bind=bind, tables=[t for t in tables if t.name not in PARTITIONED_TABLES])
+    with bind.begin() as conn:
+        for table in tables:
+            if table.name in PARTITIONED_TABLES:
+                conn.execute(text(partitioned_table_ddl(table, PARTITIONED_TABLES[table.name], bind.dialect)))
+    ensure_partitions(bind)
+
+def ensure_partitions(bind, months_back: int = 1, months_ahead: int = 3, today: date = None):
+    """Create the monthly partitions around `today`, plus a DEFAULT partition.
+
+    Rows outside every monthly range (e.g. imported history) land in the
+    DEFAULT partition. A monthly partition cannot be added once DEFAULT holds
+    rows for its range, which is why partitions are created months ahead.
+    """
+    today = today or date.today()
+    first = _add_months(date(today.year, today.month, 1), -months_back)
+    with bind.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+            for offset in range(months_back + months_ahead + 1):
+                start = _add_months(first, offset)
+                end = _add_months(start, 1)
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {table}_y{start.year}m{start.month:02d} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+
+def copy_rows(db, table: str, columns: List[str], rows: List[Dict]):
+    """Bulk load column dicts with COPY FROM STDIN in the session's transaction"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_csv_field(row.get(column)) for column in columns))
+        buffer.write("\n")
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+
+    cursor = db.connection().connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            # psycopg2
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+def _csv_field(value) -> str:
+    # COPY reads an unquoted empty field as NULL; quoting everything else keeps '' distinct
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+if __name__ == "__main__":
+    from .database import engine
+    if not is_postgres(engine):
+        raise SystemExit("DATABASE_URL does not point at PostgreSQL")
+    ensure_partitions(engine)
+    print("Partitions are up to date")
@@ -0,0 +1,93 @@
+import os
+import threading
+from typing import Dict, Iterable
+
+from sqlalchemy import select
+
+from .cache import TTLCache
+from .models import UserPreference
+
+class PreferenceCache:
+    """Read-through cache of the preference fields /analyze needs, per student.
+
+    Students without a preferences row are cached as {} so they do not hit the
+    database either. Writers call invalidate() after committing; a load that
+    started before the invalidation is not stored, so a slow read cannot put
+    the old row back into the cache.
+    """
+
+    def __init__(self, max_size: int = None, ttl_seconds: float = None):
+        max_size = max_size if max_size is not None else int(os.environ.get("PREFERENCE_CACHE_SIZE", 10000))
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.environ.get("PREFERENCE_CACHE_TTL_SECONDS", 600))
+        self.cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self._generations: Dict[int, int] = {}
+        self.invalidations = 0
+
+    async def get(self, db, student_id: int) -> Dict:
+        prefs = self.cache.get(student_id)
+        if prefs is not None:
+            return prefs
+
+        generation = self._generation(student_id)
+        row = await db.scalar(select(UserPreference).filter(UserPreference.student_id == student_id))
+        prefs = self.to_dict(row)
+        with self._lock:
+            if self._generations.get(student_id, 0) == generation:
+                self.cache.set(student_id, prefs)
+        return prefs
+
+    async def get_many(self, db, student_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Like get for several students, loading all misses with one IN query"""
+        found = {}
+        missing = set()
+        for student_id in student_ids:
+            prefs = self.cache.get(student_id)
+            if prefs is not None:
+                found[student_id] = prefs
+            else:
+                missing.add(student_id)
+        if not missing:
+            return found
+
+        generations = {student_id: self._generation(student_id) for student_id in missing}
+        rows = await db.scalars(select(UserPreference).filter(UserPreference.student_id.in_(sorted(missing))))
+        loaded = {student_id: {} for student_id in missing}
+        for row in rows:
+            loaded[row.student_id] = self.to_dict(row)
+        with self._lock:
+            for student_id, prefs in loaded.items():
+                if self._generations.get(student_id, 0) == generations[student_id]:
+                    self.cache.set(student_id, prefs)
+        found.update(loaded)
+        return found
+
+    def set(self, student_id: int, row: UserPreference):
+        """Store a row that was just committed"""
+        with self._lock:
+            self._generations[student_id] = self._generations.get(student_id, 0) + 1
+            self.cache.set(student_id, self.to_dict(row))
+
+    def invalidate(self, student_id: int):
+        with self._lock:
+            self._generations[student_id] = self._generations.get(student_id, 0) + 1
+            self.cache.delete(student_id)
+            self.invalidations += 1
+
+    def _generation(self, student_id: int) -> int:
+        with self._lock:
+            return self._generations.get(student_id, 0)
+
+    @staticmethod
+    def to_dict(row: UserPreference) -> Dict:
+        if row is None:
+            return {}
+        return {
+            "study_duration_minutes": row.study_duration_minutes,
+            "break_duration_minutes": row.break_duration_minutes
+        }
+
+    def stats(self) -> Dict:
+        stats = self.cache.stats()
+        stats["invalidations"] = self.invalidations
+        return stats
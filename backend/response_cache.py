@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from .cache import TTLCache
+
+def normalize_message(message: str) -> str:
+    """Case, whitespace and trailing punctuation do not change the answer"""
+    return re.sub(r"\s+", " ", message.lower()).strip().rstrip("?!. ")
+
+class SQLiteResponseStore:
+    """Persistent tier for cached chat responses, shared across restarts and workers"""
+
+    def __init__(self, path: str, sweep_seconds: float = 300.0):
+        self.path = path
+        # Expired rows are deleted at most this often, not on every put
+        self.sweep_seconds = sweep_seconds
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chat_responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                response TEXT,
+                expires_at REAL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[tuple]:
+        """(response, seconds left) if stored and not expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM chat_responses WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1] - time.time()
+
+    def put(self, key: str, provider: str, model: str, response: str, ttl_seconds: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_responses (key, provider, model, response, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, provider, model, response, time.time() + ttl_seconds)
+            )
+            # Keep the file from growing without bound
+            now = time.monotonic()
+            if now - self._last_sweep >= self.sweep_seconds:
+                self._conn.execute("DELETE FROM chat_responses WHERE expires_at <= ?", (time.time(),))
+                self._last_sweep = now
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class ResponseCache:
+    """Cache of external LLM answers keyed on (normalized message, provider, model).
+
+    Lookups try the in-memory LRU/TTL tier first, then the optional SQLite
+    tier (enabled with CHAT_CACHE_DB=<path>); a persistent hit is promoted
+    into memory for its remaining lifetime. Async callers use `aget`/`aput`,
+    which run the SQLite tier in a worker thread instead of on the event loop.
+    """
+
+    def __init__(self, max_size: int = None, ttl_seconds: float = None, db_path: Optional[str] = None):
+        max_size = max_size if max_size is not None else int(os.environ.get("CHAT_CACHE_SIZE", 1024))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.environ.get("CHAT_CACHE_TTL_SECONDS", 6 * 3600))
+        self.memory = TTLCache(max_size=max_size, ttl_seconds=self.ttl_seconds)
+
+        db_path = db_path if db_path is not None else os.environ.get("CHAT_CACHE_DB")
+        self.store = SQLiteResponseStore(db_path) if db_path else None
+
+        self._lock = threading.Lock()
+        self.store_hits = 0
+        self.misses = 0
+
+    def key(self, message: str, provider: str, model: str) -> str:
+        raw = f"{provider}\0{model}\0{normalize_message(message)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, message: str, provider: str, model: str) -> Optional[str]:
+        key = self.key(message, provider, model)
+        response = self.memory.get(key)
+        if response is not None:
+            return response
+        return self._get_stored(key, self.store.get(key) if self.store is not None else None)
+
+    async def aget(self, message: str, provider: str, model: str) -> Optional[str]:
+        key = self.key(message, provider, model)
+        response = self.memory.get(key)
+        if response is not None:
+            return response
+        return self._get_stored(key, await asyncio.to_thread(self.store.get, key) if self.store is not None else None)
+
+    def put(self, message: str, provider: str, model: str, response: str):
+        key = self.key(message, provider, model)
+        self.memory.set(key, response)
+        if self.store is not None:
+            self.store.put(key, provider, model, response, self.ttl_seconds)
+
+    async def aput(self, message: str, provider: str, model: str, response: str):
+        key = self.key(message, provider, model)
+        self.memory.set(key, response)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.put, key, provider, model, response, self.ttl_seconds)
+
+    def _get_stored(self, key: str, stored: Optional[tuple]) -> Optional[str]:
+        """Promote a persistent hit into memory; count a miss otherwise"""
+        if stored is not None:
+            response, ttl_left = stored
+            self.memory.set(key, response, ttl_left)
+            with self._lock:
+                self.store_hits += 1
+            return response
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def stats(self) -> Dict:
+        memory = self.memory.stats()
+        with self._lock:
+            hits = memory["hits"] + self.store_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0,
+                "memory": memory,
+                "persistent_hits": self.store_hits,
+                "persistent_enabled": self.store is not None
+            }
@@ -80,3 +80,26 @@ class Question(QuestionBase):
 
     class Config:
         from_attributes = True
+
+class QuestionSearchHit(BaseModel):
+    id: int
+    title: str
+    student_id: int
+    created_at: datetime
+    highlighted_title: str
+    snippet: str
+    score: float
+
+class DuplicateQuestion(BaseModel):
+    id: int
+    title: str
+    similarity: float
+
+class QuestionSummary(QuestionBase):
+    id: int
+    student_id: int
+    created_at: datetime
+    answer_count: int
+
+    class Config:
+        from_attributes = True
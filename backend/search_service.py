@@ -0,0 +1,190 @@
+# Full-text search over community questions and their answers.
+# SQLite: an FTS5 table (question_search) with one row per question, rowid =
+# questions.id, kept in sync by create_question/create_answer in the same
+# transaction as the insert. PostgreSQL: GIN indexes on to_tsvector
+# expressions, which the database maintains itself.
+# Rebuild the index of an existing database with `python -m backend.search_service`.
+import html
+import re
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import text
+
+FTS_TABLE = "question_search"
+TS_CONFIG = "english"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# The database wraps matches in these private-use characters; the text is
+# HTML-escaped before they become <mark> tags, so stored markup stays inert
+MATCH_START = "\ue000"
+MATCH_END = "\ue001"
+
+# Title matches outrank content matches, which outrank answer matches
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+SQLITE_SEARCH = f"""
+SELECT q.id, q.title, q.student_id, q.created_at,
+       highlight({FTS_TABLE}, 0, '{MATCH_START}', '{MATCH_END}') AS highlighted_title,
+       snippet({FTS_TABLE}, -1, '{MATCH_START}', '{MATCH_END}', '…', 16) AS snippet,
+       -bm25({FTS_TABLE}, {', '.join(str(w) for w in BM25_WEIGHTS)}) AS score
+FROM {FTS_TABLE}
+JOIN questions q ON q.id = {FTS_TABLE}.rowid
+WHERE {FTS_TABLE} MATCH :query
+ORDER BY score DESC, q.id
+LIMIT :limit OFFSET :skip
+"""
+
+_QUESTION_VECTOR = f"to_tsvector('{TS_CONFIG}', coalesce(title, '') || ' ' || coalesce(content, ''))"
+_ANSWER_VECTOR = f"to_tsvector('{TS_CONFIG}', coalesce(content, ''))"
+
+POSTGRES_SEARCH = f"""
+WITH query AS (SELECT to_tsquery('{TS_CONFIG}', :query) AS q),
+hits AS (
+    SELECT id FROM questions, query WHERE {_QUESTION_VECTOR} @@ query.q
+    UNION
+    SELECT question_id FROM answers, query WHERE {_ANSWER_VECTOR} @@ query.q
+)
+SELECT q.id, q.title, q.student_id, q.created_at,
+       ts_headline('{TS_CONFIG}', coalesce(q.title, ''), query.q,
+                   'StartSel={MATCH_START}, StopSel={MATCH_END}, HighlightAll=true') AS highlighted_title,
+       ts_headline('{TS_CONFIG}', coalesce(q.content, ''), query.q,
+                   'StartSel={MATCH_START}, StopSel={MATCH_END}, MaxFragments=1, MaxWords=24, MinWords=8') AS snippet,
+       ts_rank_cd(setweight(to_tsvector('{TS_CONFIG}', coalesce(q.title, '')), 'A') ||
+                  setweight(to_tsvector('{TS_CONFIG}', coalesce(q.content, '')), 'B'), query.q) AS score
+FROM hits JOIN questions q ON q.id = hits.id, query
+ORDER BY score DESC, q.id
+LIMIT :limit OFFSET :skip
+"""
+
+class SearchService:
+    """BM25-ranked search over questions (title, content) and their answers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.searches = 0
+        self.total_seconds = 0.0
+        self.indexed_questions = 0
+        self.indexed_answers = 0
+
+    @staticmethod
+    def is_postgres(bind) -> bool:
+        return bind.dialect.name == "postgresql"
+
+    def ensure_schema(self, bind) -> bool:
+        """Create the search index if it is missing; returns True if it was created
+        (the caller should then backfill it)"""
+        with bind.begin() as conn:
+            if self.is_postgres(bind):
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_questions_search ON questions USING GIN ({_QUESTION_VECTOR})"))
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_answers_search ON answers USING GIN ({_ANSWER_VECTOR})"))
+                return False
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+            ).first()
+            if exists:
+                return False
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, content, answers, tokenize = 'porter unicode61')"
+            ))
+            return True
+
+    def backfill(self, bind) -> int:
+        """Rebuild the SQLite index from the questions and answers tables"""
+        if self.is_postgres(bind):
+            return 0
+        with bind.begin() as conn:
+            conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+            result = conn.execute(text(f"""
+                INSERT INTO {FTS_TABLE} (rowid, title, content, answers)
+                SELECT q.id, coalesce(q.title, ''), coalesce(q.content, ''),
+                       coalesce((SELECT group_concat(a.content, ' ') FROM answers a WHERE a.question_id = q.id), '')
+                FROM questions q
+            """))
+            return result.rowcount
+
+    async def index_question(self, db, question):
+        """Add a flushed question to the index, in the caller's transaction"""
+        if self.is_postgres(db.get_bind()):
+            return
+        await db.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, title, content, answers) VALUES (:id, :title, :content, '')"),
+            {"id": question.id, "title": question.title or "", "content": question.content or ""}
+        )
+        with self._lock:
+            self.indexed_questions += 1
+
+    async def index_answer(self, db, answer):
+        """Append an answer to its question's index row, in the caller's transaction"""
+        if self.is_postgres(db.get_bind()) or not answer.content:
+            return
+        await db.execute(
+            text(f"UPDATE {FTS_TABLE} SET answers = ltrim(answers || ' ' || :content) WHERE rowid = :question_id"),
+            {"content": answer.content, "question_id": answer.question_id}
+        )
+        with self._lock:
+            self.indexed_answers += 1
+
+    async def search(self, db, query: str, limit: int = 20, skip: int = 0) -> List[Dict]:
+        postgres = self.is_postgres(db.get_bind())
+        match = self.to_tsquery(query) if postgres else self.to_match(query)
+        if not match:
+            return []
+
+        started = time.perf_counter()
+        result = await db.execute(
+            text(POSTGRES_SEARCH if postgres else SQLITE_SEARCH),
+            {"query": match, "limit": limit, "skip": skip}
+        )
+        rows = [dict(row._mapping) for row in result]
+        for row in rows:
+            row["highlighted_title"] = self.to_html(row["highlighted_title"])
+            row["snippet"] = self.to_html(row["snippet"])
+        with self._lock:
+            self.searches += 1
+            self.total_seconds += time.perf_counter() - started
+        return rows
+
+    @staticmethod
+    def to_html(marked: str) -> str:
+        """Escape highlighted text and turn the match markers into <mark> tags"""
+        escaped = html.escape(marked or "")
+        return escaped.replace(MATCH_START, HIGHLIGHT_START).replace(MATCH_END, HIGHLIGHT_END)
+
+    @staticmethod
+    def to_match(query: str) -> str:
+        """FTS5 MATCH expression for free text: every word must match, the
+        last one as a prefix so results follow the user as they type"""
+        tokens = _TOKEN.findall(query)
+        if not tokens:
+            return ""
+        terms = [f'"{token}"' for token in tokens]
+        terms[-1] += "*"
+        return " ".join(terms)
+
+    @staticmethod
+    def to_tsquery(query: str) -> str:
+        tokens = _TOKEN.findall(query)
+        if not tokens:
+            return ""
+        tokens[-1] += ":*"
+        return " & ".join(tokens)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "searches": self.searches,
+                "avg_latency_ms": round(self.total_seconds / self.searches * 1000, 2) if self.searches else 0,
+                "indexed_questions": self.indexed_questions,
+                "indexed_answers": self.indexed_answers
+            }
+
+if __name__ == "__main__":
+    from .database import engine
+    service = SearchService()
+    service.ensure_schema(engine)
+    count = service.backfill(engine)
+    print(f"Indexed {count} questions" if not service.is_postgres(engine) else "GIN search indexes are in place")
@@ -0,0 +1,100 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, or_, case, extract
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional, Tuple
+from .models import StudySession
+
+class SessionAggregator:
+    """SQL-side aggregates over a student's completed sessions.
+
+    Every method runs a single query and returns plain scalar tuples, so no
+    StudySession objects are hydrated into the identity map.
+    """
+
+    def focus_profile(self, db: Session, student_id: int, recent_since: datetime) -> List[Tuple]:
+        """Focus totals grouped by (hour, duration bucket).
+
+        At most 24 * 5 rows per student. Each row is
+        (hour, bucket, count, focus_sum, first_id,
+         recent_count, recent_focus_sum, recent_first_id), where the recent_*
+        columns only count sessions starting at or after `recent_since` and
+        first_id is the lowest session id in the group (used to break ties in
+        insertion order).
+        """
+        hour = extract("hour", StudySession.start_time)
+        duration = StudySession.duration_minutes
+        bucket = case(
+            (duration < 20, 15),  # 10-20 min
+            (duration < 30, 25),  # 20-30 min
+            (duration < 40, 35),  # 30-40 min
+            (duration < 50, 45),  # 40-50 min
+            else_=60              # 50+ min
+        )
+        is_recent = StudySession.start_time >= recent_since
+
+        rows = db.query(
+            hour,
+            bucket,
+            func.count(StudySession.id),
+            func.coalesce(func.sum(StudySession.focus_score), 0.0),
+            func.min(StudySession.id),
+            func.sum(case((is_recent, 1), else_=0)),
+            func.coalesce(func.sum(case((is_recent, StudySession.focus_score), else_=0.0)), 0.0),
+            func.min(case((is_recent, StudySession.id)))
+        ).filter(
+            self._completed(student_id)
+        ).group_by(hour, bucket).all()
+
+        return [
+            (int(h), int(b), count, float(focus), first_id,
+             int(recent_count or 0), float(recent_focus), recent_first_id)
+            for h, b, count, focus, first_id, recent_count, recent_focus, recent_first_id in rows
+        ]
+
+    def ordered_focus_sums(self, db: Session, student_id: int, since: datetime, until: datetime) -> Tuple[float, float]:
+        """(focus sum of all sessions, focus sum of sessions starting in [since, until)),
+        each added up in session id order"""
+        total, window = 0.0, 0.0
+        rows = db.query(StudySession.start_time, StudySession.focus_score).filter(
+            self._completed(student_id)
+        ).order_by(StudySession.id)
+        for start_time, focus in rows:
+            total += focus or 0.0
+            if start_time is not None and since <= start_time < until:
+                window += focus or 0.0
+        return total, window
+
+    def durations_since(self, db: Session, student_id: int, since: datetime) -> List[Tuple[datetime, int]]:
+        """(start_time, duration) of sessions starting at or after `since`, in session id order"""
+        return db.query(StudySession.start_time, StudySession.duration_minutes).filter(
+            self._completed(student_id, since)
+        ).order_by(StudySession.id).all()
+
+    def sessions_on_days(self, db: Session, student_id: int, days: Iterable[date]) -> List[Tuple[datetime, int, float, int]]:
+        """(start_time, duration, focus, distractions) for sessions starting on the given UTC days"""
+        ranges = [
+            and_(
+                StudySession.start_time >= datetime.combine(day, time.min),
+                StudySession.start_time < datetime.combine(day + timedelta(days=1), time.min)
+            )
+            for day in set(days)
+        ]
+        if not ranges:
+            return []
+        return db.query(
+            StudySession.start_time,
+            StudySession.duration_minutes,
+            StudySession.focus_score,
+            StudySession.distractions_count
+        ).filter(
+            and_(self._completed(student_id), or_(*ranges))
+        ).all()
+
+    def _completed(self, student_id: int, since: Optional[datetime] = None):
+        criteria = and_(
+            StudySession.student_id == student_id,
+            StudySession.completed == True
+        )
+        if since is not None:
+            criteria = and_(criteria, StudySession.start_time >= since)
+        return criteria
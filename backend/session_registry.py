@@ -0,0 +1,234 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import update
+
+from .models import StudySession
+
+class ActiveSessionState:
+    """Live values of a running study session"""
+    __slots__ = ("session_id", "focus_score", "distractions_count", "duration_minutes", "dirty", "touched_at")
+
+    def __init__(self, session_id: int, focus_score: float = 0.0, distractions_count: int = 0, duration_minutes: int = 0):
+        self.session_id = session_id
+        self.focus_score = focus_score
+        self.distractions_count = distractions_count
+        self.duration_minutes = duration_minutes
+        self.dirty = False  # Changed since the last checkpoint
+        self.touched_at = time.monotonic()
+
+class ActiveSessionRegistry:
+    """In-memory state for running sessions, checkpointed to study_sessions.
+
+    PUT /sessions/{id}/update only mutates an ActiveSessionState. Dirty
+    states are written back in one executemany UPDATE every
+    `checkpoint_seconds`, on shutdown, and superseded by the final values
+    when the session is completed.
+
+    Crash recovery: study_sessions always holds the last checkpoint, so a
+    crash loses at most `checkpoint_seconds` of in-progress updates for
+    running sessions; completed sessions are unaffected because completion
+    writes its own values. On startup `recover()` reloads every running
+    session started within `idle_eviction_seconds` with its checkpointed
+    values; any other session is reloaded from its row on its next update.
+    Completed sessions are never loaded, and checkpoints skip rows that were
+    completed meanwhile, so a late update cannot overwrite completion values.
+    """
+
+    def __init__(self, session_factory: Callable, checkpoint_seconds: float = 30.0,
+                 idle_eviction_seconds: float = 6 * 3600):
+        self.session_factory = session_factory
+        self.checkpoint_seconds = checkpoint_seconds
+        self.idle_eviction_seconds = idle_eviction_seconds
+
+        self._states: Dict[int, ActiveSessionState] = {}
+        self._lock = threading.Lock()
+        # Held while a checkpoint writes, so completion never races a stale write
+        self._checkpoint_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._updates = 0
+        self._loads = 0
+        self._checkpoints = 0
+        self._rows_checkpointed = 0
+        self._last_checkpoint_ms = 0.0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="session-checkpoint", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the checkpoint thread and write out every dirty session"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.checkpoint()
+
+    def recover(self) -> int:
+        """Reload running sessions from their last checkpoint (after a restart).
+        Returns how many sessions were brought into memory."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.idle_eviction_seconds)
+        db = self.session_factory()
+        try:
+            rows = db.query(
+                StudySession.id,
+                StudySession.focus_score,
+                StudySession.distractions_count,
+                StudySession.duration_minutes
+            ).filter(
+                StudySession.completed == False,
+                StudySession.start_time >= cutoff
+            ).all()
+        finally:
+            db.close()
+
+        recovered = 0
+        with self._lock:
+            for session_id, focus_score, distractions_count, duration_minutes in rows:
+                # Sessions already updated since startup hold newer values
+                if session_id not in self._states:
+                    self._states[session_id] = ActiveSessionState(
+                        session_id, focus_score or 0.0, distractions_count or 0, duration_minutes or 0
+                    )
+                    recovered += 1
+            self._loads += recovered
+        return recovered
+
+    def register(self, session_id: int, focus_score: float = 0.0, distractions_count: int = 0, duration_minutes: int = 0):
+        with self._lock:
+            self._states[session_id] = ActiveSessionState(session_id, focus_score, distractions_count, duration_minutes)
+
+    def update(self, session_id: int, focus_score: Optional[float] = None, distractions_count: Optional[int] = None,
+               duration_minutes: Optional[int] = None) -> bool:
+        """Apply an update, loading the session first if needed (blocking query).
+        Returns False if there is no running session with this id."""
+        if self.update_loaded(session_id, focus_score, distractions_count, duration_minutes):
+            return True
+        if self._load(session_id) is None:
+            return False
+        return self.update_loaded(session_id, focus_score, distractions_count, duration_minutes)
+
+    def update_loaded(self, session_id: int, focus_score: Optional[float] = None, distractions_count: Optional[int] = None,
+                      duration_minutes: Optional[int] = None) -> bool:
+        """Apply an update to a session already in memory; never touches the database.
+        Returns False if the session is not in memory."""
+        with self._lock:
+            state = self._states.get(session_id)
+            if state is None:
+                return False
+            if focus_score is not None:
+                state.focus_score = focus_score
+            if distractions_count is not None:
+                state.distractions_count = distractions_count
+            if duration_minutes is not None:
+                state.duration_minutes = duration_minutes
+            state.dirty = True
+            state.touched_at = time.monotonic()
+            self._updates += 1
+
+        self.start()
+        return True
+
+    def get(self, session_id: int) -> Optional[ActiveSessionState]:
+        with self._lock:
+            return self._states.get(session_id)
+
+    def discard(self, session_id: int):
+        """Forget a session (it is being completed). Waits for an in-flight checkpoint."""
+        with self._checkpoint_lock:
+            with self._lock:
+                self._states.pop(session_id, None)
+
+    def checkpoint(self) -> int:
+        """Write every dirty session to study_sessions in one transaction"""
+        with self._checkpoint_lock:
+            now = time.monotonic()
+            with self._lock:
+                rows = []
+                for state in self._states.values():
+                    if state.dirty:
+                        rows.append({
+                            "id": state.session_id,
+                            "focus_score": state.focus_score,
+                            "distractions_count": state.distractions_count,
+                            "duration_minutes": state.duration_minutes
+                        })
+                        state.dirty = False
+                # Abandoned sessions that were never completed
+                for session_id in [sid for sid, s in self._states.items()
+                                   if not s.dirty and now - s.touched_at > self.idle_eviction_seconds]:
+                    del self._states[session_id]
+
+            if not rows:
+                return 0
+
+            started = time.monotonic()
+            db = self.session_factory()
+            try:
+                # A session completed since its last update keeps its completion values
+                db.execute(update(StudySession).where(StudySession.completed == False), rows,
+                           execution_options={"synchronize_session": None})
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Session checkpoint of {len(rows)} rows failed, will retry: {e}")
+                with self._lock:
+                    for row in rows:
+                        state = self._states.get(row["id"])
+                        if state is not None:
+                            state.dirty = True
+                return 0
+            finally:
+                db.close()
+
+            with self._lock:
+                self._checkpoints += 1
+                self._rows_checkpointed += len(rows)
+                self._last_checkpoint_ms = (time.monotonic() - started) * 1000
+            return len(rows)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "active_sessions": len(self._states),
+                "dirty_sessions": sum(1 for s in self._states.values() if s.dirty),
+                "updates_absorbed": self._updates,
+                "sessions_loaded": self._loads,
+                "checkpoints": self._checkpoints,
+                "rows_checkpointed": self._rows_checkpointed,
+                "last_checkpoint_ms": round(self._last_checkpoint_ms, 2)
+            }
+
+    def _load(self, session_id: int) -> Optional[ActiveSessionState]:
+        """Bring a session that is not in memory (e.g. after a restart) into the registry"""
+        db = self.session_factory()
+        try:
+            row = db.query(
+                StudySession.focus_score,
+                StudySession.distractions_count,
+                StudySession.duration_minutes
+            ).filter(StudySession.id == session_id, StudySession.completed == False).first()
+        finally:
+            db.close()
+        if row is None:
+            return None
+
+        with self._lock:
+            # Another request may have loaded it meanwhile
+            state = self._states.get(session_id)
+            if state is None:
+                state = ActiveSessionState(session_id, row[0] or 0.0, row[1] or 0, row[2] or 0)
+                self._states[session_id] = state
+                self._loads += 1
+            return state
+
+    def _run(self):
+        while not self._stop_event.wait(self.checkpoint_seconds):
+            self.checkpoint()
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one in-flight call.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it runs await the same task and get its result (or exception).
+    Waiters are shielded, so one cancelled request does not cancel the call
+    the others are waiting on.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+            with self._lock:
+                self.calls += 1
+        else:
+            with self._lock:
+                self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "collapsed": self.collapsed,
+                "in_flight": len(self._calls)
+            }
@@ -0,0 +1,210 @@
+# Local nearest-neighbour index over short texts, with no model download or
+# network call. Texts are embedded by hashing their words and character
+# trigrams into a fixed number of signed buckets (the "hashing trick"), then
+# compared by cosine similarity.
+#
+# On disk an index is a directory:
+#   vectors.f32  float32 [capacity, dim], L2-normalised rows
+#   ids.i64      int64 [capacity], the item id of each row
+#   meta.json    {"dim": ..., "count": ..., "max_id": ..., "id_sum": ...},
+#                rewritten after each append
+# Both arrays are memory-mapped and searched in fixed-size chunks, so RAM use
+# stays bounded however many items the index holds. One process should own
+# a directory for writing. With path=None the arrays live in memory instead.
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+class HashedNgramEmbedder:
+    """Embeds text as a signed, hashed bag of words and character trigrams"""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def features(self, text: str) -> List[str]:
+        words = _WORD.findall((text or "").lower())
+        features = list(words)
+        for word in words:
+            padded = f" {word} "
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in self.features(text)), dtype=np.uint32)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if len(hashes):
+            # The low bits pick the bucket, the top bit the sign, so colliding
+            # features tend to cancel instead of adding up
+            signs = np.where(hashes >> 31, -1.0, 1.0)
+            vector = np.bincount(hashes % self.dim, weights=signs, minlength=self.dim).astype(np.float32)
+            vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+class VectorIndex:
+    """Append-only cosine-similarity index stored as memory-mapped arrays"""
+
+    def __init__(self, path: Optional[str], dim: int = 256, chunk_rows: int = 65536, initial_capacity: int = 1024):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        meta = self._read_meta()
+        if meta and meta["dim"] != dim:
+            print(f"Vector index {path} has dim {meta['dim']}, expected {dim}; starting empty")
+            meta = None
+        self.embedder = HashedNgramEmbedder(dim)
+        self.dim = dim
+        self.count = meta["count"] if meta else 0
+        self._open(max(initial_capacity, self.count))
+        if meta and "id_sum" in meta:
+            self.max_id, self.id_sum = meta["max_id"], meta["id_sum"]
+        else:
+            # Older index without the id summary: derive it from the ids
+            self.max_id, self.id_sum = self._summarise_ids()
+
+        self.searches = 0
+        self.search_seconds = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def fingerprint(self) -> Tuple[int, Optional[int], int]:
+        """(count, max id, sum of ids) of the indexed items, to compare with the
+        source table: a restored or copied database with the same number of
+        rows but different ids no longer matches"""
+        with self._lock:
+            return self.count, self.max_id, self.id_sum
+
+    def add(self, item_id: int, text: str):
+        vector = self.embedder.embed(text)
+        with self._lock:
+            if self.count == self.capacity:
+                self._open(self.capacity * 2)
+            self.vectors[self.count] = vector
+            self.ids[self.count] = item_id
+            self.count += 1
+            self.max_id = item_id if self.max_id is None else max(self.max_id, item_id)
+            self.id_sum += item_id
+            self._flush()
+
+    def rebuild(self, items: Iterable[Tuple[int, str]], batch: int = 4096):
+        """Replace the whole index with (item_id, text) pairs"""
+        with self._lock:
+            self.count = 0
+            self.max_id, self.id_sum = None, 0
+            pending_ids, pending_vectors = [], []
+            for item_id, text in items:
+                pending_ids.append(item_id)
+                pending_vectors.append(self.embedder.embed(text))
+                if len(pending_ids) == batch:
+                    self._append_block(pending_ids, pending_vectors)
+                    pending_ids, pending_vectors = [], []
+            if pending_ids:
+                self._append_block(pending_ids, pending_vectors)
+            self._flush()
+
+    def search(self, text: str, k: int = 5, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """The k most similar items with cosine similarity >= min_score, best first"""
+        started = time.perf_counter()
+        query = self.embedder.embed(text)
+        if not query.any():
+            return []
+
+        best_ids = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        with self._lock:
+            count = self.count
+            vectors, ids = self.vectors, self.ids
+        for start in range(0, count, self.chunk_rows):
+            end = min(start + self.chunk_rows, count)
+            scores = vectors[start:end] @ query
+            keep = scores >= min_score
+            if len(scores) > k:
+                keep &= scores >= np.partition(scores, -k)[-k]
+            best_ids = np.concatenate([best_ids, ids[start:end][keep]])
+            best_scores = np.concatenate([best_scores, scores[keep]])
+
+        order = np.argsort(-best_scores, kind="stable")[:k]
+        with self._lock:
+            self.searches += 1
+            self.search_seconds += time.perf_counter() - started
+        return [(int(best_ids[i]), round(float(best_scores[i]), 4)) for i in order]
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "items": self.count,
+                "capacity": self.capacity,
+                "dim": self.dim,
+                "searches": self.searches,
+                "avg_search_ms": round(self.search_seconds / self.searches * 1000, 2) if self.searches else 0
+            }
+
+    def _append_block(self, item_ids: List[int], vectors: List[np.ndarray]):
+        needed = self.count + len(item_ids)
+        if needed > self.capacity:
+            capacity = self.capacity
+            while capacity < needed:
+                capacity *= 2
+            self._open(capacity)
+        self.vectors[self.count:needed] = np.stack(vectors)
+        self.ids[self.count:needed] = item_ids
+        self.count = needed
+        block_max = max(item_ids)
+        self.max_id = block_max if self.max_id is None else max(self.max_id, block_max)
+        self.id_sum += sum(item_ids)
+
+    def _open(self, capacity: int):
+        """(Re)map the arrays with room for `capacity` rows, growing the files if needed"""
+        if self.path is None:
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            ids = np.zeros(capacity, dtype=np.int64)
+            if self.count:
+                vectors[:self.count] = self.vectors[:self.count]
+                ids[:self.count] = self.ids[:self.count]
+            self.capacity, self.vectors, self.ids = capacity, vectors, ids
+            return
+        for name, dtype, shape in (("vectors.f32", np.float32, (capacity, self.dim)), ("ids.i64", np.int64, (capacity,))):
+            file_path = os.path.join(self.path, name)
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            with open(file_path, "ab") as f:
+                if f.tell() < size:
+                    f.truncate(size)
+        self.capacity = capacity
+        self.vectors = np.memmap(os.path.join(self.path, "vectors.f32"), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self.ids = np.memmap(os.path.join(self.path, "ids.i64"), dtype=np.int64, mode="r+", shape=(capacity,))
+
+    def _flush(self):
+        if self.path is None:
+            return
+        # Data first, then the count that makes it visible
+        self.vectors.flush()
+        self.ids.flush()
+        meta_path = os.path.join(self.path, "meta.json")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({"dim": self.dim, "count": self.count, "max_id": self.max_id, "id_sum": self.id_sum}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def _summarise_ids(self) -> Tuple[Optional[int], int]:
+        ids = self.ids[:self.count]
+        return (int(ids.max()), int(ids.sum())) if self.count else (None, 0)
+
+    def _read_meta(self):
+        if self.path is None:
+            return None
+        try:
+            with open(os.path.join(self.path, "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
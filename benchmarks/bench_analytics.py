@@ -0,0 +1,102 @@
+"""
+Benchmark the analytics endpoints against a student with a long history
+Compares the old approach (load every StudySession with .all() and aggregate
+in Python) with the SQL aggregation layer used by AnalyticsService.
+
+Run from the repository root:
+    python -m benchmarks.bench_analytics --sessions 10000
+"""
+from datetime import datetime, timedelta
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, and_
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base
+from backend.models import Student, StudySession
+from backend.analytics_service import AnalyticsService
+
+def seed(db, sessions: int):
+    """Insert one student with `sessions` completed sessions spread over a year"""
+    db.add(Student(id=1, name="Bench", email="bench@studybuddy.com", hashed_password="x"))
+    now = datetime.utcnow()
+    rows = []
+    for _ in range(sessions):
+        rows.append({
+            "student_id": 1,
+            "start_time": now - timedelta(minutes=random.randint(0, 60 * 24 * 365)),
+            "duration_minutes": random.randint(10, 70),
+            "focus_score": random.uniform(40, 100),
+            "distractions_count": random.randint(0, 6),
+            "completed": True,
+        })
+    db.bulk_insert_mappings(StudySession, rows)
+    db.commit()
+
+def orm_materialised(db, student_id: int):
+    """The pre-aggregation code path: hydrate every session, then loop"""
+    sessions = db.query(StudySession).filter(
+        and_(StudySession.student_id == student_id, StudySession.completed == True)
+    ).all()
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    hour_scores, buckets = {}, {}
+    for s in sessions:
+        hour_scores.setdefault(s.start_time.hour, []).append(s.focus_score)
+        buckets.setdefault(min(s.duration_minutes // 10 * 10, 50), []).append(s.focus_score)
+    return (
+        sum(s.duration_minutes for s in sessions),
+        sum(s.focus_score for s in sessions) / len(sessions),
+        len([s for s in sessions if s.start_time >= week_ago]),
+        {h: sum(v) / len(v) for h, v in hour_scores.items()},
+        {b: sum(v) / len(v) for b, v in buckets.items()},
+    )
+
+def sql_aggregated(service: AnalyticsService, db, student_id: int):
+    """The current code path: one snapshot from rollups and GROUP BY queries"""
+    snapshot = service.build_snapshot(db, student_id)
+    return (
+        snapshot.stats,
+        snapshot.best_hour_overall,
+        snapshot.optimal_length_overall,
+        snapshot.weekly_data,
+    )
+
+def measure(label: str, fn, repeat: int):
+    fn()  # warm up caches and the rollup backfill
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {elapsed * 1000:9.2f} ms/call   peak {peak / 1024:9.1f} KiB")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, args.sessions)
+
+    service = AnalyticsService()
+    print(f"Student with {args.sessions} completed sessions\n")
+    before = measure("ORM materialised", lambda: orm_materialised(db, 1), args.repeat)
+    db.expunge_all()
+    after = measure("SQL aggregated", lambda: sql_aggregated(service, db, 1), args.repeat)
+    print(f"\nSpeed-up: {before / after:.1f}x")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark POST /analyze/batch against one POST /analyze per student
+Seeds --students students with preferences in a scratch database, then
+times a room of tracker updates sent as concurrent single /analyze calls
+and as /analyze/batch calls of --batch items, each with a cold preference
+cache (one IN query per batch) and a warm one. The rule evaluation alone
+is also timed: analyze_session in a loop vs the vectorised analyze_batch.
+
+Run from the repository root:
+    python -m benchmarks.bench_analyze_batch --students 2000 --batch 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+# The app opens ./studybuddy_v2.db, so give it an empty scratch directory
+sys.path.insert(0, os.getcwd())
+os.chdir(tempfile.mkdtemp())
+
+from sqlalchemy import insert
+
+from backend.database import SessionLocal, prepare_database
+from backend.main import analysis_service, app, preference_cache
+from backend.models import Student, UserPreference
+
+def seed(students: int):
+    db = SessionLocal()
+    db.execute(insert(Student), [{
+        "id": i, "name": f"Student {i}", "email": f"bench{i}@studybuddy.com", "hashed_password": "x"
+    } for i in range(1, students + 1)])
+    # Leave every fifth student without a preferences row
+    db.execute(insert(UserPreference), [{
+        "student_id": i, "study_duration_minutes": random.choice([25, 45, 60]), "break_duration_minutes": 5
+    } for i in range(1, students + 1) if i % 5])
+    db.commit()
+    db.close()
+
+def tracker_updates(students: int):
+    return [{
+        "student_id": i,
+        "focus_score": random.random(),
+        "current_duration_minutes": random.randint(1, 90)
+    } for i in range(1, students + 1)]
+
+async def run_single(client, items):
+    responses = await asyncio.gather(*(client.post("/analyze", json=item) for item in items))
+    assert all(r.status_code == 200 for r in responses)
+
+async def run_batch(client, items, batch: int):
+    chunks = [items[i:i + batch] for i in range(0, len(items), batch)]
+    responses = await asyncio.gather(*(client.post("/analyze/batch", json={"items": chunk}) for chunk in chunks))
+    assert all(r.status_code == 200 for r in responses)
+
+async def run(students: int, batch: int):
+    import httpx
+
+    items = tracker_updates(students)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, fn in (("single", lambda: run_single(client, items)),
+                          (f"batch/{batch}", lambda: run_batch(client, items, batch))):
+            for cache in ("cold", "warm"):
+                if cache == "cold":
+                    preference_cache.cache.clear()
+                started = time.perf_counter()
+                await fn()
+                elapsed = time.perf_counter() - started
+                print(f"{label:10s} {cache}  {elapsed * 1000:8.1f} ms   {students / elapsed:9.0f} students/s")
+
+def run_rules(students: int):
+    focus = [random.random() for _ in range(students)]
+    durations = [random.randint(1, 90) for _ in range(students)]
+    preferred = [random.choice([25, 45, 60, None]) for _ in range(students)]
+
+    started = time.perf_counter()
+    for score, minutes, goal in zip(focus, durations, preferred):
+        analysis_service.analyze_session(score, minutes, {"study_duration_minutes": goal})
+    loop = time.perf_counter() - started
+
+    started = time.perf_counter()
+    analysis_service.analyze_batch(focus, durations, preferred)
+    vectorised = time.perf_counter() - started
+    print(f"rules only: analyze_session loop {loop * 1000:.1f} ms, analyze_batch {vectorised * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500, help="items per /analyze/batch call")
+    args = parser.parse_args()
+
+    prepare_database()
+    seed(args.students)
+    asyncio.run(run(args.students, args.batch))
+    run_rules(args.students)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark concurrent /chat calls against a local fake LLM server
+Starts a fake OpenAI/Gemini server that answers after --latency seconds,
+then sends --requests concurrent /chat requests through the ASGI app. With
+the async provider layer they overlap instead of queueing for threadpool
+workers. Every message is unique, so the response cache never short-cuts.
+
+Run from the repository root:
+    python -m benchmarks.bench_chat_concurrency --requests 200 --latency 0.5
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+
+CALLS = {"chat": 0, "models": 0}
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        CALLS["models"] += 1
+        self._send({"models": [{"name": "models/gemini-1.5-flash", "supportedGenerationMethods": ["generateContent"]}]})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        CALLS["chat"] += 1
+        if "chat/completions" in self.path:
+            self._send({"choices": [{"message": {"content": "fake openai answer"}}]})
+        else:
+            self._send({"candidates": [{"content": {"parts": [{"text": "fake gemini answer"}]}}]})
+
+def start_fake_server(latency: float) -> ThreadingHTTPServer:
+    FakeLLMHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLMHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def run(requests: int, api_key: str):
+    import httpx
+    from backend.main import app, chat_service
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/chat", json={"message": f"benchmark question {i}", "api_key": api_key})
+            for i in range(requests)
+        ])
+        elapsed = time.perf_counter() - start
+    await chat_service.aclose()
+
+    failed = [r for r in responses if r.status_code != 200 or "fake" not in r.json()["response"]]
+    return elapsed, len(failed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds the fake provider takes per answer")
+    parser.add_argument("--provider", choices=["openai", "gemini"], default="openai")
+    args = parser.parse_args()
+
+    server = start_fake_server(args.latency)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    # Must be set before backend.main builds the ChatService
+    os.environ["OPENAI_BASE_URL"] = f"{base}/v1"
+    os.environ["GEMINI_BASE_URL"] = f"{base}/v1beta"
+    os.environ.pop("CHAT_CACHE_DB", None)
+    api_key = "AIzaSy-bench-key" if args.provider == "gemini" else "sk-bench-key-0000"
+
+    elapsed, failed = asyncio.run(run(args.requests, api_key))
+    server.shutdown()
+
+    serial = args.requests * args.latency
+    print(f"{args.requests} concurrent /chat calls ({args.provider}, {args.latency}s provider latency)")
+    print(f"  wall time        {elapsed:8.2f} s  (serial would be {serial:.1f} s)")
+    print(f"  throughput       {args.requests / elapsed:8.1f} req/s")
+    print(f"  provider calls   {CALLS['chat']:8d}   model listings {CALLS['models']}")
+    print(f"  failed           {failed:8d}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark the Coach's local intent matching
+Compares the old loop (re.search for each pattern in dict order) with the
+keyword-trie IntentMatcher, and checks both pick the same response for
+every message in the corpus.
+
+Run from the repository root:
+    python -m benchmarks.bench_chat_matcher --repeat 200
+"""
+import argparse
+import re
+import time
+
+from backend.chat_service import ChatService
+
+CORPUS = [
+    "How do I stop procrastinating on my history essay?",
+    "I keep forgetting everything I read the night before",
+    "what's the best way to use anki for med school",
+    "Can you explain the feynman technique?",
+    "I get so distracted by my phone when I study",
+    "is pomodoro actually good or should I do longer sessions",
+    "I have an exam on friday and I'm really nervous",
+    "how should I plan my week with 6 courses",
+    "I feel so tired and unmotivated lately",
+    "any tips for taking better notes in lectures?",
+    "hi there!",
+    "thanks, that was helpful",
+    "What is interleaving and why does it work?",
+    "My desk is a mess, how do I set up a good study environment",
+    "I'm overwhelmed, there is too much to learn",
+    "can you make me a quiz on cell biology",
+    "How do I get into deep work / flow state?",
+    "what's metacognition",
+    "I failed my midterm, I feel like a failure",
+    "Should I use diagrams or just text when revising organic chemistry?",
+    "tell me about dual coding",
+    "I need to prioritise between two urgent assignments",
+    "Give me a real-world example of compound interest",
+    "what can you do",
+    "The weather is nice today",
+    "Quantum mechanics wave function collapse interpretation",
+    "I study for 10 hours but nothing sticks, what am I doing wrong with my routine and schedule?",
+    "Is it bad to switch subjects every 30 minutes or should I block them?",
+]
+
+def legacy_match(patterns, message):
+    msg_lower = message.lower()
+    for pattern, response in patterns.items():
+        if re.search(pattern, msg_lower):
+            return response
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    service = ChatService()
+    # Longer messages stress the per-pattern rescans
+    corpus = CORPUS + [" ".join(CORPUS[i:i + 5]) for i in range(0, len(CORPUS), 5)]
+
+    for message in corpus:
+        assert legacy_match(service.patterns, message) == service.matcher.match(message.lower()), message
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for message in corpus:
+            legacy_match(service.patterns, message)
+    legacy = (time.perf_counter() - start) / (args.repeat * len(corpus))
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for message in corpus:
+            service.matcher.match(message.lower())
+    compiled = (time.perf_counter() - start) / (args.repeat * len(corpus))
+
+    print(f"{len(corpus)} messages, identical results")
+    print(f"re.search loop     {legacy * 1e6:8.2f} us/message")
+    print(f"IntentMatcher      {compiled * 1e6:8.2f} us/message")
+    print(f"\nSpeed-up: {legacy / compiled:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark the Coach's community-answer retrieval stage
+Fills a CommunityRetriever with --sizes answered synthetic questions, then
+sends ChatService.get_response a mix of paraphrased community questions
+and unrelated messages (no API key, so misses fall through to the pattern
+matcher). Reports the retrieval stage's latency, how many messages it
+answered, and whether each answer belonged to the paraphrased question.
+
+Run from the repository root:
+    python -m benchmarks.bench_chat_retrieval --sizes 1000 10000 50000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from backend.chat_service import ChatService
+from backend.community_retriever import CommunityRetriever
+from benchmarks.bench_question_index import make_question, make_vocabulary, near_duplicate, percentile
+
+async def run(size: int, messages: int, vocabulary, rng: random.Random):
+    retriever = CommunityRetriever(enabled=True)
+    questions = [make_question(vocabulary, rng) for _ in range(size)]
+    for question_id, question in enumerate(questions):
+        retriever.add_answer(question_id, question, "", f"answer {question_id}")
+    service = ChatService(retriever=retriever)
+
+    latencies, correct, unrelated_hits = [], 0, 0
+    for i in range(messages):
+        paraphrase = i % 2 == 0
+        target = rng.randrange(size)
+        message = near_duplicate(questions[target], vocabulary, rng) if paraphrase else make_question(vocabulary, rng)
+        started = time.perf_counter()
+        response = await service.get_response(message)
+        latencies.append(time.perf_counter() - started)
+        if paraphrase:
+            correct += response == f"answer {target}"
+        else:
+            unrelated_hits += response.startswith("answer ")
+    await service.aclose()
+
+    stage = service.stages.stats()["community"]
+    print(f"{size:>7} answered  get_response p50 {percentile(latencies, 0.5) * 1000:6.3f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:6.3f} ms  retrieval avg {stage['avg_ms']:6.3f} ms  "
+          f"paraphrases answered correctly {correct / (messages // 2):.3f}  "
+          f"unrelated answered {unrelated_hits / (messages - messages // 2):.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--messages", type=int, default=400)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    for size in args.sizes:
+        asyncio.run(run(size, args.messages, vocabulary, rng))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark the NumPy columnar analytics core at 1k / 100k / 1M sessions
+For one student with --sizes completed sessions, times:
+  loops     the per-row Python aggregation the analytics helpers used to do
+            (dicts of lists per hour and duration bucket, a set for the streak)
+  columnar  the same aggregates over SessionColumns with bincount / unique /
+            digitize (load time from the database reported separately)
+  rollup    AnalyticsService.build_snapshot on the default rollup engine
+and checks that the columnar and rollup engines produce identical snapshots.
+
+Run from the repository root:
+    python -m benchmarks.bench_columnar_analytics --sizes 1000 100000 1000000
+"""
+from datetime import datetime, timedelta
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from backend.analytics_service import AnalyticsService
+from backend.columnar_analytics import SessionColumns
+from backend.database import Base
+from backend.models import Student, StudySession
+
+def seed(db, sessions: int, now: datetime, rng: random.Random):
+    """One student with `sessions` completed sessions over the last three years"""
+    db.add(Student(id=1, name="Bench", email="bench@studybuddy.com", hashed_password="x"))
+    db.commit()
+    for start in range(0, sessions, 50000):
+        db.execute(insert(StudySession), [{
+            "student_id": 1,
+            "start_time": now - timedelta(seconds=rng.randint(0, 3 * 365 * 24 * 3600)),
+            "duration_minutes": rng.randint(10, 70),
+            "focus_score": rng.uniform(40, 100),
+            "distractions_count": rng.randint(0, 6),
+            "completed": True
+        } for _ in range(min(50000, sessions - start))])
+    db.commit()
+
+def loops(rows, now: datetime):
+    """Row-at-a-time aggregation, as the helpers did over ORM objects"""
+    week_ago = now - timedelta(days=7)
+    hour_scores, bucket_scores, weekday_minutes = {}, {}, {}
+    total_minutes, focus_sum, this_week = 0, 0.0, 0
+    study_dates = set()
+    for _, start_time, minutes, focus, _ in rows:
+        hour_scores.setdefault(start_time.hour, []).append(focus)
+        bucket = 15 if minutes < 20 else 25 if minutes < 30 else 35 if minutes < 40 else 45 if minutes < 50 else 60
+        bucket_scores.setdefault(bucket, []).append(focus)
+        total_minutes += minutes
+        focus_sum += focus
+        study_dates.add(start_time.date())
+        if start_time >= week_ago:
+            this_week += 1
+            weekday_minutes[start_time.weekday()] = weekday_minutes.get(start_time.weekday(), 0) + minutes
+    hour_averages = {hour: sum(v) / len(v) for hour, v in hour_scores.items()}
+    bucket_averages = {bucket: sum(v) / len(v) for bucket, v in bucket_scores.items() if len(v) >= 2}
+    streak, day = 0, now.date()
+    while day in study_dates:
+        streak += 1
+        day -= timedelta(days=1)
+    return (total_minutes, focus_sum / len(rows), this_week, streak,
+            max(hour_averages, key=hour_averages.get), max(bucket_averages, key=bucket_averages.get), weekday_minutes)
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+def run(size: int, repeat: int, rng: random.Random):
+    now = datetime.utcnow()
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, size, now, rng)
+
+    rollup_service = AnalyticsService("rollup")
+    columnar_service = AnalyticsService("columnar")
+    rollup_service.build_snapshot(db, 1, now)  # Backfills the rollups once
+
+    load_ms, columns = timed(lambda: SessionColumns.load(db, 1), 1)
+    rows = list(zip(columns.ids.tolist(), columns.start_us.astype("datetime64[us]").tolist(),
+                    columns.duration.tolist(), columns.focus.tolist(), columns.distractions.tolist()))
+    loops_ms, _ = timed(lambda: loops(rows, now), repeat)
+    columnar_ms, columnar_snapshot = timed(lambda: columnar_service.build_columnar_snapshot(columns, 1, now), repeat)
+    rollup_ms, rollup_snapshot = timed(lambda: rollup_service.build_snapshot(db, 1, now), repeat)
+    db.close()
+    engine.dispose()
+    os.remove(path)
+
+    same = "identical" if columnar_snapshot == rollup_snapshot else "DIFFERENT"
+    print(f"{size:>8}  loops {loops_ms:9.1f} ms  columnar {columnar_ms:8.2f} ms (+ load {load_ms:8.1f} ms)  "
+          f"rollup {rollup_ms:7.2f} ms  snapshots {same}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs per measurement")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    np.random.seed(0)
+    for size in args.sizes:
+        run(size, args.repeat, rng)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark FocusMetric ingestion throughput
+Compares one ORM insert + commit per data point (the /focus-metric path)
+with FocusMetricBuffer, which writes batches with a single executemany.
+
+Run from the repository root:
+    python -m benchmarks.bench_metric_ingestion --rows 20000
+"""
+from datetime import datetime
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base
+from backend.models import FocusMetric
+from backend.metric_buffer import FocusMetricBuffer
+
+def fresh_session_factory():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+def per_row_commit(session_factory, rows: int):
+    db = session_factory()
+    for i in range(rows):
+        db.add(FocusMetric(session_id=1, focus_score=i % 100, timestamp=datetime.utcnow()))
+        db.commit()
+    db.close()
+
+def buffered(session_factory, rows: int, batch: int):
+    buffer = FocusMetricBuffer(session_factory, max_rows=500)
+    # Clients post `batch` points per request
+    for start in range(0, rows, batch):
+        buffer.add([
+            {"session_id": 1, "focus_score": i % 100, "timestamp": datetime.utcnow(),
+             "emotion_state": None, "distraction_type": None}
+            for i in range(start, min(start + batch, rows))
+        ])
+    buffer.stop()
+    return buffer.metrics()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=50, help="data points per bulk request")
+    args = parser.parse_args()
+
+    # Per-row commits are slow; measure them on a smaller sample
+    sample = min(args.rows, 2000)
+    start = time.perf_counter()
+    per_row_commit(fresh_session_factory(), sample)
+    per_row_rate = sample / (time.perf_counter() - start)
+    print(f"per-row commit   {per_row_rate:10.0f} rows/s  ({sample} rows)")
+
+    start = time.perf_counter()
+    metrics = buffered(fresh_session_factory(), args.rows, args.batch)
+    buffered_rate = args.rows / (time.perf_counter() - start)
+    print(f"buffered bulk    {buffered_rate:10.0f} rows/s  ({args.rows} rows, "
+          f"{metrics['flushes']} flushes, avg batch {metrics['avg_batch_size']})")
+    print(f"\nSpeed-up: {buffered_rate / per_row_rate:.1f}x")
+
+if __name__ == "__main__":
+    main()
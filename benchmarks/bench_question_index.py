@@ -0,0 +1,83 @@
+"""
+Benchmark the duplicate-question vector index at increasing corpus sizes
+Builds a VectorIndex of synthetic questions (random words from a fixed
+vocabulary) in a scratch directory for each --sizes entry, then measures
+incremental add latency, search latency and top-1 recall for near
+duplicates (a stored question with words dropped and replaced). Also
+prints the on-disk size; search reads the memory-mapped vectors in chunks
+so resident memory does not grow with the index.
+
+Run from the repository root:
+    python -m benchmarks.bench_question_index --sizes 10000 100000 500000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from backend.vector_index import VectorIndex
+
+def make_vocabulary(size: int, rng: random.Random):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+def make_question(vocabulary, rng: random.Random) -> str:
+    return " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 20)))
+
+def near_duplicate(question: str, vocabulary, rng: random.Random) -> str:
+    words = question.split()
+    for _ in range(max(1, len(words) // 8)):
+        words.pop(rng.randrange(len(words)))
+    words[rng.randrange(len(words))] = rng.choice(vocabulary)
+    return " ".join(words)
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def run(size: int, queries: int, vocabulary, rng: random.Random):
+    # Large indexes take hundreds of MiB, so do not leave them behind
+    with tempfile.TemporaryDirectory() as path:
+        measure(VectorIndex(path), size, queries, vocabulary, rng)
+
+def measure(index: VectorIndex, size: int, queries: int, vocabulary, rng: random.Random):
+    questions = [make_question(vocabulary, rng) for _ in range(size)]
+
+    started = time.perf_counter()
+    index.rebuild(enumerate(questions))
+    build = time.perf_counter() - started
+
+    adds = []
+    for i in range(200):
+        started = time.perf_counter()
+        index.add(size + i, make_question(vocabulary, rng))
+        adds.append(time.perf_counter() - started)
+
+    searches, hits = [], 0
+    for _ in range(queries):
+        target = rng.randrange(size)
+        started = time.perf_counter()
+        matches = index.search(near_duplicate(questions[target], vocabulary, rng), k=5)
+        searches.append(time.perf_counter() - started)
+        hits += bool(matches) and matches[0][0] == target
+
+    disk = sum(os.path.getsize(os.path.join(index.path, name)) for name in os.listdir(index.path))
+    print(f"{size:>8}  build {size / build:8.0f}/s  add p50 {percentile(adds, 0.5) * 1000:5.2f} ms  "
+          f"search p50 {percentile(searches, 0.5) * 1000:6.2f} ms  p99 {percentile(searches, 0.99) * 1000:6.2f} ms  "
+          f"top-1 recall {hits / queries:.3f}  disk {disk / 2 ** 20:6.1f} MiB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    for size in args.sizes:
+        run(size, args.queries, vocabulary, rng)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark GET /questions/ page latency by depth, OFFSET vs keyset cursor
+Seeds --questions questions (with answers) in a scratch database, then
+fetches pages of --limit rows starting at increasing depths, once with
+`skip` and once with the `cursor` of the row just before that depth.
+OFFSET reads and throws away every skipped row, so it slows down with
+depth; the cursor seeks the (created_at, id) index and stays flat. Also
+reports how many SELECTs a page costs (answers are loaded in one batch).
+
+Run from the repository root:
+    python -m benchmarks.bench_question_pages --questions 100000 --limit 50
+"""
+from datetime import datetime, timedelta
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# The app opens ./studybuddy_v2.db, so give it an empty scratch directory
+sys.path.insert(0, os.getcwd())
+os.chdir(tempfile.mkdtemp())
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+
+from backend.database import SessionLocal, async_engine, prepare_database
+from backend.main import app
+from backend.models import Answer, Question, Student
+from backend.pagination import encode_cursor
+
+def seed(questions: int):
+    db = SessionLocal()
+    db.add(Student(id=1, name="Bench", email="bench@studybuddy.com", hashed_password="x"))
+    start = datetime.utcnow() - timedelta(days=365)
+    db.execute(insert(Question), [{
+        "title": f"Question {i}", "content": "How does this work?", "student_id": 1,
+        "created_at": start + timedelta(seconds=i * 30)
+    } for i in range(questions)])
+    db.execute(insert(Answer), [{
+        "content": "Like this.", "question_id": question_id, "student_id": 1,
+        "created_at": start + timedelta(seconds=question_id * 30 + 60)
+    } for question_id in range(1, questions + 1) for _ in range(random.randint(0, 3))])
+    db.commit()
+    db.close()
+
+def cursor_before(depth: int) -> str:
+    if depth == 0:
+        return None
+    db = SessionLocal()
+    row = db.execute(
+        select(Question.created_at, Question.id).order_by(Question.created_at, Question.id).offset(depth - 1).limit(1)
+    ).one()
+    db.close()
+    return encode_cursor(row.created_at, row.id)
+
+def timed(client, path: str, params: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path, params=params)
+        best = min(best, time.perf_counter() - started)
+        assert response.status_code == 200
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=50, help="rows per page")
+    parser.add_argument("--repeat", type=int, default=5, help="best of N requests per measurement")
+    args = parser.parse_args()
+
+    prepare_database()
+    seed(args.questions)
+    depths = [0, args.questions // 100, args.questions // 10, args.questions // 2, args.questions - args.limit]
+
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *rest: statements.append(statement))
+
+    with TestClient(app) as client:
+        print(f"{'depth':>8}  {'skip':>9}  {'cursor':>9}  {'summary':>9}")
+        for depth in depths:
+            cursor = cursor_before(depth)
+            cursor_params = {"limit": args.limit, **({"cursor": cursor} if cursor else {})}
+            offset_ms = timed(client, "/questions/", {"limit": args.limit, "skip": depth}, args.repeat)
+            cursor_ms = timed(client, "/questions/", cursor_params, args.repeat)
+            summary_ms = timed(client, "/questions/summary", cursor_params, args.repeat)
+            print(f"{depth:>8}  {offset_ms:>7.1f}ms  {cursor_ms:>7.1f}ms  {summary_ms:>7.1f}ms")
+
+        statements.clear()
+        client.get("/questions/", params={"limit": args.limit})
+        selects = sum(1 for s in statements if s.lstrip().upper().startswith("SELECT"))
+        print(f"SELECTs for one page of {args.limit} questions with answers: {selects}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark concurrent reads and writes under each SQLITE_PROFILE
+Writer threads insert focus metrics in small committed batches (like the
+metric buffer and session checkpoints) while reader threads run the
+/stats snapshot queries, all against one file database for --seconds.
+Reports write and read throughput, read latency and "database is locked"
+errors for the rollback-journal default and for WAL.
+
+Run from the repository root:
+    python -m benchmarks.bench_sqlite_profile --writers 4 --readers 8 --seconds 5
+"""
+from datetime import datetime, timedelta
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, SQLITE_PROFILES, create_db_engine
+from backend.models import FocusMetric, Student, StudySession
+from backend.analytics_service import AnalyticsService
+
+def fresh_database(profile: str, sessions: int):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}", profile=profile)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+
+    db = session_factory()
+    db.add(Student(id=1, name="Bench", email="bench@studybuddy.com", hashed_password="x"))
+    now = datetime.utcnow()
+    db.execute(insert(StudySession), [{
+        "student_id": 1,
+        "start_time": now - timedelta(minutes=random.randint(0, 60 * 24 * 90)),
+        "duration_minutes": random.randint(10, 70),
+        "focus_score": random.uniform(40, 100),
+        "distractions_count": random.randint(0, 6),
+        "completed": True
+    } for _ in range(sessions)])
+    db.commit()
+    db.close()
+    return engine, session_factory
+
+def run(profile: str, writers: int, readers: int, seconds: float, batch: int, sessions: int):
+    engine, session_factory = fresh_database(profile, sessions)
+    service = AnalyticsService()
+    # Build the rollups once so readers measure the steady-state path
+    db = session_factory()
+    service.calculate_user_stats(db, 1)
+    db.close()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    totals = {"rows": 0, "reads": 0, "locked": 0}
+    latencies = []
+
+    def writer():
+        db = session_factory()
+        while not stop.is_set():
+            rows = [{"session_id": 1, "timestamp": datetime.utcnow(), "focus_score": random.uniform(0, 100)}
+                    for _ in range(batch)]
+            try:
+                db.execute(insert(FocusMetric), rows)
+                db.commit()
+                with lock:
+                    totals["rows"] += batch
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    totals["locked"] += 1
+        db.close()
+
+    def reader():
+        db = session_factory()
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                service.calculate_user_stats(db, 1)
+                db.rollback()  # End the read transaction like a request would
+                elapsed = time.perf_counter() - started
+                with lock:
+                    totals["reads"] += 1
+                    latencies.append(elapsed)
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    totals["locked"] += 1
+        db.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    print(f"{profile:8s} writes {totals['rows'] / seconds:9.0f} rows/s   reads {totals['reads'] / seconds:7.1f}/s   "
+          f"read p50 {p50:6.1f} ms  p99 {p99:7.1f} ms   locked errors {totals['locked']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=10, help="rows per committed write")
+    parser.add_argument("--sessions", type=int, default=5000, help="completed sessions seeded for the reader queries")
+    args = parser.parse_args()
+
+    for profile in SQLITE_PROFILES:
+        run(profile, args.writers, args.readers, args.seconds, args.batch, args.sessions)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Check the PostgreSQL mode against a scratch database
+Builds the schema (monthly partitions for study_sessions and focus_metrics),
+drives the session and metric endpoints, verifies rows land in the current
+month's partitions, and compares COPY ingestion with executemany INSERT.
+
+Needs a disposable database and the drivers (psycopg[binary] and asyncpg;
+use a postgresql+psycopg2:// URL for psycopg2-binary):
+    python -m benchmarks.check_postgres --url postgresql://postgres@localhost/studybuddy_check --rows 20000
+"""
+from datetime import date, datetime
+import argparse
+import os
+import sys
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=os.environ.get("DATABASE_URL"), help="postgresql:// URL of a scratch database")
+    parser.add_argument("--rows", type=int, default=20000, help="focus metrics to ingest")
+    args = parser.parse_args()
+    if not args.url or not args.url.startswith("postgresql"):
+        sys.exit("Pass --url postgresql://... (or set DATABASE_URL) for a scratch database")
+
+    # Must be set before backend.database builds its engines
+    os.environ["DATABASE_URL"] = args.url
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert, text
+
+    from backend.database import SessionLocal, engine, prepare_database
+    from backend.main import app
+    from backend.metric_buffer import COPY_COLUMNS, FocusMetricBuffer
+    from backend.models import FocusMetric
+    from backend.postgres import PARTITIONED_TABLES
+
+    failures = []
+    def check(condition: bool, message: str):
+        print(f"[{'ok' if condition else 'FAIL'}] {message}")
+        if not condition:
+            failures.append(message)
+
+    prepare_database()
+    month = date.today()
+    with engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            partitioned = conn.execute(text(
+                "SELECT count(*) FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :t"
+            ), {"t": table}).scalar()
+            check(partitioned == 1, f"{table} is a partitioned table")
+            partitions = conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :t ORDER BY 1"
+            ), {"t": table}).scalars().all()
+            check(f"{table}_y{month.year}m{month.month:02d}" in partitions, f"{table} partitions: {', '.join(partitions)}")
+
+    with TestClient(app) as client:
+        email = f"pg-check-{time.time_ns()}@studybuddy.com"
+        student_id = client.post("/students/", json={"name": "PG", "email": email, "password": "x"}).json()["id"]
+        session_id = client.post("/sessions/start", json={"student_id": student_id}).json()["session_id"]
+        response = client.post(f"/sessions/{session_id}/focus-metrics", json={
+            "metrics": [{"focus_score": i % 100, "emotion_state": None if i % 3 else ""} for i in range(500)],
+            "durable": True
+        })
+        check(response.status_code == 200, "bulk focus metrics accepted")
+        check(client.post(f"/sessions/{session_id}/complete", json={"focus_score": 80, "duration_minutes": 30}).status_code == 200,
+              "session completed")
+        for path in ("stats", "insights", "weekly-data", "sessions"):
+            check(client.get(f"/students/{student_id}/{path}").status_code == 200, f"/students/{{id}}/{path}")
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT tableoid::regclass::text, count(*), count(*) FILTER (WHERE emotion_state = ''), "
+            "count(*) FILTER (WHERE emotion_state IS NULL) FROM focus_metrics WHERE session_id = :s GROUP BY 1"
+        ), {"s": session_id}).all()
+        check(len(rows) == 1 and rows[0][0] == f"focus_metrics_y{month.year}m{month.month:02d}" and rows[0][1] == 500,
+              f"metrics landed in this month's partition: {rows}")
+        check(bool(rows) and rows[0][2] == 167 and rows[0][3] == 333, "COPY keeps '' and NULL apart")
+        partition = conn.execute(text("SELECT tableoid::regclass::text FROM study_sessions WHERE id = :s"), {"s": session_id}).scalar()
+        check(partition == f"study_sessions_y{month.year}m{month.month:02d}", f"session landed in {partition}")
+
+    batch = [{"session_id": session_id, "timestamp": datetime.utcnow(), "focus_score": i % 100,
+              "emotion_state": None, "distraction_type": None} for i in range(args.rows)]
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    db.execute(insert(FocusMetric), batch)
+    db.commit()
+    db.close()
+    insert_rate = args.rows / (time.perf_counter() - started)
+
+    buffer = FocusMetricBuffer(SessionLocal, max_rows=args.rows)
+    started = time.perf_counter()
+    buffer.add(batch)
+    buffer.flush()
+    copy_rate = args.rows / (time.perf_counter() - started)
+    buffer.stop()
+
+    print(f"executemany INSERT {insert_rate:10.0f} rows/s")
+    print(f"COPY               {copy_rate:10.0f} rows/s  ({', '.join(COPY_COLUMNS)})")
+
+    print(f"{len(failures)} checks failed")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ import json
 
 # Direct SQLite connection for simplicity
 DB_PATH = "studybuddy_v2.db"
+# The text format SQLAlchemy stores DateTime in; SQLite compares these as text
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
 
 def seed_database():
     conn = sqlite3.connect(DB_PATH)
@@ -25,6 +27,11 @@ def seed_database():
             cursor.execute("DELETE FROM focus_metrics")
             cursor.execute("DELETE FROM study_sessions")
             cursor.execute("DELETE FROM study_patterns WHERE student_id = 1")
+            # Rollups are rebuilt from the new sessions on the next stats request.
+            # The table only exists once the current server has started on this database.
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_study_rollups'")
+            if cursor.fetchone():
+                cursor.execute("DELETE FROM daily_study_rollups WHERE student_id = 1")
             conn.commit()
         else:
             # Create a test student
@@ -82,8 +89,8 @@ def seed_database():
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     1,
-                    session_date.isoformat(),
-                    end_time.isoformat(),
+                    session_date.strftime(DATETIME_FORMAT),
+                    end_time.strftime(DATETIME_FORMAT),
                     session_type,
                     random.choice(subjects) if session_type == "focus" else None,
                     duration,
@@ -107,7 +114,7 @@ def seed_database():
                         VALUES (?, ?, ?, ?, ?)
                     """, (
                         session_id,
-                        metric_time.isoformat(),
+                        metric_time.strftime(DATETIME_FORMAT),
                         random.uniform(max(0, focus_score - 15), min(100, focus_score + 15)),
                         random.choice(emotion_states),
                         random.choice(distraction_types)
@@ -184,7 +191,7 @@ def seed_database():
                 q_data["title"],
                 q_data["content"],
                 1,
-                question_time.isoformat()
+                question_time.strftime(DATETIME_FORMAT)
             ))
             
             question_id = cursor.lastrowid
@@ -206,7 +213,7 @@ def seed_database():
                     answers_data[i],
                     question_id,
                     1,
-                    answer_time.isoformat()
+                    answer_time.strftime(DATETIME_FORMAT)
                 ))
         
         conn.commit()
@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+# The app reads these on import; keep it off the checked-in database
+_app_dir = tempfile.mkdtemp(prefix="studybuddy-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_app_dir}/studybuddy.db")
+os.environ.setdefault("QUESTION_INDEX_DIR", os.path.join(_app_dir, "question_index"))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """sessionmaker over a fresh SQLite file with every table created"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+@pytest.fixture(scope="session")
+def client():
+    """The app, started through its lifespan, on a throwaway database"""
+    from backend.main import app
+    with TestClient(app) as client:
+        yield client
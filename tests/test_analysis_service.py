@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pytest
+
+from backend import analysis_service
+from backend.analysis_service import AnalysisService
+
+@pytest.fixture(autouse=True)
+def midday(monkeypatch):
+    """Outside the late-night window, so every rule can produce advice"""
+    class Midday(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2026, 1, 5, 12, 0)
+    monkeypatch.setattr(analysis_service, "datetime", Midday)
+
+def test_batch_matches_single_session_advice():
+    service = AnalysisService()
+    cases = [
+        (focus, minutes, goal)
+        for focus in (0.1, 0.39, 0.4, 0.9)
+        for minutes in (0, 29, 30, 50, 90)
+        for goal in (None, 25, 45)
+    ]
+    single = [service.analyze_session(focus, minutes, {"study_duration_minutes": goal}) for focus, minutes, goal in cases]
+    batch = service.analyze_batch(*zip(*cases))
+    assert batch == single
+    assert {advice["title"] for advice in single if advice} == {"Low Focus Detected", "Time for a Break?"}
+
+def test_missing_preference_uses_the_default_duration():
+    service = AnalysisService()
+    assert service.analyze_session(0.9, 30, {"study_duration_minutes": None}) == \
+        service.analyze_session(0.9, 30, {}) == \
+        service.analyze_session(0.9, 30, {"study_duration_minutes": 25})
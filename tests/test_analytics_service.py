@@ -0,0 +1,113 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.analytics_service import AnalyticsService
+from backend.models import Student, StudySession
+
+NOW = datetime(2026, 10, 18, 12, 0)
+
+# The per-session loops AnalyticsService used before rollups and the
+# columnar engine; both engines must reproduce them exactly.
+# Sessions are (id, start_time, duration_minutes, focus_score).
+
+def reference_stats(sessions):
+    week_ago, two_weeks_ago = NOW - timedelta(days=7), NOW - timedelta(days=14)
+    avg_focus = sum(s[3] for s in sessions) / len(sessions)
+    this_week = [s for s in sessions if s[1] >= week_ago]
+    last_week = [s for s in sessions if two_weeks_ago <= s[1] < week_ago]
+    last_week_avg_focus = sum(s[3] for s in last_week) / len(last_week) if last_week else 0
+    improvement = ((avg_focus - last_week_avg_focus) / last_week_avg_focus * 100) if last_week_avg_focus > 0 else 0
+    return {
+        "total_study_time_hours": round(sum(s[2] for s in sessions) / 60, 1),
+        "this_week_hours": round(sum(s[2] for s in this_week) / 60, 1),
+        "average_focus_score": round(avg_focus, 1),
+        "current_streak_days": reference_streak(sessions),
+        "total_sessions": len(sessions),
+        "this_week_sessions": len(this_week),
+        "focus_improvement_percent": round(improvement, 1)
+    }
+
+def reference_weekly_data(sessions):
+    days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    day_data = {day: {"hours": 0, "sessions": 0} for day in days}
+    for s in sessions:
+        if s[1] >= NOW - timedelta(days=7):
+            day_data[days[s[1].weekday()]]["hours"] += s[2] / 60
+            day_data[days[s[1].weekday()]]["sessions"] += 1
+    return [{"day": day, "hours": round(data["hours"], 1), "sessions": data["sessions"]} for day, data in day_data.items()]
+
+def reference_streak(sessions):
+    study_dates = {s[1].date() for s in sessions}
+    streak, current_date = 0, NOW.date()
+    while current_date in study_dates:
+        streak += 1
+        current_date -= timedelta(days=1)
+    return streak
+
+def reference_best_hour(sessions):
+    hour_scores = {}
+    for s in sessions:
+        hour_scores.setdefault(s[1].hour, []).append(s[3])
+    averages = {hour: sum(scores) / len(scores) for hour, scores in hour_scores.items()}
+    return max(averages, key=averages.get) if len(averages) >= 2 else None
+
+def reference_optimal_length(sessions):
+    buckets = {15: [], 25: [], 35: [], 45: [], 60: []}
+    for s in sessions:
+        duration = s[2]
+        key = 15 if duration < 20 else 25 if duration < 30 else 35 if duration < 40 else 45 if duration < 50 else 60
+        buckets[key].append(s[3])
+    averages = {length: sum(scores) / len(scores) for length, scores in buckets.items() if len(scores) >= 2}
+    return max(averages, key=averages.get) if averages else None
+
+def seed_sessions(db, seed, count=300):
+    rng = random.Random(seed)
+    db.add(Student(id=1, name="Test", email="test@studybuddy.com", hashed_password="x"))
+    sessions = []
+    for session_id in range(1, count + 1):
+        start = NOW - timedelta(minutes=rng.randint(0, 60 * 24 * 40))
+        duration, focus = rng.randint(5, 90), round(rng.uniform(0, 100), 1)
+        sessions.append((session_id, start, duration, focus))
+        db.add(StudySession(id=session_id, student_id=1, start_time=start, duration_minutes=duration,
+                            focus_score=focus, distractions_count=rng.randint(0, 5), completed=True))
+    db.commit()
+    return sessions
+
+# Seed 30 lands an average on a rounding boundary (50.85)
+@pytest.mark.parametrize("seed", range(40))
+def test_engines_match_the_per_session_loops(session_factory, seed):
+    with session_factory() as db:
+        sessions = seed_sessions(db, seed)
+        recent = [s for s in sessions if s[1] >= NOW - timedelta(days=14)]
+        # JSON text, so 0 and 0.0 count as different
+        expected = json.dumps((reference_stats(sessions), reference_weekly_data(sessions),
+                               reference_best_hour(recent), reference_optimal_length(recent),
+                               reference_best_hour(sessions), reference_optimal_length(sessions)))
+
+        rollup = AnalyticsService("rollup")
+        rollup.rebuild_rollups(db, 1)
+        db.commit()
+        for service in (rollup, AnalyticsService("columnar")):
+            snapshot = service.build_snapshot(db, 1, NOW)
+            assert json.dumps((snapshot.stats, snapshot.weekly_data, snapshot.best_hour_recent, snapshot.optimal_length_recent,
+                               snapshot.best_hour_overall, snapshot.optimal_length_overall)) == expected, service.engine
+
+@pytest.mark.parametrize("engine", ["rollup", "columnar"])
+def test_weekly_data_of_a_quiet_week(session_factory, engine):
+    with session_factory() as db:
+        db.add(Student(id=1, name="Test", email="test@studybuddy.com", hashed_password="x"))
+        # 3 + 6 minutes on one day: 3 / 60 + 6 / 60 rounds to 0.2, 9 / 60 to 0.1
+        for session_id, minutes in ((1, 3), (2, 6)):
+            db.add(StudySession(id=session_id, student_id=1, start_time=NOW - timedelta(hours=session_id),
+                                duration_minutes=minutes, focus_score=50.0, completed=True))
+        db.commit()
+        service = AnalyticsService(engine)
+        service.rebuild_rollups(db, 1)
+        weekly = service.build_snapshot(db, 1, NOW).weekly_data
+
+    expected = [{"day": day, "hours": 0, "sessions": 0} for day in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]]
+    expected[NOW.weekday()] = {"day": "Sun", "hours": 0.2, "sessions": 2}
+    assert json.dumps(weekly) == json.dumps(expected)
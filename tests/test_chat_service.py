@@ -0,0 +1,175 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.chat_service import ChatService
+from backend.circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker
+from backend.community_retriever import CommunityRetriever
+from backend.response_cache import ResponseCache
+
+OPENAI_KEY = "sk-test-0123456789"
+GEMINI_KEY = "AIzaSy-test-0123456789"
+
+class StubProvider(ThreadingHTTPServer):
+    """Local stand-in for the OpenAI and Gemini HTTP APIs"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.requests = []
+        self.delay_seconds = 0.0
+        self.openai_answer = "Stub OpenAI answer"
+        self.gemini_candidates = [{"content": {"parts": [{"text": "Stub Gemini answer"}]}}]
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path))
+        if self.path.startswith("/gemini/models?"):
+            self._json({"models": [{"name": "models/gemini-1.5-flash", "supportedGenerationMethods": ["generateContent"]}]})
+        else:
+            self._json({}, 404)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests.append(("POST", self.path))
+        time.sleep(self.server.delay_seconds)
+        if self.path == "/openai/chat/completions":
+            if self.headers.get("Authorization") != f"Bearer {OPENAI_KEY}":
+                self._json({"error": "invalid api key"}, 401)
+            else:
+                self._json({"choices": [{"message": {"content": self.server.openai_answer}}]})
+        elif ":generateContent" in self.path:
+            self._json({"candidates": self.server.gemini_candidates})
+        else:
+            self._json({}, 404)
+
+    def _json(self, body, status: int = 200):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub():
+    server = StubProvider()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def chat(stub, monkeypatch):
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{stub.url}/openai")
+    monkeypatch.setenv("GEMINI_BASE_URL", f"{stub.url}/gemini")
+    monkeypatch.delenv("CHAT_CACHE_DB", raising=False)
+    return ChatService()
+
+def provider_calls(stub, marker: str) -> int:
+    return sum(1 for method, path in stub.requests if method == "POST" and marker in path)
+
+@pytest.mark.anyio
+async def test_cached_answer_skips_the_provider(chat, stub):
+    assert await chat.get_response("How do I stop procrastinating?", OPENAI_KEY) == "Stub OpenAI answer"
+    # Same question after normalisation: served from the cache
+    assert await chat.get_response("  how do I stop   procrastinating ", OPENAI_KEY) == "Stub OpenAI answer"
+    assert provider_calls(stub, "/chat/completions") == 1
+    assert chat.cache.stats()["hits"] == 1
+    await chat.aclose()
+
+@pytest.mark.anyio
+async def test_empty_gemini_completion_is_not_cached(chat, stub):
+    stub.gemini_candidates = []
+    first = await chat.get_response("How do I stop procrastinating?", GEMINI_KEY)
+    assert first != "No response content from Gemini."
+    assert first == chat._local_response("How do I stop procrastinating?")
+
+    stub.gemini_candidates = [{"content": {"parts": [{"text": "Stub Gemini answer"}]}}]
+    assert await chat.get_response("How do I stop procrastinating?", GEMINI_KEY) == "Stub Gemini answer"
+    assert provider_calls(stub, ":generateContent") == 2
+    await chat.aclose()
+
+@pytest.mark.anyio
+async def test_rejected_key_is_not_cached(chat, stub):
+    response = await chat.get_response("How do I stop procrastinating?", "sk-wrong-0123456789")
+    assert response == chat._local_response("How do I stop procrastinating?")
+    assert await chat.get_response("How do I stop procrastinating?", OPENAI_KEY) == "Stub OpenAI answer"
+    assert provider_calls(stub, "/chat/completions") == 2
+    await chat.aclose()
+
+@pytest.mark.anyio
+async def test_persistent_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "chat_cache.db")
+    cache = ResponseCache(db_path=path)
+    await cache.aput("What is spaced repetition?", "openai", "gpt-3.5-turbo", "Review at increasing intervals.")
+
+    restarted = ResponseCache(db_path=path)
+    assert await restarted.aget("what is spaced repetition", "openai", "gpt-3.5-turbo") == "Review at increasing intervals."
+    assert restarted.stats()["persistent_hits"] == 1
+    assert await restarted.aget("what is spaced repetition", "gemini", "auto") is None
+
+def test_expired_rows_are_swept_periodically(tmp_path):
+    cache = ResponseCache(ttl_seconds=-1, db_path=str(tmp_path / "chat_cache.db"))
+    count = lambda: cache.store._conn.execute("SELECT COUNT(*) FROM chat_responses").fetchone()[0]
+    # The first put sweeps (its own row is already expired); the next sweep
+    # waits for sweep_seconds instead of running on every put
+    cache.put("first", "openai", "m", "expired")
+    assert count() == 0
+    cache.put("second", "openai", "m", "expired")
+    assert count() == 1
+    cache.store.sweep_seconds = 0
+    cache.put("third", "openai", "m", "expired")
+    assert count() == 0
+
+@pytest.mark.anyio
+async def test_rejected_key_does_not_close_a_half_open_breaker(chat, stub):
+    chat.breakers["openai"] = breaker = CircuitBreaker("openai", failure_threshold=1, reset_timeout_seconds=0)
+    breaker.record_failure(0.1)
+    await chat.get_response("How do I stop procrastinating?", "sk-wrong-0123456789")
+    assert breaker.state == HALF_OPEN
+    assert breaker.metrics()["client_errors"] == 1
+
+    # The next real call still gets to probe, and its success closes the breaker
+    assert await chat.get_response("How do I stop procrastinating?", OPENAI_KEY) == "Stub OpenAI answer"
+    assert breaker.state == CLOSED
+    await chat.aclose()
+
+@pytest.mark.anyio
+async def test_concurrent_callers_with_different_keys_do_not_share_a_call(chat, stub):
+    stub.delay_seconds = 0.2
+    rejected, answered = await asyncio.gather(
+        chat.get_response("How do I stop procrastinating?", "sk-wrong-0123456789"),
+        chat.get_response("How do I stop procrastinating?", OPENAI_KEY)
+    )
+    assert rejected == chat._local_response("How do I stop procrastinating?")
+    assert answered == "Stub OpenAI answer"
+    assert provider_calls(stub, "/chat/completions") == 2
+
+    # Callers with the same key still collapse into one call
+    await asyncio.gather(*(chat.get_response(f"Question {i % 2}", OPENAI_KEY) for i in range(6)))
+    assert provider_calls(stub, "/chat/completions") == 4
+    await chat.aclose()
+
+@pytest.mark.anyio
+async def test_community_answers_are_opt_in(monkeypatch):
+    monkeypatch.delenv("COACH_COMMUNITY_ANSWERS", raising=False)
+    question = "How can I memorise the periodic table quickly?"
+    for enabled, expected in ((None, False), (True, True)):
+        retriever = CommunityRetriever(enabled=enabled)
+        retriever.add_answer(1, question, "", "Community answer")
+        chat = ChatService(retriever=retriever)
+        assert (await chat.get_response(question) == "Community answer") is expected
+        assert retriever.metrics()["enabled"] is expected
+        await chat.aclose()
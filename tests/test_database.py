@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine, inspect, text
+
+from backend.database import prepare_database
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_importing_the_app_leaves_the_database_alone(tmp_path):
+    # A fresh interpreter, since this one has imported backend.main already
+    db_file = tmp_path / "app.db"
+    script = (
+        "import os\n"
+        "from fastapi.testclient import TestClient\n"
+        "from backend.main import app\n"
+        f"assert not os.path.exists({str(db_file)!r}), 'import created the database'\n"
+        "with TestClient(app):\n"
+        "    pass\n"
+    )
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_file}", QUESTION_INDEX_DIR=str(tmp_path / "index"))
+    result = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+    # Startup ran the migrations
+    engine = create_engine(f"sqlite:///{db_file}")
+    assert {"students", "study_sessions", "questions"} <= set(inspect(engine).get_table_names())
+    engine.dispose()
+
+def test_prepare_database_adds_missing_columns(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # study_sessions as created before session_type and subject existed
+        conn.execute(text("CREATE TABLE study_sessions (id INTEGER PRIMARY KEY, student_id INTEGER, start_time DATETIME)"))
+        conn.execute(text("INSERT INTO study_sessions (id, student_id) VALUES (1, 1)"))
+
+    prepare_database(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("study_sessions")}
+    assert {"session_type", "subject"} <= columns
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT session_type FROM study_sessions WHERE id = 1")).scalar() == "focus"
+    engine.dispose()
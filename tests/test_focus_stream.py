@@ -0,0 +1,26 @@
+import json
+from datetime import datetime
+
+import backend.main as main
+from backend.focus_stream import parse_text_frame
+
+def test_oversized_focus_score_is_rejected():
+    assert parse_text_frame('{"focus_score": 1' + "0" * 400 + "}", datetime.utcnow()) is None
+
+def test_socket_opened_before_the_session_starts(client, monkeypatch):
+    monkeypatch.setattr(main, "SESSION_LOOKUP_SECONDS", 0.0)
+    student = client.post("/students/", json={"name": "Early", "email": "early@studybuddy.com", "password": "x"}).json()
+
+    with client.websocket_connect(f"/ws/focus/{student['id']}") as websocket:
+        websocket.send_text(json.dumps({"focus_score": 80}))
+        assert websocket.receive_json()["session_id"] is None
+
+        session_id = client.post("/sessions/start", json={"student_id": student["id"]}).json()["session_id"]
+        websocket.send_text(json.dumps({"focus_score": 70}))
+        reply = websocket.receive_json()
+        assert reply["session_id"] == session_id
+
+        # A frame that does not fit a float is counted, not fatal
+        websocket.send_text('{"focus_score": 1' + "0" * 400 + "}")
+        reply = websocket.receive_json()
+        assert reply["rejected"] == 1 and reply["frames"] == 2
@@ -0,0 +1,119 @@
+"""PostgreSQL mode (backend/postgres.py), run only against a real server.
+
+Point DATABASE_URL at a new, empty database to run these (the rest of the
+suite then runs on PostgreSQL too), e.g.
+    DATABASE_URL=postgresql://postgres@localhost/studybuddy_test python -m pytest tests/test_postgres.py
+"""
+from datetime import date, datetime
+import os
+import time
+
+import pytest
+from sqlalchemy import insert, select, text
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("DATABASE_URL", "").startswith("postgresql"),
+    reason="needs DATABASE_URL=postgresql://... pointing at a disposable database"
+)
+
+# PRIMARY KEY and DEFAULT partitions on partitioned tables arrived in PostgreSQL 11
+MIN_SERVER_VERSION = 110000
+
+@pytest.fixture(scope="module")
+def pg_engine():
+    from backend.database import engine, prepare_database
+    prepare_database(engine)
+    return engine
+
+@pytest.fixture
+def student_id(pg_engine):
+    from backend.models import Student
+    with pg_engine.begin() as conn:
+        return conn.execute(insert(Student).returning(Student.id), {
+            "name": "PG", "email": f"pg-{time.time_ns()}@studybuddy.com", "hashed_password": "x"
+        }).scalar_one()
+
+def this_month(table: str) -> str:
+    today = date.today()
+    return f"{table}_y{today.year}m{today.month:02d}"
+
+def test_server_version_is_supported(pg_engine):
+    with pg_engine.connect() as conn:
+        assert int(conn.execute(text("SHOW server_version_num")).scalar()) >= MIN_SERVER_VERSION
+
+def test_tables_are_partitioned_by_month(pg_engine):
+    from backend.postgres import PARTITIONED_TABLES
+    with pg_engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            partitions = conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :t"
+            ), {"t": table}).scalars().all()
+            assert {f"{table}_default", this_month(table)} <= set(partitions)
+
+def test_identity_columns_work_on_the_partitioned_parent(pg_engine, student_id):
+    from backend.models import FocusMetric, StudySession
+    with pg_engine.begin() as conn:
+        for table in ("study_sessions", "focus_metrics"):
+            identity = conn.execute(text(
+                "SELECT attidentity FROM pg_attribute WHERE attrelid = CAST(:t AS regclass) AND attname = 'id'"
+            ), {"t": table}).scalar()
+            assert identity == "d"
+
+        now = datetime.utcnow()
+        session_ids = conn.execute(insert(StudySession).returning(StudySession.id), [
+            {"student_id": student_id, "start_time": now} for _ in range(3)
+        ]).scalars().all()
+        metric_ids = conn.execute(insert(FocusMetric).returning(FocusMetric.id), [
+            {"session_id": session_ids[0], "timestamp": now, "focus_score": 50.0} for _ in range(3)
+        ]).scalars().all()
+        assert None not in session_ids and len(set(session_ids)) == 3
+        assert None not in metric_ids and len(set(metric_ids)) == 3
+
+        partition = conn.execute(text("SELECT tableoid::regclass::text FROM study_sessions WHERE id = :id"),
+                                 {"id": session_ids[0]}).scalar()
+        assert partition == this_month("study_sessions")
+
+def test_ensure_partitions_creates_months_ahead(pg_engine):
+    from backend.postgres import PARTITIONED_TABLES, ensure_partitions
+    ensure_partitions(pg_engine, months_back=0, months_ahead=1, today=date(2031, 12, 5))
+    created = [f"{table}_y{year}m{month:02d}" for table in PARTITIONED_TABLES for year, month in ((2031, 12), (2032, 1))]
+    try:
+        with pg_engine.connect() as conn:
+            existing = conn.execute(text("SELECT relname FROM pg_class WHERE relname = ANY(:names)"),
+                                    {"names": created}).scalars().all()
+        assert sorted(existing) == sorted(created)
+    finally:
+        with pg_engine.begin() as conn:
+            for name in created:
+                conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+def test_metric_buffer_copies_rows(pg_engine, student_id):
+    from backend.database import SessionLocal
+    from backend.metric_buffer import FocusMetricBuffer
+    from backend.models import FocusMetric, StudySession
+
+    with pg_engine.begin() as conn:
+        session_id = conn.execute(insert(StudySession).returning(StudySession.id),
+                                  {"student_id": student_id, "start_time": datetime.utcnow()}).scalar_one()
+
+    buffer = FocusMetricBuffer(SessionLocal, max_rows=1000)
+    buffer.add([{"session_id": session_id, "timestamp": datetime.utcnow(), "focus_score": float(i),
+                 "emotion_state": "" if i % 2 else None, "distraction_type": None} for i in range(100)])
+    buffer.stop()  # flushes whatever the background thread has not written yet
+
+    with pg_engine.connect() as conn:
+        emotions = conn.execute(select(FocusMetric.emotion_state).where(FocusMetric.session_id == session_id)).scalars().all()
+    assert emotions.count("") == 50 and emotions.count(None) == 50
+
+def test_session_endpoints(client):
+    email = f"pg-api-{time.time_ns()}@studybuddy.com"
+    student = client.post("/students/", json={"name": "PG", "email": email, "password": "x"}).json()
+    session_id = client.post("/sessions/start", json={"student_id": student["id"]}).json()["session_id"]
+    response = client.post(f"/sessions/{session_id}/focus-metrics", json={
+        "metrics": [{"focus_score": 70, "emotion_state": None} for _ in range(20)], "durable": True
+    })
+    assert response.status_code == 200
+    assert client.post(f"/sessions/{session_id}/complete", json={"focus_score": 80, "duration_minutes": 30}).status_code == 200
+    for path in ("stats", "insights", "weekly-data", "sessions"):
+        assert client.get(f"/students/{student['id']}/{path}").status_code == 200
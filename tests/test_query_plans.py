@@ -0,0 +1,87 @@
+"""Every filtered query the API issues must be served by an index.
+
+The API is driven against the test database while every SELECT/UPDATE/
+DELETE is recorded, then EXPLAIN QUERY PLAN is run on each. Unfiltered
+listings (e.g. GET /questions/) scan by design and are not checked.
+"""
+from datetime import datetime, timedelta
+import re
+
+import pytest
+from sqlalchemy import event
+
+from backend.database import async_engine, engine
+
+# A virtual table (FTS5) with a non-empty index string is using a constraint
+TABLE_SCAN = re.compile(r"\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX| VIRTUAL TABLE INDEX \d+:\S)")
+WHERE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+
+@pytest.fixture
+def statements():
+    recorded = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            return
+        recorded.setdefault(statement, parameters)
+
+    # Async routes and the background workers use separate engines
+    targets = [engine, async_engine.sync_engine]
+    for target in targets:
+        event.listen(target, "before_cursor_execute", capture)
+    yield recorded
+    for target in targets:
+        event.remove(target, "before_cursor_execute", capture)
+
+def exercise_api(client):
+    from backend.main import find_active_session_id
+
+    now = datetime.utcnow()
+    student = client.post("/students/", json={"name": "plan", "email": "plan@studybuddy.com", "password": "x"}).json()
+    sid = student["id"]
+    client.get(f"/students/{sid}")
+    client.put(f"/students/{sid}/preferences", json={"study_duration_minutes": 30, "break_duration_minutes": 5, "theme": "dark"})
+    client.get(f"/students/{sid}/preferences")
+    client.post("/analyze", json={"student_id": sid, "focus_score": 70, "current_duration_minutes": 20})
+
+    for day in range(3):
+        session = client.post("/sessions/start", json={"student_id": sid, "session_type": "focus", "subject": "math"}).json()
+        session_id = session["session_id"]
+        client.portal.call(find_active_session_id, sid)
+        client.put(f"/sessions/{session_id}/update", json={"focus_score": 80, "distractions_count": 1})
+        client.post(f"/sessions/{session_id}/focus-metric", json={"session_id": session_id, "focus_score": 75})
+        client.post(f"/sessions/{session_id}/focus-metrics", json={"metrics": [
+            {"focus_score": 60 + i, "timestamp": (now - timedelta(seconds=i)).isoformat()} for i in range(5)
+        ], "durable": True})
+        client.post(f"/sessions/{session_id}/complete", json={"duration_minutes": 25, "focus_score": 82, "distractions_count": 2})
+
+    client.get(f"/students/{sid}/stats")
+    client.get(f"/students/{sid}/insights")
+    client.get(f"/students/{sid}/weekly-data")
+    client.get(f"/students/{sid}/sessions")
+
+    for title in ("Plans?", "Pages?", "Counts?"):
+        question = client.post("/questions/", json={"title": title, "content": "How do indexes work?", "student_id": sid}).json()
+        client.post("/answers/", json={"content": "B-trees", "question_id": question["id"], "student_id": sid})
+    page = client.get("/questions/", params={"limit": 1})
+    client.get("/questions/", params={"limit": 1, "cursor": page.headers["X-Next-Cursor"]})
+    client.get("/questions/summary", params={"limit": 1, "cursor": page.headers["X-Next-Cursor"]})
+    client.get("/questions/search", params={"q": "index"})
+
+@pytest.mark.skipif(engine.dialect.name != "sqlite", reason="reads SQLite's EXPLAIN QUERY PLAN output")
+def test_filtered_queries_use_indexes(client, statements):
+    exercise_api(client)
+    assert statements
+
+    full_scans = []
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for statement, parameters in statements.items():
+            plan = [row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            if WHERE.search(statement) and any(TABLE_SCAN.search(line) for line in plan):
+                full_scans.append(f"{' '.join(statement.split())[:160]}\n    " + "\n    ".join(plan))
+    finally:
+        raw.close()
+
+    assert not full_scans, "statements scanning a whole table:\n" + "\n".join(full_scans)
@@ -0,0 +1,32 @@
+from backend.models import Question, Student
+from backend.vector_index import VectorIndex
+
+def test_fingerprint_survives_reopening(tmp_path):
+    index = VectorIndex(str(tmp_path / "index"))
+    index.rebuild([(1, "How do I revise for exams?"), (2, "Best way to learn vocabulary")])
+    index.add(7, "Pomodoro or deep work?")
+    assert index.fingerprint() == (3, 7, 10)
+    assert VectorIndex(str(tmp_path / "index")).fingerprint() == (3, 7, 10)
+
+def test_restored_database_with_the_same_count_is_reindexed(tmp_path, session_factory, monkeypatch):
+    from backend import main
+
+    with session_factory() as db:
+        db.add(Student(id=1, name="Asker", email="asker@studybuddy.com", hashed_password="x"))
+        db.add_all([Question(id=1, title="How do I revise?", content="", student_id=1),
+                    Question(id=2, title="Flashcards or notes?", content="", student_id=1)])
+        db.commit()
+    monkeypatch.setattr(main, "SessionLocal", session_factory)
+
+    index = VectorIndex(str(tmp_path / "index"))
+    main.sync_question_index(index)
+    assert index.fingerprint() == (2, 2, 3)
+
+    # Same number of questions, different rows: a copy of another database
+    with session_factory() as db:
+        db.query(Question).filter(Question.id == 2).delete()
+        db.add(Question(id=5, title="How to stop procrastinating", content="", student_id=1))
+        db.commit()
+    main.sync_question_index(index)
+    assert index.fingerprint() == (2, 5, 6)
+    assert index.search("stop procrastinating", k=1)[0][0] == 5
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import text
+
+from backend.database import engine, prepare_database
+from backend.pagination import next_cursor
+
+@pytest.fixture(scope="module")
+def questions(client):
+    student = client.post("/students/", json={"name": "Asker", "email": "asker@studybuddy.com", "password": "x"}).json()
+    return [
+        client.post("/questions/", json={"title": f"Question {i}", "content": "How do I revise?", "student_id": student["id"]}).json()
+        for i in range(5)
+    ]
+
+@pytest.mark.parametrize("path", ["/questions/", "/questions/summary", "/questions/search?q=revise"])
+@pytest.mark.parametrize("limit", [0, -1, 10 ** 6])
+def test_out_of_range_limits_are_rejected(client, questions, path, limit):
+    separator = "&" if "?" in path else "?"
+    assert client.get(f"{path}{separator}limit={limit}").status_code == 422
+
+def test_duplicate_limit_is_validated(client, questions):
+    response = client.post("/questions/duplicates?limit=0", json={"title": "Question 1", "content": "How do I revise?"})
+    assert response.status_code == 422
+
+def test_cursor_pages_cover_every_question(client, questions):
+    seen, cursor = [], None
+    while True:
+        response = client.get("/questions/", params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen.extend(question["id"] for question in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert [q["id"] for q in questions] == [i for i in seen if i in {q["id"] for q in questions}]
+
+def test_cursor_pages_cover_isoformat_rows(client, questions):
+    # Rows written with isoformat() (as seed_data.py used to), two in the same second
+    with engine.begin() as conn:
+        seeded = [conn.execute(text(
+            "INSERT INTO questions (title, content, student_id, created_at) VALUES ('Seeded', 'Old', :s, :t) RETURNING id"
+        ), {"s": questions[0]["student_id"], "t": created_at}).scalar() for created_at in
+            ("2020-01-01T09:00:00", "2020-01-01T09:00:00", "2020-01-01T09:00:00.500000", "2020-01-02T10:00:00")]
+    prepare_database()  # what the next startup does
+
+    seen, cursor = [], None
+    for _ in range(100):
+        response = client.get("/questions/", params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        seen.extend(question["id"] for question in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert cursor is None
+    assert len(seen) == len(set(seen))
+    assert [i for i in seen if i in seeded] == seeded
+
+def test_next_cursor_handles_empty_pages():
+    assert next_cursor([], 0) is None
+    assert next_cursor([object()], 0) is None
+
+def test_search_highlights_escape_stored_html(client, questions):
+    question = client.post("/questions/", json={
+        "title": "<img src=x onerror=alert(1)> revision timetable",
+        "content": "<script>alert('x')</script> my revision plan",
+        "student_id": questions[0]["student_id"]
+    }).json()
+    hits = {hit["id"]: hit for hit in client.get("/questions/search", params={"q": "revision"}).json()}
+    hit = hits[question["id"]]
+    assert hit["highlighted_title"] == "&lt;img src=x onerror=alert(1)&gt; <mark>revision</mark> timetable"
+    # Apart from the highlights, the snippet holds no markup either
+    assert "<mark>revision</mark>" in hit["snippet"]
+    assert "<" not in hit["snippet"].replace("<mark>", "").replace("</mark>", "")
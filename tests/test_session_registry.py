@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from backend.models import Student, StudySession
+from backend.session_registry import ActiveSessionRegistry
+
+def add_session(db, completed=False, start_time=None):
+    session = StudySession(student_id=1, start_time=start_time or datetime.utcnow(), completed=completed)
+    db.add(session)
+    db.commit()
+    return session.id
+
+def test_recover_restores_checkpointed_sessions(session_factory):
+    with session_factory() as db:
+        db.add(Student(id=1, name="Test", email="test@studybuddy.com", hashed_password="x"))
+        db.commit()
+        running = add_session(db)
+        other = add_session(db)
+        completed = add_session(db, completed=True)
+        abandoned = add_session(db, start_time=datetime.utcnow() - timedelta(days=2))
+
+    registry = ActiveSessionRegistry(session_factory, checkpoint_seconds=3600)
+    registry.register(running)
+    registry.register(other)
+    registry.update(running, focus_score=72.5, distractions_count=3, duration_minutes=18)
+    registry.update(other, focus_score=40.0, distractions_count=1, duration_minutes=5)
+    assert registry.checkpoint() == 2
+
+    # Updates after the last checkpoint are what a crash loses
+    registry.update(running, focus_score=10.0, distractions_count=9, duration_minutes=19)
+
+    # Simulated restart: a new registry over the same database
+    restarted = ActiveSessionRegistry(session_factory, checkpoint_seconds=3600)
+    assert restarted.recover() == 2
+    assert restarted.get(completed) is None
+    assert restarted.get(abandoned) is None
+
+    state = restarted.get(running)
+    assert (state.focus_score, state.distractions_count, state.duration_minutes) == (72.5, 3, 18)
+    assert not state.dirty
+    state = restarted.get(other)
+    assert (state.focus_score, state.distractions_count, state.duration_minutes) == (40.0, 1, 5)
+    assert restarted.metrics()["active_sessions"] == 2
+    registry.stop()
+
+def test_recover_keeps_newer_in_memory_values(session_factory):
+    with session_factory() as db:
+        db.add(Student(id=1, name="Test", email="test@studybuddy.com", hashed_password="x"))
+        db.commit()
+        running = add_session(db)
+
+    registry = ActiveSessionRegistry(session_factory, checkpoint_seconds=3600)
+    registry.update(running, focus_score=55.0)
+    assert registry.recover() == 0
+    assert registry.get(running).focus_score == 55.0
+    assert registry.get(running).dirty
+    registry.stop()
+
+def test_completed_sessions_are_not_rewritten(session_factory):
+    with session_factory() as db:
+        db.add(Student(id=1, name="Test", email="test@studybuddy.com", hashed_password="x"))
+        db.commit()
+        finished = add_session(db, completed=True)
+        running = add_session(db)
+
+    registry = ActiveSessionRegistry(session_factory, checkpoint_seconds=3600)
+    assert not registry.update(finished, focus_score=12.0)
+    assert registry.get(finished) is None
+
+    # Completed by another path while its state was still in memory
+    registry.update(running, focus_score=12.0)
+    with session_factory() as db:
+        db.get(StudySession, running).completed = True
+        db.get(StudySession, running).focus_score = 90.0
+        db.commit()
+    registry.checkpoint()
+    with session_factory() as db:
+        assert db.get(StudySession, running).focus_score == 90.0
+    registry.stop()
+
+def test_late_update_after_completion_is_rejected(client):
+    student = client.post("/students/", json={"name": "Late", "email": "late@studybuddy.com", "password": "x"}).json()
+    session_id = client.post("/sessions/start", json={"student_id": student["id"]}).json()["session_id"]
+    assert client.put(f"/sessions/{session_id}/update", json={"focus_score": 50, "duration_minutes": 10}).status_code == 200
+    client.post(f"/sessions/{session_id}/complete", json={"focus_score": 90, "duration_minutes": 30})
+
+    response = client.put(f"/sessions/{session_id}/update", json={"focus_score": 12, "duration_minutes": 31})
+    assert response.status_code == 409
+    assert client.put("/sessions/999999/update", json={"focus_score": 12}).status_code == 404
+
+    from backend.main import session_registry
+    session_registry.checkpoint()
+    session = next(s for s in client.get(f"/students/{student['id']}/sessions").json() if s["id"] == session_id)
+    assert (session["focus_score"], session["duration_minutes"]) == (90, 30)